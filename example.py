@@ -7,8 +7,10 @@ from modules.bot import BotShop, Command, CommandPool, MessageContent
 # Осуществляем необходимые импорты:
 from modules.configurator import Configurator
 from modules.logger import logger_init
-from modules.products import CategoryPool
+from modules.orders import ShopperOrdersStorage
+from modules.products import CategoryPool, ImageFetcher, ImageProcessor, ImageStore
 from modules.user import SellerPool, ShopperPool
+from modules.utils import Backend, Outbox, ProjectCache, create_cache_backend
 
 # КОНФИГУРАТОР
 # Создаём объект - конфигуратор. Объект, хранящий все настройки проекта
@@ -23,20 +25,76 @@ logger_init(
 )
 
 
+# КЭШ
+# Подключаем к кэшу проекта хранилище, указанное в файле конфигурации. Хранилище shared позволяет нескольким процессам
+# бота на одном хосте переиспользовать полученные друг другом данные
+if configurator.cache.backend == "shared":
+    cache_backend = create_cache_backend(
+        "shared",
+        path=configurator.cache.path,
+        mmap_threshold=configurator.cache.mmap_threshold,
+    )
+else:
+    cache_backend = create_cache_backend(configurator.cache.backend)
+ProjectCache().set_backend(cache_backend)
+
+
+# ЗАПРОСЫ К API
+# Настраиваем время ожидания ответа API и выключатели запросов к группам методов API (пользователи, заказы, каталог,
+# авторизация). Пока API не отвечает, запросы к нему не выполняются, а бот работает с уже полученными данными
+Backend().configure(
+    connect_timeout=configurator.backend.connect_timeout,
+    read_timeout=configurator.backend.read_timeout,
+    failure_threshold=configurator.backend.failure_threshold,
+    reset_timeout=configurator.backend.reset_timeout,
+    error_rate=configurator.backend.error_rate,
+    window=configurator.backend.window,
+    min_calls=configurator.backend.min_calls,
+    slow_call_time=configurator.backend.slow_call_time,
+)
+
+
+# ОЧЕРЕДЬ ЗАПРОСОВ
+# Настраиваем очередь запросов к API, которые не удалось выполнить из-за недоступности сервера, и запускаем поток,
+# повторяющий эти запросы
+Outbox().configure(
+    path=configurator.outbox.path,
+    base_delay=configurator.outbox.base_delay,
+    max_delay=configurator.outbox.max_delay,
+    max_attempts=configurator.outbox.max_attempts,
+    failure_threshold=configurator.outbox.failure_threshold,
+    reset_timeout=configurator.outbox.reset_timeout,
+    timeout=configurator.outbox.timeout,
+    result_lifetime=configurator.outbox.result_lifetime,
+)
+Outbox().drain()
+
+
 # ТЕЛЕРГАММ БОТ
 # Создаем объект - телеграмм бота:
-bot = BotShop(configurator.bot.token)
+bot = BotShop(configurator.bot.token, request_budget=configurator.bot.request_budget)
 # Создаем объект - пул команд бота. Этот объект необходим для автоматического подключения описанных в обработчиках
 # команд
 command_pool = CommandPool(bot)
 
 
 # ПОКУПАТЕЛИ
+# Настраиваем локальное хранилище заказов покупателей. Заказы вернувшегося покупателя восстанавливаются из него сразу,
+# а их актуальность проверяется на сервере в фоне
+ShopperOrdersStorage().configure(
+    path=configurator.shopper_data.orders_cache.path,
+    max_age=configurator.shopper_data.orders_cache.max_age,
+    enabled=configurator.shopper_data.orders_cache.enabled,
+)
 # Создаем хранилище данных покупателей. Объект предоставляет доступ ко всем объектам-покупателям по их id
 shopper_pool = ShopperPool(
     shopper_url=configurator.api.shopper,
     orders_url=configurator.api.order,
     session_time=configurator.shopper_data.session_time,
+    sync_batch_size=configurator.shopper_data.order_sync.batch_size,
+    sync_workers=configurator.shopper_data.order_sync.max_workers,
+    sync_retries=configurator.shopper_data.order_sync.retries,
+    bulk_orders_url=configurator.shopper_data.order_sync.bulk_url,
 )
 # Запускаем поток для контроля данных пользователей. При помощи этого метода контролируется сессия каждого пользователя
 shopper_pool.data_control()
@@ -59,12 +117,46 @@ seller_pool.add_bot(bot)
 
 
 # КАТЕГОРИИ ТОВАРОВ
+# Настраиваем общий для всех товаров загрузчик изображений
+ImageFetcher().configure(
+    max_workers=configurator.product_data.image_fetcher.max_workers,
+    max_per_host=configurator.product_data.image_fetcher.max_per_host,
+    timeout=configurator.product_data.image_fetcher.timeout,
+    max_size=configurator.product_data.image_fetcher.max_size,
+)
+# Настраиваем локальное хранилище изображений товаров
+ImageStore().configure(
+    path=configurator.product_data.image_store.path,
+    max_size=configurator.product_data.image_store.max_size,
+)
+# Настраиваем обработку изображений товаров перед их отправкой в телеграмм
+ImageProcessor().configure(
+    enabled=configurator.product_data.image_processing.enabled,
+    max_side=configurator.product_data.image_processing.max_side,
+    quality=configurator.product_data.image_processing.quality,
+    processes=configurator.product_data.image_processing.processes,
+)
 # Создаем объект пул категорий. Объект хранит весь список категорий продаваемых товаров
 category_pool = CategoryPool(
     url_category=configurator.api.category,
     url_product=configurator.api.product,
     update_period=configurator.product_data.update_period,
+    prefetch_images=configurator.product_data.prefetch_images,
+    max_workers=configurator.product_data.max_workers,
+    lazy_categories=configurator.product_data.lazy_categories,
+    warm_up_categories=configurator.product_data.warm_up_categories,
+    snapshot_path=configurator.product_data.snapshot_path,
+    columnar=configurator.product_data.columnar,
+    prefetch_depth=configurator.product_data.prefetch.depth,
+    prefetch_workers=configurator.product_data.prefetch.max_workers,
 )
+# Изображения заранее загружаемых товаров отправляются в служебный чат для получения их file_id
+if configurator.product_data.prefetch.upload_chat_id:
+    category_pool.set_prefetch_uploader(
+        lambda product: bot.upload_product_images(
+            configurator.product_data.prefetch.upload_chat_id, product
+        )
+    )
 # Запускаем поток по контролю обновлений товаров
 category_pool.data_control()
 
@@ -95,4 +187,19 @@ if __name__ == "__main__":
         basket = user.get_basket()  # Получаем корзину пользователя
         bot.send_message(message.chat.id, str(basket))  # Отправляем текст корзины
 
+    # Пример обработчика поиска по каталогу: /search <запрос>
+    command = Command(name="search", description="Поиск товаров", priority=3)
+    command_pool.add_command(command)
+
+    @bot.message_handler(commands=[command.name])
+    @bot.registration_incoming_message
+    def search_products(message: Message) -> None:
+        """Функция поиска товаров по тексту запроса"""
+        query = message.text.partition(" ")[2]  # Текст запроса после команды
+        products = category_pool.search(query, limit=10)  # Ищем товары в каталоге
+        text = "\n".join(
+            f"{i_product.name} - {i_product.price} руб." for i_product in products
+        )
+        bot.send_message(message.chat.id, text or "По вашему запросу ничего не найдено")
+
     bot.polling()
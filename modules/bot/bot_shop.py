@@ -3,19 +3,23 @@
 взаимодействие с пользователем телеграмм, данными пользователей и каталогом товаров. Данный класс является дочерним для
 класса TeleBot библиотеки telebot и наследует его основной функционал, а так же переопределяет и определяет с нуля
 некоторые методы
+    Каждое обновление телеграмм обрабатывается с крайним сроком request_budget секунд: запросы к внешнему API, загрузка
+данных в кэш и ожидание данных в цепочке вызовов обработчика используют оставшееся до крайнего срока время.
 """
 
 import functools
-from typing import Callable, List, Optional
+from typing import Any, Callable, List, Optional
 
 from telebot import TeleBot
 from telebot.apihelper import ApiTelegramException
-from telebot.types import InputMediaPhoto, Message
+from telebot.types import Message
 
 from ..logger import get_development_logger
+from ..utils import DataTunnel, Deadline
 from .message_deletion_blocker import MessageDeletionBlocker
 
 dev_log = get_development_logger(__name__)
+data_tunnel = DataTunnel()
 
 
 class BotShop(TeleBot):
@@ -27,12 +31,46 @@ class BotShop(TeleBot):
     """
 
     def __init__(
-        self, token: str, disappearing_messages: bool = True, message_limit: int = 1
+        self,
+        token: str,
+        disappearing_messages: bool = True,
+        message_limit: int = 1,
+        request_budget: Optional[float] = 10,
     ):
         super().__init__(token)
         self.user_pool = None
         self.disappearing_messages: bool = disappearing_messages
         self.message_limit: int = message_limit
+        self.request_budget: Optional[float] = request_budget
+
+    def _exec_task(self, task: Callable, *args, **kwargs) -> None:
+        """
+            Метод изменяет функционал оригинального метода родительского класса, через который выполняются обработчики
+        всех обновлений телеграмм: обработчик выполняется с крайним сроком обработки обновления. Если request_budget
+        равен None - обработчик выполняется без крайнего срока
+        """
+        if self.request_budget is None:
+            return super()._exec_task(task, *args, **kwargs)
+
+        name = self.__get_update_name(args)
+
+        @functools.wraps(task)
+        def wrapped(*task_args, **task_kwargs) -> Any:
+            with Deadline(self.request_budget, name):
+                return task(*task_args, **task_kwargs)
+
+        return super()._exec_task(wrapped, *args, **kwargs)
+
+    @staticmethod
+    def __get_update_name(args: tuple) -> str:
+        """Метод возвращает название обрабатываемого обновления для записи в лог: тип обновления и id чата"""
+        update = args[0] if args else None
+        chat = getattr(update, "chat", None) or getattr(
+            getattr(update, "message", None), "chat", None
+        )
+        if chat is not None:
+            return f"{type(update).__name__} в чате {chat.id}"
+        return type(update).__name__
 
     def __delete_old_message(self, message: Message, obj: str) -> None:
         """
@@ -160,11 +198,70 @@ class BotShop(TeleBot):
 
             register(*msg_list, msg_caption)
 
-        if not isinstance(product.image[0].media, str):
-            product.image = [
-                InputMediaPhoto(i_message.photo[len(i_message.photo) - 1].file_id)
+        if not product.is_uploaded():
+            self.__set_file_id(product, msg_list)
+
+        self.__prefetch(chat_id, product)
+
+    @staticmethod
+    def __set_file_id(product, msg_list: List[Message]) -> None:
+        """Метод передает товару file_id, присвоенные телеграммом отправленным изображениям товара"""
+        product.set_file_id(
+            [
+                i_message.photo[len(i_message.photo) - 1].file_id
                 for i_message in msg_list
             ]
+        )
+
+    def __prefetch(self, chat_id: int, product) -> None:
+        """
+            Метод запускает предварительную загрузку товаров категории, следующих за отправленным пользователю товаром.
+        Позиция пользователя в каталоге определяется по его атрибутам category_index и product_index
+        """
+        if self.user_pool is None:
+            return
+
+        try:
+            user = self.user_pool.get(chat_id)
+            data_tunnel.perform(
+                "CategoryPool.prefetch",
+                product,
+                user.category_index,
+                user.product_index,
+            )
+
+        except ValueError:
+            pass
+
+        except Exception as ex:
+            dev_log.exception(
+                "Не удалось запустить предварительную загрузку товаров", exc_info=ex
+            )
+
+    def upload_product_images(self, chat_id: int, product) -> None:
+        """
+            Метод загружает изображения товара в телеграмм, отправляя их в служебный чат с указанным id, и передает
+        товару полученные file_id. Отправленные сообщения сразу удаляются. Используется предварительной загрузкой
+        товаров, что бы пользователю изображения отправлялись по file_id без загрузки их байтов
+        """
+        try:
+            msg_list: List[Message] = self.send_media_group(
+                chat_id, product.image, disable_notification=True
+            )
+
+        except ApiTelegramException as ex:
+            dev_log.warning(
+                f"Не удалось загрузить изображения товара {product.productsId} в телеграмм: {ex}"
+            )
+            return
+
+        self.__set_file_id(product, msg_list)
+
+        for i_message in msg_list:
+            try:
+                self.delete_message(chat_id, i_message.id)
+            except ApiTelegramException:
+                pass
 
     def notify_user(self, user_id: int, message: str) -> None:
         """Метод отправляет пользователю уведомление с заданным текстом"""
@@ -1,3 +1,5 @@
-from .orders import Basket, Order, OrderSchema
+from .order_sync import OrderSynchronizer, SyncBatchResult
+from .orders import Basket, Order, OrderSchema, hydrate_orders
+from .orders_storage import ShopperOrdersStorage
 from .seller_orders_pool import SellerOrdersPool
-from .shopper_orders_pool import ShopperOrdersPool
+from .shopper_orders_pool import PagedApiUnsupported, ShopperOrdersPool
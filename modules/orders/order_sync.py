@@ -0,0 +1,226 @@
+"""
+    Данный модуль содержит реализацию пакетной синхронизации заказов с сервером. Синхронизатор получает заказы
+нескольких пользователей (например, всех покупателей, сессия которых завершилась), выбирает из них заказы, которые
+необходимо сохранить на сервере, и передает их пакетами: если у внешнего API есть метод пакетного сохранения заказов -
+каждый пакет передается одним запросом, иначе заказы пакета сохраняются параллельно ограниченным количеством потоков.
+Для каждого пакета формируется результат синхронизации. Заказы, которые не удалось передать из-за недоступности
+сервера, передаются повторно, а после всех попыток записываются в исходящую очередь запросов. Заказы, которые сервер
+отказался сохранить, повторно не передаются.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from ..logger import get_development_logger
+from ..utils import ORDERS, Backend, RequestRejectedError, is_retryable
+from .orders import Order, OrderSchema
+
+dev_log = get_development_logger(__name__)
+backend = Backend()
+
+
+@dataclass
+class SyncBatchResult:
+    """
+        Класс - результат синхронизации одного пакета заказов: номер попытки (0 - первая передача), номер пакета,
+    количество заказов в пакете, количество сохраненных заказов и заказы, которые не удалось сохранить
+    """
+
+    attempt: int
+    number: int
+    total: int
+    saved: int = 0
+    failed: List[Order] = field(default_factory=list)
+
+
+class OrderSynchronizer:
+    """
+        Класс - синхронизатор заказов с сервером. Метод пакетного сохранения внешнего API (bulk_url) принимает список
+    заказов и возвращает список результатов в том же порядке: {"idOrder": <id заказа>} для сохраненного заказа или
+    {"error": <описание ошибки>} для заказа, который не удалось сохранить. Новые заказы передаются с ключом
+    идемпотентности (поле idempotencyKey), по которому сервер распознает повторную передачу уже сохраненного заказа.
+    Если bulk_url не указан или сервер не поддерживает пакетное сохранение - заказы сохраняются по одному, параллельно
+    не более чем max_workers потоками
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 20,
+        max_workers: int = 4,
+        retries: int = 2,
+        retry_delay: float = 1,
+        bulk_url: Optional[str] = None,
+    ):
+        self.__batch_size: int = max(1, batch_size)
+        self.__max_workers: int = max(1, max_workers)
+        self.__retries: int = retries
+        self.__retry_delay: float = retry_delay
+        self.__bulk_url: Optional[str] = bulk_url
+        self.__order_schema = OrderSchema()
+        self.__content_type = {"Content-Type": "application/json"}
+
+    def sync(self, orders: Iterable[Order]) -> List[SyncBatchResult]:
+        """
+            Метод сохраняет на сервере переданные заказы, которые были созданы или изменены, и возвращает результаты
+        синхронизации всех пакетов, в том числе пакетов повторной передачи. Повторно передаются только заказы, которые
+        не удалось передать из-за недоступности сервера. Заказы, которые не удалось сохранить, остаются в списке failed
+        результата последнего пакета, в котором они передавались. Новые
+        заказы, которые уже ожидают сохранения в исходящей очереди запросов, не передаются - данные запроса в очереди
+        заменяются текущими
+        """
+        pending = list()
+        for i_order in orders:
+            if not i_order.need_saving():
+                continue
+
+            if i_order.check_outbox():
+                i_order.prepare_saving()
+                i_order.enqueue_saving()
+            else:
+                pending.append(i_order)
+        results: List[SyncBatchResult] = list()
+        undelivered: List[Order] = list()
+
+        for i_attempt in range(self.__retries + 1):
+            if not pending:
+                break
+
+            if i_attempt > 0:
+                dev_log.info(
+                    f"Повторная передача {len(pending)} заказов на сервер, попытка {i_attempt}"
+                )
+                time.sleep(self.__retry_delay * i_attempt)
+
+            undelivered = list()
+            for i_number, i_start in enumerate(
+                range(0, len(pending), self.__batch_size)
+            ):
+                result, batch_undelivered = self.__sync_batch(
+                    i_attempt, i_number, pending[i_start : i_start + self.__batch_size]
+                )
+                results.append(result)
+                undelivered.extend(batch_undelivered)
+
+            pending = undelivered
+
+        if pending:
+            dev_log.warning(
+                f"Не удалось передать на сервер {len(pending)} заказов: "
+                f"{', '.join(str(i_order.idOrder) for i_order in pending)}"
+            )
+            for i_order in pending:
+                i_order.enqueue_saving()
+
+        return results
+
+    def __sync_batch(
+        self, attempt: int, number: int, orders: List[Order]
+    ) -> Tuple[SyncBatchResult, List[Order]]:
+        """
+            Метод сохраняет на сервере один пакет заказов. Возвращает результат синхронизации пакета и заказы, которые
+        не удалось передать пакетным запросом из-за недоступности сервера (заказы, которые сохранялись по одному,
+        записываются в очередь запросов самостоятельно)
+        """
+        for i_order in orders:
+            i_order.prepare_saving()
+
+        saved = None
+        if self.__bulk_url:
+            saved = self.__api_post_bulk(orders)
+        if saved is None:
+            saved = self.__save_concurrently(orders)
+
+        result = SyncBatchResult(
+            attempt=attempt,
+            number=number,
+            total=len(orders),
+            saved=sum(i_saved is True for i_saved in saved),
+            failed=[i_order for i_order, i_saved in zip(orders, saved) if not i_saved],
+        )
+        dev_log.info(
+            f"Пакет заказов №{number} (попытка {attempt}): сохранено {result.saved} из {result.total}"
+        )
+        return result, [
+            i_order for i_order, i_saved in zip(orders, saved) if i_saved is None
+        ]
+
+    def __save_concurrently(self, orders: List[Order]) -> List[bool]:
+        """Метод сохраняет заказы пакета по одному в нескольких потоках и возвращает результат для каждого заказа"""
+        if len(orders) == 1 or self.__max_workers == 1:
+            return [i_order.save_on_server() for i_order in orders]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.__max_workers, len(orders)),
+            thread_name_prefix="order_sync",
+        ) as executor:
+            return list(executor.map(lambda i_order: i_order.save_on_server(), orders))
+
+    def __api_post_bulk(self, orders: List[Order]) -> Optional[List[Optional[bool]]]:
+        """
+            Метод передает пакет заказов методу пакетного сохранения внешнего API и возвращает результат для каждого
+        заказа: True - заказ сохранен, False - сервер отказался сохранить заказ, None - пакет не удалось передать из-за
+        недоступности сервера. Если сервер не поддерживает пакетное сохранение - возвращает None и отключает его
+        использование. Данные новых заказов передаются вместе с их ключами идемпотентности
+        """
+        try:
+            data = self.__order_schema.dump(orders, many=True)
+            for i_order, i_data in zip(orders, data):
+                if not i_order._registered_on_server:
+                    i_data["idempotencyKey"] = i_order._idempotency_key
+
+            response = backend.post(
+                ORDERS,
+                self.__bulk_url,
+                headers=self.__content_type,
+                data=json.dumps(data),
+            )
+
+            if response.status_code in (404, 405, 501):
+                dev_log.warning(
+                    f"Сервер не поддерживает пакетное сохранение заказов (статус код {response.status_code}), "
+                    f"заказы будут сохраняться по одному"
+                )
+                self.__bulk_url = None
+                return None
+
+            if response.status_code != 200:
+                dev_log.warning(
+                    f"Не удалось передать пакет заказов на сервер. Статус код {response.status_code}"
+                )
+                return [None if is_retryable(response.status_code) else False] * len(
+                    orders
+                )
+
+            items = json.loads(response.text)
+            if not isinstance(items, list) or len(items) != len(orders):
+                dev_log.warning(
+                    "Сервер вернул результат пакетного сохранения заказов в неизвестном формате"
+                )
+                return [False] * len(orders)
+
+        except RequestRejectedError as ex:
+            dev_log.info(f"Пакет заказов не передан на сервер: {ex}")
+            return [None] * len(orders)
+
+        except Exception as ex:
+            dev_log.exception(
+                "При попытке передать пакет заказов на сервер произошла ошибка:",
+                exc_info=ex,
+            )
+            return [None] * len(orders)
+
+        saved = list()
+        for i_order, i_item in zip(orders, items):
+            if isinstance(i_item, dict) and "error" not in i_item:
+                i_order._set_saved(i_item.get("idOrder", i_order.idOrder))
+                saved.append(True)
+            else:
+                dev_log.warning(
+                    f"Сервер не сохранил заказ №{i_order.idOrder}: {i_item}"
+                )
+                saved.append(False)
+
+        return saved
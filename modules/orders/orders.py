@@ -3,25 +3,92 @@
 помощи которого осуществляется хранение, доступ и редактирование заказов пользователя.
 """
 
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from threading import RLock
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
 import pytz
-import requests
 from marshmallow import Schema, fields, post_load, validate
 
 from ..logger import get_development_logger
-from ..products import Product
-from ..utils import DataTunnel, ProjectCache
+from ..products import Product, ProductPlaceholder
+from ..utils import (
+    ORDERS,
+    Backend,
+    DataTunnel,
+    Outbox,
+    ProjectCache,
+    RequestRejectedError,
+    deadline_step,
+    is_retryable,
+)
 
 dev_log = get_development_logger(__name__)
 product_cache = ProjectCache()
 data_tunnel = DataTunnel()
+outbox = Outbox()
+backend = Backend()
 moscow_tz = pytz.timezone("Europe/Moscow")
 
 
+def get_products(list_product_id: Iterable[str]) -> Dict[str, Product]:
+    """
+        Функция возвращает словарь id товара - объект товара для переданных id товаров, получая их из пула категорий
+    одним пакетным запросом. Вместо товаров, которые не удалось получить, возвращаются заглушки ProductPlaceholder
+    """
+    list_product_id = list(dict.fromkeys(list_product_id))
+    if not list_product_id:
+        return dict()
+
+    with deadline_step(f"получение {len(list_product_id)} товаров заказов"):
+        products: Dict[str, Product] = data_tunnel.perform(
+            "CategoryPool.get_products", list_product_id
+        )
+    for i_product_id in list_product_id:
+        if i_product_id not in products:
+            dev_log.warning(
+                f"Товар {i_product_id} не найден, в заказе он будет отображаться как недоступный"
+            )
+            products[i_product_id] = ProductPlaceholder(i_product_id)
+
+    return products
+
+
+def hydrate_orders(orders: List["Order"]) -> List["Order"]:
+    """
+        Функция передает заказам объекты их товаров. Id товаров собираются со всех переданных заказов, и товары
+    получаются одним пакетным запросом к пулу категорий, а не по одному для каждого товара каждого заказа. Используется
+    пулами заказов для заказов, загруженных с параметром resolve_products = False
+    """
+    products = get_products(
+        i_product_id for i_order in orders for i_product_id in i_order.get_products_id()
+    )
+    for i_order in orders:
+        i_order.set_products(products)
+
+    return orders
+
+
+@dataclass
+class OrderItem:
+    """Класс - позиция заказа: товар и его количество. Товар равен None, пока товары заказа не получены"""
+
+    product: Optional[Product]
+    count: int
+
+
 class Order:
-    """Модель заказа"""
+    """
+        Модель заказа. Позиции заказа хранятся в упорядоченном словаре id товара - позиция заказа, поэтому
+    добавление, изменение и удаление товара выполняются без перебора товаров заказа. Стоимость товаров заказа
+    пересчитывается при каждом изменении позиций, а данные о товарах для сервера (products_data) формируются из позиций
+    заказа при сериализации. Текстовое представление заказа кэшируется до следующего изменения заказа. Изменение
+    заказа и замена его данных данными сервера выполняются под блокировкой заказа
+    """
 
     def __init__(
         self,
@@ -41,6 +108,7 @@ class Order:
         source: Optional[str] = None,
         order_url: Optional[str] = None,
         registered_on_server: bool = False,
+        resolve_products: bool = True,
     ):
         self.tgId = tgId
         self.idOrder = idOrder
@@ -48,91 +116,261 @@ class Order:
         self.datetimeCreation: str = datetimeCreation
         self.totalCost: int = totalCost
         self.delivery: bool = delivery
-        self.products_data: List[Dict[str, Any]] = products_data
-        self.products: Optional[List[Product]] = list()
         self.datetimeUpdate: Optional[str] = datetimeUpdate
         self.userComment: Optional[str] = userComment
         self.sellerComment: Optional[str] = sellerComment
         self.completionDate: Optional[str] = completionDate
         self.source: Optional[str] = source
 
-        self._products_count: Dict[str:int] = dict()
+        self._items: Dict[str, OrderItem] = dict()
+        self._items_cost: int = 0
+        self._render_cache: Dict[str, Tuple[int, Any]] = dict()
         self._order_schema = OrderSchema()
         self._content_type: Dict[str, str] = {"Content-Type": "application/json"}
         self._order_url: str = order_url
         self._registered_on_server: bool = registered_on_server
+        self._idempotency_key: str = str(uuid.uuid4())
+        self._lock = RLock()
+
+        for i_dict in products_data:
+            product_id = i_dict.get("productsId")
+            item = self._items.get(product_id, None)
+            if item is None:
+                self._items[product_id] = OrderItem(None, i_dict.get("count"))
+            else:
+                dev_log.warning(
+                    f"Товар {product_id} указан в заказе №{idOrder} несколько раз, количество товара будет суммировано"
+                )
+                item.count += i_dict.get("count")
+
+        if resolve_products:
+            self.set_products(get_products(self.get_products_id()))
+        else:
+            self._update_control_hash()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """
+            Метод отмечает изменение заказа (увеличивает номер ревизии заказа) при изменении значения любого поля,
+        которое хранится на сервере. Служебные поля (начинающиеся с "_") ревизию не изменяют
+        """
+        if not name.startswith("_") and self.__dict__.get(name, value) != value:
+            self.__dict__["_revision"] = self.__dict__.get("_revision", 0) + 1
+        super().__setattr__(name, value)
 
-        self.__get_product_obj()
+    @property
+    def _revision(self) -> int:
+        """Номер ревизии заказа. Увеличивается при каждом изменении полей или позиций заказа"""
+        return self.__dict__.get("_revision", 0)
 
-        self._control_hash: int = self._get_hash_sum()
+    def _touch(self) -> None:
+        """Метод отмечает изменение позиций заказа"""
+        self.__dict__["_revision"] = self._revision + 1
 
-    def __get_product_obj(self) -> None:
-        """Метод преобразует полученные данные (JSON) о товарах в список объектов - товаров"""
-        for i_dict in self.products_data:
-            product_id = i_dict.get("productsId")
-            count = i_dict.get("count")
-            self._products_count.update({product_id: count})
-            product: Product = data_tunnel.perform(
-                "CategoryPool.get_product", product_id
+    def _get_rendered(self, name: str, render: Callable[[], Any]) -> Any:
+        """
+            Метод возвращает результат функции формирования текста заказа с указанным названием. Результат кэшируется
+        и формируется заново только после изменения заказа
+        """
+        cached = self._render_cache.get(name, None)
+        if cached is not None and cached[0] == self._revision:
+            return cached[1]
+
+        result = render()
+        self._render_cache[name] = (self._revision, result)
+        return result
+
+    @property
+    def products(self) -> List[Product]:
+        """Список товаров заказа в порядке их добавления в заказ"""
+        return [
+            i_item.product
+            for i_item in self._items.values()
+            if i_item.product is not None
+        ]
+
+    @property
+    def products_data(self) -> List[Dict[str, Any]]:
+        """Данные о товарах заказа в том виде, в котором их принимает внешний API"""
+        return [
+            {"productsId": i_product_id, "count": i_item.count}
+            for i_product_id, i_item in self._items.items()
+        ]
+
+    def get_products_id(self) -> List[str]:
+        """Метод возвращает список id товаров заказа"""
+        return list(self._items)
+
+    def set_products(self, products: Mapping[str, Product]) -> None:
+        """
+            Метод передает позициям заказа объекты товаров, выбирая их из переданного словаря id товара - объект
+        товара. Вместо товаров, которых нет в словаре, используются заглушки ProductPlaceholder
+        """
+        for i_product_id, i_item in self._items.items():
+            i_item.product = products.get(i_product_id, None) or ProductPlaceholder(
+                i_product_id
             )
-            self.products.append(product)
+
+        self._items_cost = sum(
+            i_item.count * i_item.product.price for i_item in self._items.values()
+        )
+        self._touch()
+        self._update_control_hash()
+
+    @staticmethod
+    def _get_key(product_id: Union[Product, str]) -> str:
+        """Метод возвращает id товара по указанному id или переданному экземпляру класса"""
+        if isinstance(product_id, Product):
+            return product_id.productsId
+        return product_id
+
+    @staticmethod
+    def _get_item_cost(item: OrderItem) -> int:
+        """Метод возвращает стоимость позиции заказа"""
+        if item.product is None:
+            return 0
+        return item.count * item.product.price
+
+    def _add_item(self, product: Product, count: int) -> None:
+        """
+            Метод добавляет в заказ товар в указанном количестве. Если товар уже есть в заказе - его количество
+        увеличивается
+        """
+        item = self._items.get(product.productsId, None)
+        if item is None:
+            item = OrderItem(product, count)
+            self._items[product.productsId] = item
+        else:
+            item.count += count
+
+        self._items_cost += count * product.price
+        self._touch()
+
+    def _remove_item(self, product_id: Union[Product, str]) -> Optional[OrderItem]:
+        """Метод удаляет товар из заказа и возвращает удаленную позицию заказа"""
+        item = self._items.pop(self._get_key(product_id), None)
+        if item is not None:
+            self._items_cost -= self._get_item_cost(item)
+            self._touch()
+        return item
 
     def get_product_count(self, product_id: Union[Product, str]) -> Optional[int]:
         """
             Метод нового интерфейса заказа - возвращает количество конкретного товара (по указанному id или
         переданному экземпляру класса) в заказе
         """
-        if isinstance(product_id, str):
-            return self._products_count.get(product_id, None)
-        elif isinstance(product_id, Product):
-            return self._products_count.get(product_id.productsId, None)
+        item = self._items.get(self._get_key(product_id), None)
+        if item is not None:
+            return item.count
 
     def set_product_count(self, product_id: Union[Product, str], count: int) -> None:
         """
             Метод нового интерфейса заказа - устанавливает новое значение количества конкретного товара (по указанному
         id или переданному экземпляру класса) в заказе
         """
-        if isinstance(product_id, str):
-            key = product_id
-        else:
-            key = product_id.productsId
+        with self._lock:
+            item = self._items.get(self._get_key(product_id), None)
 
-        self._products_count[key] = count
-        list_dict = list(
-            filter(lambda i_dict: key in i_dict.values(), self.products_data)
-        )
+            if item is None:
+                dev_log.warning(
+                    "При изменении количества товаров в заказе, товар по указанному id не был найден"
+                )
+                return
 
-        if len(list_dict) == 1:
-            list_dict[0]["count"] = count
-        elif len(list_dict) > 1:
-            dev_log.warning(
-                "При изменении количества товаров в заказе, было найдено несколько товаров с одинаковым id"
+            self._items_cost -= self._get_item_cost(item)
+            item.count = count
+            self._items_cost += self._get_item_cost(item)
+            self._touch()
+
+    def _get_outbox_key(self) -> str:
+        """Метод возвращает ключ заказа в исходящей очереди запросов"""
+        if self._registered_on_server:
+            return f"order:{self.idOrder}"
+        return f"order:new:{self._idempotency_key}"
+
+    def enqueue_saving(self) -> None:
+        """
+            Метод записывает заказ в исходящую очередь запросов, чтобы он был сохранен на сервере, когда сервер станет
+        доступен. Новый заказ передается с постоянным ключом идемпотентности, поэтому повторы его передачи не создают
+        на сервере дубликаты
+        """
+        try:
+            outbox.add(
+                self._get_outbox_key(),
+                "PUT" if self._registered_on_server else "POST",
+                self._order_url,
+                self._order_schema.dumps(self),
+                None if self._registered_on_server else self._idempotency_key,
             )
-        elif len(list_dict) < 1:
-            dev_log.warning(
-                "При изменении количества товаров в заказе, товар по указанному id не был найден"
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось записать заказ №{self.idOrder} в очередь запросов",
+                exc_info=ex,
             )
 
-    def _api_post(self):
-        """Метод передачи данных о заказе на сервер"""
+    def check_outbox(self) -> bool:
+        """
+            Метод сверяет новый заказ с исходящей очередью запросов. Если очередь уже сохранила заказ на сервере - заказу
+        присваивается id из ответа сервера, заказ отмечается зарегистрированным на сервере и измененным, чтобы
+        изменения, сделанные после записи заказа в очередь, были переданы запросом PUT. Возвращает True, если запрос на
+        сохранение заказа еще ожидает выполнения в очереди и передавать заказ на сервер сейчас не нужно
+        """
+        if self._registered_on_server:
+            return False
+
+        outbox_key = self._get_outbox_key()
+        entry = outbox.get_entry(outbox_key)
+        if entry is None:
+            return False
+        if entry.pending:
+            return True
+
+        try:
+            id_order = json.loads(entry.response or "{}").get("idOrder", None)
+        except (ValueError, AttributeError):
+            id_order = None
+
+        if id_order is not None:
+            self.idOrder = id_order
+        self._registered_on_server = True
+        self._set_unsaved()
+        outbox.discard(outbox_key)
+        dev_log.debug(f"Заказ №{self.idOrder} сохранен на сервере очередью запросов")
+        return False
+
+    def _api_post(self) -> bool:
+        """
+            Метод передачи данных о заказе на сервер. Возвращает True, если заказ сохранен на сервере. Если сервер
+        недоступен - заказ записывается в исходящую очередь запросов
+        """
+        outbox_key, status_code = self._get_outbox_key(), None
         try:
             data = self._order_schema.dumps(self)
-            response = requests.post(
-                self._order_url, headers=self._content_type, data=data
+            response = backend.post(
+                ORDERS,
+                self._order_url,
+                headers={
+                    **self._content_type,
+                    "Idempotency-Key": self._idempotency_key,
+                },
+                data=data,
             )
+            status_code = response.status_code
 
             if response.status_code == 200:
                 order_id_dict = response.json()
-                self.idOrder = order_id_dict.get("idOrder")
-                self._registered_on_server = True
+                self._set_saved(order_id_dict.get("idOrder"))
+                outbox.discard(outbox_key)
                 dev_log.debug(
                     f"Данные заказа №{self.idOrder} успешно переданы на сервер"
                 )
+                return True
 
-            else:
-                dev_log.warning(
-                    f"Не удалось передать заказ №{self.idOrder} на сервер. Статус код {response.status_code}"
-                )
+            dev_log.warning(
+                f"Не удалось передать заказ №{self.idOrder} на сервер. Статус код {response.status_code}"
+            )
+
+        except RequestRejectedError as ex:
+            dev_log.info(f"Заказ №{self.idOrder} не передан на сервер: {ex}")
 
         except Exception as ex:
             dev_log.exception(
@@ -140,24 +378,37 @@ class Order:
                 exc_info=ex,
             )
 
-    def _api_put(self):
-        """Метод обновления данных о заказе на сервер"""
+        if is_retryable(status_code):
+            self.enqueue_saving()
+        return False
+
+    def _api_put(self) -> bool:
+        """
+            Метод обновления данных о заказе на сервер. Возвращает True, если заказ обновлен на сервере. Если сервер
+        недоступен - заказ записывается в исходящую очередь запросов
+        """
+        status_code = None
         try:
             data = self._order_schema.dumps(self)
-            response = requests.put(
-                self._order_url, headers=self._content_type, data=data
+            response = backend.put(
+                ORDERS, self._order_url, headers=self._content_type, data=data
             )
+            status_code = response.status_code
 
             if response.status_code == 200:
                 dev_log.debug(
                     f"Данные заказа №{self.idOrder} успешно обновлены на сервере"
                 )
-                self._control_hash = self._get_hash_sum()
+                self._set_saved()
+                outbox.discard(self._get_outbox_key())
+                return True
 
-            else:
-                dev_log.warning(
-                    f"Не удалось обновить заказ №{self.idOrder} на сервере. Статус код {response.status_code}"
-                )
+            dev_log.warning(
+                f"Не удалось обновить заказ №{self.idOrder} на сервере. Статус код {response.status_code}"
+            )
+
+        except RequestRejectedError as ex:
+            dev_log.info(f"Заказ №{self.idOrder} не обновлен на сервере: {ex}")
 
         except Exception as ex:
             dev_log.exception(
@@ -165,18 +416,85 @@ class Order:
                 exc_info=ex,
             )
 
-    def save_on_server(self):
-        """Метод сохраняет данные о заказе на сервере, если это необходимо (заказ новый или был изменен"""
+        if is_retryable(status_code):
+            self.enqueue_saving()
+        return False
+
+    def need_saving(self) -> bool:
+        """Метод возвращает True, если заказ необходимо сохранить на сервере (заказ новый или был изменен)"""
+        return not self._registered_on_server or self.is_updated()
+
+    def _is_blank(self) -> bool:
+        """Метод возвращает True, если заказ не сохранялся на сервере и не содержит товаров"""
+        return not self._registered_on_server and not self._items
+
+    def _merge_server_order(self, order: "Order") -> bool:
+        """
+            Метод заменяет данные заказа данными, полученными от сервера, сохраняя сам объект заказа. Данные
+        заменяются, только если заказ не изменен после последнего сохранения на сервере или не содержит товаров и
+        не сохранялся на сервере. Возвращает True, если данные заказа заменены
+        """
+        with self._lock:
+            if self.need_saving() and not self._is_blank():
+                return False
+
+            for i_name, i_value in order.__dict__.items():
+                if not i_name.startswith("_"):
+                    setattr(self, i_name, i_value)
+            self._items = dict(order._items)
+            self._items_cost = order._items_cost
+            self._touch()
+            self._set_saved()
+            return True
+
+    def prepare_saving(self) -> None:
+        """Метод устанавливает дату и время обновления заказа перед его передачей на сервер"""
+        self.datetimeUpdate = datetime.now(moscow_tz).strftime("%d.%m.%Y %H:%M")
+
+    def save_on_server(self) -> bool:
+        """
+            Метод сохраняет данные о заказе на сервере, если это необходимо (заказ новый или был изменен). Возвращает
+        True, если заказ сохранен на сервере или его сохранение не требуется. Если сохранить заказ не удалось - заказ
+        остается измененным и будет сохранен при следующем вызове метода. Если новый заказ уже ожидает сохранения в
+        исходящей очереди запросов - заказ не передается на сервер, а данные запроса в очереди заменяются текущими
+        """
+        if not self.need_saving():
+            return True
+
+        self.prepare_saving()
+        if self.check_outbox():
+            self.enqueue_saving()
+            return False
+
         if not self._registered_on_server:
-            self.datetimeUpdate = datetime.now(moscow_tz).strftime("%d.%m.%Y %H:%M")
-            self._api_post()
-        elif self.is_updated():
-            self.datetimeUpdate = datetime.now(moscow_tz).strftime("%d.%m.%Y %H:%M")
-            self._api_put()
-            self._control_hash = self._get_hash_sum()
-
-    def _get_hash_sum(self) -> int:
-        """Этот метод возвращает хэш сумму всех полей объекта которые хранятся на сервере"""
+            return self._api_post()
+        return self._api_put()
+
+    def _set_saved(self, id_order: Optional[int] = None) -> None:
+        """Метод отмечает заказ как сохраненный на сервере. Если передан id заказа - он присваивается заказу"""
+        if id_order is not None:
+            self.idOrder = id_order
+        self._registered_on_server = True
+        self._update_control_hash()
+
+    def _set_unsaved(self) -> None:
+        """
+            Метод отмечает заказ как измененный после последнего сохранения на сервере. Используется при
+        восстановлении заказа, изменения которого не удалось сохранить на сервере в предыдущую сессию покупателя
+        """
+        self._control_hash = None
+        self._control_revision = None
+
+    def _update_control_hash(self) -> None:
+        """Метод запоминает хэш сумму и ревизию заказа, с которыми сравнивается заказ при проверке его изменений"""
+        self._control_hash: str = self._get_hash_sum()
+        self._control_revision: int = self._revision
+
+    def _get_hash_sum(self) -> str:
+        """
+            Этот метод возвращает хэш сумму всех полей объекта которые хранятся на сервере. Хэш сумма не зависит от
+        процесса бота, поэтому её можно сравнивать после перезапуска
+        """
         order_srt = "".join(
             [
                 str(i_val)
@@ -186,22 +504,29 @@ class Order:
         )
         order_products = "".join(
             [
-                "".join(
-                    [str(i_product), str(self.get_product_count(i_product.productsId))]
-                )
-                for i_product in self.products
+                "".join([i_product_id, str(i_item.product), str(i_item.count)])
+                for i_product_id, i_item in self._items.items()
             ]
         )
         order_srt = "".join([order_srt, order_products])
 
-        return hash(order_srt)
+        return hashlib.sha1(order_srt.encode()).hexdigest()
 
     def is_updated(self) -> bool:
-        """Если заказ был обновлен - метод вернет True"""
+        """
+            Если заказ был обновлен - метод вернет True. Если ревизия заказа не изменилась - хэш сумма заказа не
+        вычисляется
+        """
+        if self._revision == self._control_revision:
+            return False
         return not self._get_hash_sum() == self._control_hash
 
     def __repr__(self) -> str:
         """Метод выводит информацию о заказе при обращении к объекту заказа как к строчному объекту"""
+        return self._get_rendered("order", self.__render)
+
+    def __render(self) -> str:
+        """Метод формирует текст с информацией о заказе"""
         text = list()
         text.append("<b>Заказ №{}</b>".format(str(self.idOrder)))
         text.append("Статус: {}".format(self.get_order_status()))
@@ -227,9 +552,9 @@ class Order:
             text.append("Комментарий продавца: {}".format(self.sellerComment))
 
         text.append("Товары:")
-        for index, i_product in enumerate(self.products):
-            i_product: Product
-            product_count = self.get_product_count(i_product.productsId)
+        for index, i_item in enumerate(self._items.values()):
+            i_product: Product = i_item.product or ProductPlaceholder("")
+            product_count = i_item.count
             text.append(
                 "{num}. {category_name}: {prod_name} - {count} шт. = {sum} рублей".format(
                     num=index + 1,
@@ -273,16 +598,19 @@ class Order:
         """
         Метод проверяет, возможно ли выполнить доставку заказа, т.е. все ли товары в заказе могут быть доставлены
         """
-        self.delivery = all([i_product.delivery for i_product in self.products])
+        self.delivery = all(i_product.delivery for i_product in self.products)
         return self.delivery
 
     def get_title(self) -> str:
         """Метод возвращает строку с номеров и статусом заказа"""
-        return f"Заказ №{self.idOrder} - {self.get_order_status()}"
+        return self._get_rendered(
+            "title", lambda: f"Заказ №{self.idOrder} - {self.get_order_status()}"
+        )
 
     def cancel_order(self) -> None:
         """Метод отменяет заказ"""
-        self.status = 9
+        with self._lock:
+            self.status = 9
         self.save_on_server()
 
 
@@ -308,6 +636,7 @@ class Basket(Order):
         source: Optional[str] = None,
         order_url: Optional[str] = None,
         registered_on_server: bool = False,
+        resolve_products: bool = True,
     ):
         super().__init__(
             tgId,
@@ -324,52 +653,47 @@ class Basket(Order):
             source,
             order_url,
             registered_on_server,
+            resolve_products,
         )
 
     def add_product(self, product: Product, count: int) -> None:
-        """Метод добавляет в заказ новый продукт"""
-        product_in_basket = list(
-            filter(lambda i_product: i_product == product, self.products)
-        )
-
-        if len(product_in_basket) > 0:
-            new_product: Product = product_in_basket[0]
-            old_count = self.get_product_count(new_product)
-            self.set_product_count(new_product, old_count + count)
-
-        else:
-            self.products.append(product)
-            self._products_count.update({product.productsId: count})
-            self.products_data.append(
-                {"productsId": product.productsId, "count": count}
-            )
+        """Метод добавляет в заказ новый продукт. Если продукт уже есть в корзине - увеличивается его количество"""
+        with self._lock:
+            self._add_item(product, count)
+            self.__update_total_cost()
 
-        self.__update_total_cost()
+    def set_product_count(self, product_id: Union[Product, str], count: int) -> None:
+        """Метод устанавливает новое значение количества товара в корзине и обновляет стоимость корзины"""
+        with self._lock:
+            super().set_product_count(product_id, count)
+            self.__update_total_cost()
 
     def __update_total_cost(self):
-        """Метод пересчитывает общую стоимость всех товаров в корзине"""
-        self.totalCost = sum(
-            [
-                self.get_product_count(i_product) * i_product.price
-                for i_product in self.products
-            ]
-        )
+        """
+            Метод обновляет общую стоимость всех товаров в корзине. Стоимость товаров поддерживается позициями заказа
+        при каждом их изменении, поэтому перебор товаров не выполняется
+        """
+        self.totalCost = self._items_cost
 
     def __repr__(self) -> str:
         """Данный метод предоставляет текстовую информацию о корзине при обращении к ней как к текстовому объекту"""
         if self.status != 0:
             return super().__repr__()
 
-        if len(self.products) > 0:
+        self.__update_total_cost()
+        return self._get_rendered("basket", self.__render_basket)
+
+    def __render_basket(self) -> str:
+        """Метод формирует текст с информацией о товарах в корзине"""
+        if len(self._items) > 0:
             text = list()
-            self.__update_total_cost()
             text.append(
-                f"Всего {len(self.products)} товаров на сумму {self.totalCost} рублей:\n"
+                f"Всего {len(self._items)} товаров на сумму {self.totalCost} рублей:\n"
             )
 
-            for index, i_product in enumerate(self.products):
-                i_product: Product
-                i_product_count = self.get_product_count(i_product)
+            for index, i_item in enumerate(self._items.values()):
+                i_product: Product = i_item.product or ProductPlaceholder("")
+                i_product_count = i_item.count
                 text.append(
                     f"{index + 1}. {i_product.category}: {i_product.name} x {i_product_count} ="
                     f" {i_product_count * i_product.price}"
@@ -379,20 +703,36 @@ class Basket(Order):
         return ""
 
     def delete(self, index: int) -> None:
-        """Метод удаления переданного товара из корзины"""
-        self.products.pop(index)
-        self.__update_total_cost()
+        """Метод удаления товара с указанным порядковым номером (начиная с нуля) из корзины"""
+        self.remove_product(list(self._items)[index])
+
+    def remove_product(self, product_id: Union[Product, str]) -> None:
+        """Метод удаления товара (по указанному id или переданному экземпляру класса) из корзины"""
+        with self._lock:
+            if self._remove_item(product_id) is None:
+                dev_log.warning(
+                    "При удалении товара из корзины, товар по указанному id не был найден"
+                )
+            self.__update_total_cost()
 
     def clear(self) -> None:
         """Метод удаляет все продукты из корзины"""
-        self.products = list()
-        self.__update_total_cost()
+        with self._lock:
+            self._items.clear()
+            self._items_cost = 0
+            self._touch()
+            self.__update_total_cost()
 
     def get_list_product_name(self) -> List[str]:
         """Метод возвращает список названий товаров в корзине"""
+        return list(self._get_rendered("product_names", self.__render_product_names))
+
+    def __render_product_names(self) -> List[str]:
+        """Метод формирует список названий товаров в корзине"""
         list_product_name = list()
-        for index, i_product in enumerate(self.products):
-            i_product_count = self.get_product_count(i_product)
+        for index, i_item in enumerate(self._items.values()):
+            i_product: Product = i_item.product or ProductPlaceholder("")
+            i_product_count = i_item.count
             list_product_name.append(
                 f"{index+1}. {i_product.category}: {i_product.name} - {i_product_count} шт."
             )
@@ -403,8 +743,9 @@ class Basket(Order):
             Метод создает из корзины новый заказ и отправляет его на сервер. Данный метод предназначен для использования
         в методах класса ShopperOrdersPool, но его НЕЛЬЗЯ использовать самостоятельно!!!
         """
-        self.datetimeCreation = datetime.now(moscow_tz).strftime("%d.%m.%Y %H:%M")
-        self.status = 1
+        with self._lock:
+            self.datetimeCreation = datetime.now(moscow_tz).strftime("%d.%m.%Y %H:%M")
+            self.status = 1
         self.save_on_server()
 
 
@@ -453,6 +794,7 @@ class OrderSchema(Schema):
     registered_on_server = fields.Boolean(
         required=True, allow_none=False, load_only=True
     )
+    resolve_products = fields.Boolean(required=False, load_only=True)
 
     @post_load
     def create_order(self, data, **kwargs) -> Order:
@@ -0,0 +1,179 @@
+"""
+    Данный модуль содержит реализацию локального хранилища заказов покупателей. По окончании сессии покупателя его
+корзина и действующие заказы сохраняются в локальной базе данных вместе с версией данных, полученных от внешнего API,
+и временем их последней проверки. При следующем обращении покупателя пул заказов восстанавливается из хранилища без
+запроса к внешнему API, а актуальность заказов проверяется в фоновом потоке: если версия данных на сервере не
+изменилась - полученные данные повторно не разбираются.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, Float, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from ..logger import get_development_logger
+from ..utils import singleton
+
+dev_log = get_development_logger(__name__)
+
+Base = declarative_base()
+
+
+def get_orders_version(data: Any) -> str:
+    """Функция возвращает версию данных заказов, полученных от внешнего API, - хэш сумму этих данных"""
+    return hashlib.sha1(
+        json.dumps(data, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+class ShopperOrdersTable(Base):
+    """Класс - модель таблицы для хранения заказов покупателей"""
+
+    __tablename__ = "shopper_orders"
+
+    tgId = Column(Integer, primary_key=True, autoincrement=False)
+    data = Column(String, nullable=False)
+    version = Column(String, nullable=True)
+    updated_at = Column(Float, nullable=False)
+
+
+@dataclass
+class StoredOrders:
+    """
+        Класс - сохраненные заказы покупателя: данные заказов и корзины, версия данных, полученных от внешнего API, и
+    время последней проверки заказов на сервере (time.time)
+    """
+
+    data: List[Dict[str, Any]]
+    version: Optional[str]
+    updated_at: float
+
+
+@singleton
+class ShopperOrdersStorage:
+    """
+        Класс - хранилище заказов покупателей в локальной базе данных. Объект класса является синглтоном. Параметры
+    хранилища могут быть изменены методом configure, например значениями из файла config.yaml
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join("database", "user_database.db"),
+        max_age: Optional[float] = 604800,
+        enabled: bool = True,
+    ):
+        self.__lock = Lock()
+        self.configure(path, max_age, enabled)
+
+    def configure(
+        self,
+        path: str = os.path.join("database", "user_database.db"),
+        max_age: Optional[float] = 604800,
+        enabled: bool = True,
+    ) -> None:
+        """
+            Метод устанавливает файл базы данных хранилища и время в секундах, в течение которого сохраненные заказы
+        могут быть использованы без проверки на сервере (None - без ограничения). Если enabled = False - заказы не
+        сохраняются и не восстанавливаются
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        engine = create_engine(
+            "sqlite:///{}".format(path),
+            connect_args={"timeout": 30, "check_same_thread": False},
+        )
+        Base.metadata.create_all(engine)
+
+        with self.__lock:
+            self.__session_maker = sessionmaker(bind=engine)
+            self.__max_age: Optional[float] = max_age
+            self.enabled: bool = enabled
+
+    def load(self, tg_id: int) -> Optional[StoredOrders]:
+        """
+            Метод возвращает сохраненные заказы покупателя. Если заказы не сохранялись или были проверены на сервере
+        слишком давно - возвращается None
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            with self.__session_maker() as session:
+                row: Optional[ShopperOrdersTable] = session.get(
+                    ShopperOrdersTable, tg_id
+                )
+                if row is None:
+                    return None
+
+                if (
+                    self.__max_age is not None
+                    and time.time() - row.updated_at > self.__max_age
+                ):
+                    dev_log.debug(f"Сохраненные заказы покупателя {tg_id} устарели")
+                    return None
+
+                return StoredOrders(json.loads(row.data), row.version, row.updated_at)
+
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось прочитать сохраненные заказы покупателя {tg_id}",
+                exc_info=ex,
+            )
+
+    def save(
+        self,
+        tg_id: int,
+        data: List[Dict[str, Any]],
+        version: Optional[str],
+        updated_at: float,
+    ) -> None:
+        """
+            Метод сохраняет данные заказов и корзины покупателя, версию данных, полученных от внешнего API, и время их
+        последней проверки на сервере
+        """
+        if not self.enabled:
+            return
+
+        with self.__session_maker() as session:
+            session.merge(
+                ShopperOrdersTable(
+                    tgId=tg_id,
+                    data=json.dumps(data, ensure_ascii=False),
+                    version=version,
+                    updated_at=updated_at,
+                )
+            )
+
+            try:
+                session.commit()
+
+            except Exception as ex:
+                session.rollback()
+                dev_log.exception(
+                    f"Не удалось сохранить заказы покупателя {tg_id} в локальную базу данных",
+                    exc_info=ex,
+                )
+
+    def delete(self, tg_id: int) -> None:
+        """Метод удаляет сохраненные заказы покупателя"""
+        with self.__session_maker() as session:
+            try:
+                session.query(ShopperOrdersTable).filter(
+                    ShopperOrdersTable.tgId == tg_id
+                ).delete()
+                session.commit()
+
+            except Exception as ex:
+                session.rollback()
+                dev_log.exception(
+                    f"Не удалось удалить сохраненные заказы покупателя {tg_id}",
+                    exc_info=ex,
+                )
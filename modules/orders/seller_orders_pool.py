@@ -1,14 +1,13 @@
 import json
 from multiprocessing.pool import ThreadPool
-from typing import Dict, List, Optional
-
-import requests
+from typing import Dict, List, Optional, Tuple
 
 from ..logger import get_development_logger
-from ..utils import timer
-from .orders import Order, OrderSchema
+from ..utils import ORDERS, Backend, RequestRejectedError, bind_deadline, timer
+from .orders import Order, OrderSchema, hydrate_orders
 
 dev_log = get_development_logger(__name__)
+backend = Backend()
 
 
 class SellerOrdersPool:
@@ -20,6 +19,7 @@ class SellerOrdersPool:
         self.new: Optional[List[Order]] = None
         self.current: Optional[List[Order]] = None
         self.completed: Optional[List[Order]] = None
+        self.__titles: Dict[str, Tuple[Tuple, List[str]]] = dict()
 
         self.__get_orders()
 
@@ -28,7 +28,8 @@ class SellerOrdersPool:
     ) -> List[Order]:
         """Метод получает от внешнего API список заказов по указанному статусу"""
         try:
-            response = requests.get(
+            response = backend.get(
+                ORDERS,
                 "/".join([self.__url_order, status, str(start), str(stop)]),
                 headers=self.__content_type,
             )
@@ -38,6 +39,7 @@ class SellerOrdersPool:
                 for i_dict in data:
                     i_dict["order_url"] = self.__url_order
                     i_dict["registered_on_server"] = True
+                    i_dict["resolve_products"] = False
 
                 return self.__order_schema.loads(json.dumps(data), many=True)
 
@@ -46,6 +48,9 @@ class SellerOrdersPool:
             )
             return []
 
+        except RequestRejectedError as ex:
+            dev_log.info(f"Список {status} заказов не получен: {ex}")
+
         except Exception as ex:
             dev_log.exception(
                 f"Не удалось получить список {status} заказов из-за ошибки:",
@@ -55,14 +60,37 @@ class SellerOrdersPool:
     def __get_orders(self) -> None:
         """
             Метод предназначен для инициализации получения списков заказов в параллельных потоках и присвоения
-        результатов выполнения метода __api_get_orders соответствующим атрибутам объекта
+        результатов выполнения метода __api_get_orders соответствующим атрибутам объекта. Товары заказов обоих списков
+        получаются одним пакетным запросом
         """
         thread_pool = ThreadPool(2)
-        result = thread_pool.map(self.__api_get_orders, ["new", "current"])
+        result = thread_pool.map(
+            bind_deadline(self.__api_get_orders), ["new", "current"]
+        )
         thread_pool.close()
         thread_pool.join()
         self.new = result[0]
         self.current = result[1]
+        hydrate_orders((self.new or list()) + (self.current or list()))
+
+    def get_titles(self, status: str, cached: bool = False) -> List[str]:
+        """
+            Метод возвращает список заголовков (номер и статус) заказов списка с указанным названием - new или current.
+        Если cached = True - список заголовков кэшируется и формируется заново, только если изменился состав списка
+        или один из его заказов. Предназначен для экранов продавца, которые многократно отображают одни и те же списки
+        заказов
+        """
+        orders: List[Order] = getattr(self, status, None) or list()
+        if not cached:
+            return [i_order.get_title() for i_order in orders]
+
+        key = tuple((id(i_order), i_order._revision) for i_order in orders)
+        cached_titles = self.__titles.get(status, None)
+        if cached_titles is None or cached_titles[0] != key:
+            cached_titles = (key, [i_order.get_title() for i_order in orders])
+            self.__titles[status] = cached_titles
+
+        return list(cached_titles[1])
 
     def move_an_order(self, order: Order) -> None:
         """
@@ -1,47 +1,201 @@
+"""
+    Данный модуль содержит реализацию пула заказов покупателя. При создании пула от внешнего API получаются только
+корзина и действующие заказы покупателя - они нужны для работы с каталогом и оформления заказов. История заказов
+(завершенные и отмененные заказы) получается постранично и только по запросу, например при открытии экрана заказов, при
+помощи итератора iter_history. Загруженные страницы истории запоминаются и повторно не запрашиваются.
+    По окончании сессии покупателя корзина и действующие заказы сохраняются в локальном хранилище заказов. При
+следующем создании пула заказы восстанавливаются из хранилища сразу, а их актуальность проверяется на сервере в фоновом
+потоке. Заказы, измененные покупателем до окончания проверки, не заменяются данными сервера.
+    Если внешний API не поддерживает раздельное получение действующих заказов и истории, все заказы покупателя
+получаются одним запросом, а заказы истории разбираются и получают свои товары постранично, по мере обращения к ним.
+Отсутствие метода постраничного API определяется по статус коду 405 или 501. Статус код 404 считается отсутствием
+метода, только если на запрос всех заказов покупателя сервер их вернул - иначе 404 означает, что покупатель серверу не
+известен.
+"""
+
 import json
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from threading import Event, RLock
+from typing import Any, Dict, Iterator, List, Optional
 
 import pytz
-import requests
 
 from ..logger import get_development_logger
-from ..utils import timer
-from .orders import Basket, Order, OrderSchema
+from ..utils import (
+    ORDERS,
+    Backend,
+    RequestRejectedError,
+    execute_in_new_thread,
+    timer,
+)
+from .orders import Basket, Order, OrderSchema, hydrate_orders
+from .orders_storage import ShopperOrdersStorage, StoredOrders, get_orders_version
 
 dev_log = get_development_logger(__name__)
 moscow_tz = pytz.timezone("Europe/Moscow")
+backend = Backend()
+storage = ShopperOrdersStorage()
+
+
+class PagedApiUnsupported(Exception):
+    """Исключение возбуждается, если внешний API ответил, что метод постраничного получения заказов не поддерживается"""
+
+    def __init__(self, url: str, status_code: int):
+        super().__init__(
+            f"Метод {url} не поддерживается сервером - статус код {status_code}"
+        )
+        self.url: str = url
+        self.status_code: int = status_code
 
 
 class ShopperOrdersPool:
+    """
+        Класс - пул заказов покупателя: корзина, действующие заказы (атрибут pool) и постранично загружаемая история
+    заказов. Методы внешнего API, используемые пулом: <orders_url>/<id покупателя>/active - корзина и действующие
+    заказы, <orders_url>/<id покупателя>/history/<start>/<stop> - заказы истории с порядковыми номерами от start до
+    stop включительно (нумерация с единицы), <orders_url>/<id покупателя> - все заказы покупателя. Подтвержденное
+    сервером отсутствие постраничного API запоминается для orders_url в атрибуте класса __paged_api
+    """
+
+    __paged_api: Dict[str, bool] = dict()
+
     def __init__(self, tgId: int, orders_url: str):
         self.__tgId: int = tgId
         self.__url_order: str = orders_url
         self.__order_schema = OrderSchema()
         self.__content_type: Dict[str, str] = {"Content-Type": "application/json"}
-        self.pool: Optional[List[Order]] = self.__api_get_orders()
-        self.basket: Optional[Basket] = self.__basket_search()
+        self.__lock = RLock()
+        self.__history: List[Order] = list()
+        self.__history_data: Optional[List[Dict[str, Any]]] = None
+        self.__history_complete: bool = False
+        self.__version: Optional[str] = None
+        self.__updated_at: float = 0
+        self.__revalidated = Event()
 
-    def __api_get_orders(self) -> List[Order]:
-        """Метод получает от внешнего API список заказов"""
+        stored = storage.load(tgId)
+        if stored is not None:
+            self.pool: Optional[List[Order]] = self.__restore_orders(stored)
+            self.basket: Optional[Basket] = self.__basket_search()
+            self.__revalidate()
+
+        else:
+            self.pool: Optional[List[Order]] = self.__api_get_active_orders()
+            self.basket: Optional[Basket] = self.__basket_search()
+            self.__revalidated.set()
+
+    def __get_json(self, url: str, description: str) -> Optional[Any]:
+        """
+            Метод получает от внешнего API данные заказов по указанному url. Если сервер ответил статус кодом 404, 405
+        или 501 - возбуждается исключение PagedApiUnsupported, если данные получить не удалось - возвращается None
+        """
         try:
-            response = requests.get(
-                "/".join([self.__url_order, str(self.__tgId)]),
-                headers=self.__content_type,
-            )
+            response = backend.get(ORDERS, url, headers=self.__content_type)
 
             if response.status_code == 200:
-                data = json.loads(response.text)
-                for i_dict in data:
-                    i_dict["order_url"] = self.__url_order
-                    i_dict["registered_on_server"] = True
+                return json.loads(response.text)
 
-                return self.__order_schema.loads(json.dumps(data), many=True)
+            if response.status_code in (404, 405, 501):
+                raise PagedApiUnsupported(url, response.status_code)
 
             dev_log.info(
-                f"Не удалось получить заказы пользователя {self.__tgId} - статус код {response.status_code}"
+                f"Не удалось получить {description} пользователя {self.__tgId} - статус код {response.status_code}"
             )
 
+        except PagedApiUnsupported:
+            raise
+
+        except RequestRejectedError as ex:
+            dev_log.info(f"{description} пользователя {self.__tgId} не получены: {ex}")
+
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось получить {description} пользователя {self.__tgId} из-за ошибки:",
+                exc_info=ex,
+            )
+
+    def __load_orders(self, data: List[Dict[str, Any]]) -> List[Order]:
+        """
+            Метод создает объекты заказов по полученным от внешнего API или восстановленным из локального хранилища
+        данным. Товары всех заказов получаются одним пакетным запросом после загрузки заказов
+        """
+        for i_dict in data:
+            i_dict["order_url"] = self.__url_order
+            i_dict.setdefault("registered_on_server", True)
+            i_dict["resolve_products"] = False
+
+        return hydrate_orders(self.__order_schema.loads(json.dumps(data), many=True))
+
+    def __api_get_active_data(self) -> Optional[List[Dict[str, Any]]]:
+        """
+            Метод получает от внешнего API данные корзины и действующих заказов покупателя. Если сервер не
+        поддерживает раздельное получение заказов - получаются все заказы покупателя, а данные заказов истории
+        откладываются до обращения к истории. Если данные получить не удалось - возвращается None
+        """
+        if self.__paged_api.get(self.__url_order, True):
+            try:
+                return self.__get_json(
+                    "/".join([self.__url_order, str(self.__tgId), "active"]),
+                    "действующие заказы",
+                )
+
+            except PagedApiUnsupported as ex:
+                data = self.__fall_back_to_all_data(ex)
+        else:
+            data = self.__get_all_data()
+
+        if data is not None:
+            data = [i_dict for i_dict in data if i_dict.get("status") not in (7, 8, 9)]
+        return data
+
+    def __get_all_data(self) -> Optional[List[Dict[str, Any]]]:
+        """
+            Метод получает от внешнего API данные всех заказов покупателя и запоминает данные заказов истории.
+        Используется, если сервер не поддерживает постраничное получение заказов
+        """
+        try:
+            data = self.__get_json(
+                "/".join([self.__url_order, str(self.__tgId)]), "список заказов"
+            )
+        except PagedApiUnsupported as ex:
+            dev_log.info(f"Список заказов пользователя {self.__tgId} не получен: {ex}")
+            return None
+
+        if data is not None:
+            self.__history_data = [
+                i_dict for i_dict in data if i_dict.get("status") in (7, 8, 9)
+            ]
+        return data
+
+    def __fall_back_to_all_data(
+        self, ex: PagedApiUnsupported
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+            Метод вызывается, если метод постраничного API ответил статус кодом 404, 405 или 501, и получает все
+        заказы покупателя одним запросом. Отсутствие постраничного API запоминается для orders_url, если сервер
+        ответил 405 или 501, либо если после 404 сервер вернул все заказы покупателя - то есть покупатель серверу
+        известен, а метода постраничного API у сервера нет
+        """
+        data = self.__get_all_data()
+        if ex.status_code != 404 or data is not None:
+            dev_log.warning(
+                f"Сервер не поддерживает постраничное получение заказов покупателя ({ex}), заказы будут "
+                f"получаться одним запросом"
+            )
+            self.__paged_api[self.__url_order] = False
+        return data
+
+    def __api_get_active_orders(self) -> List[Order]:
+        """Метод получает от внешнего API корзину и действующие заказы покупателя и запоминает версию их данных"""
+        try:
+            data = self.__api_get_active_data()
+            if data is None:
+                return []
+
+            self.__version = get_orders_version(data)
+            self.__updated_at = time.time()
+            return self.__load_orders(data)
+
         except Exception as ex:
             dev_log.exception(
                 f"Не удалось получить список заказов пользователя {self.__tgId} из-за ошибки:",
@@ -50,9 +204,219 @@ class ShopperOrdersPool:
 
         return []
 
+    def __restore_orders(self, stored: StoredOrders) -> List[Order]:
+        """
+            Метод восстанавливает заказы из локального хранилища. Заказы, изменения которых не были сохранены на
+        сервере, остаются измененными, а новые заказы получают прежний ключ идемпотентности. Если новый заказ был
+        сохранен на сервере исходящей очередью запросов - заказ получает id, присвоенный ему сервером
+        """
+        try:
+            keys = [i_dict.pop("idempotency_key", None) for i_dict in stored.data]
+            unsaved = [i_dict.pop("need_saving", False) for i_dict in stored.data]
+            orders = self.__load_orders(stored.data)
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось восстановить сохраненные заказы пользователя {self.__tgId}:",
+                exc_info=ex,
+            )
+            return self.__api_get_active_orders()
+
+        for i_order, i_key, i_unsaved in zip(orders, keys, unsaved):
+            if i_key:
+                i_order._idempotency_key = i_key
+            if i_unsaved:
+                i_order._set_unsaved()
+            i_order.check_outbox()
+
+        self.__version, self.__updated_at = stored.version, stored.updated_at
+        dev_log.debug(
+            f"Заказы пользователя {self.__tgId} восстановлены из локального хранилища"
+        )
+        return orders
+
+    @execute_in_new_thread(daemon=True)
+    def __revalidate(self) -> None:
+        """
+            Метод выполняется в отдельном потоке и проверяет актуальность восстановленных заказов на сервере. Если
+        версия данных на сервере изменилась - заказы, не измененные покупателем, заменяются полученными от сервера
+        """
+        try:
+            data = self.__api_get_active_data()
+            if data is None:
+                return
+
+            version = get_orders_version(data)
+            orders = self.__load_orders(data) if version != self.__version else None
+            with self.__lock:
+                if orders is not None:
+                    self.__merge_orders(orders)
+                    dev_log.debug(
+                        f"Заказы пользователя {self.__tgId} обновлены с сервера"
+                    )
+                self.__version, self.__updated_at = version, time.time()
+
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось проверить заказы пользователя {self.__tgId} из-за ошибки:",
+                exc_info=ex,
+            )
+
+        finally:
+            self.__revalidated.set()
+
+    def __merge_orders(self, orders: List[Order]) -> None:
+        """
+            Метод обновляет заказы и корзину пула данными, полученными от сервера. Данные сервера переносятся в
+        объекты заказов и корзины пула, поэтому изменения покупателя через ранее полученные объекты не теряются. Заказы,
+        которые покупатель изменил или создал и которые еще не сохранены на сервере, остаются без изменений. Пустая,
+        не сохранявшаяся на сервере корзина заменяется корзиной сервера
+        """
+        server_baskets = [i_order for i_order in orders if isinstance(i_order, Basket)]
+        server_orders = [
+            i_order for i_order in orders if not isinstance(i_order, Basket)
+        ]
+
+        with self.__lock:
+            local_orders = {
+                i_order.idOrder: i_order
+                for i_order in self.pool
+                if i_order.idOrder is not None
+            }
+            pool = list()
+            for i_order in server_orders:
+                local_order = local_orders.pop(i_order.idOrder, None)
+                if local_order is None:
+                    pool.append(i_order)
+                else:
+                    local_order._merge_server_order(i_order)
+                    pool.append(local_order)
+            pool.extend(
+                i_order
+                for i_order in self.pool
+                if i_order.need_saving()
+                and (i_order.idOrder is None or i_order.idOrder in local_orders)
+            )
+            self.pool = pool
+
+            if server_baskets:
+                self.basket._merge_server_order(server_baskets[0])
+
+    def wait_revalidation(self, timeout: Optional[float] = None) -> bool:
+        """Метод ожидает окончания проверки восстановленных заказов на сервере. Возвращает True, если она окончена"""
+        return self.__revalidated.wait(timeout)
+
+    def save_local(self) -> None:
+        """
+            Метод сохраняет корзину и действующие заказы в локальном хранилище заказов вместе с версией данных,
+        полученных от сервера, и временем их последней проверки
+        """
+        with self.__lock:
+            orders = list(self.pool) + [self.basket]
+            version, updated_at = self.__version, self.__updated_at
+
+        data = list()
+        for i_order in orders:
+            i_data = self.__order_schema.dump(i_order)
+            i_data.pop("source", None)
+            if i_data.get("idOrder") is None:
+                i_data.pop("idOrder", None)
+            i_data["registered_on_server"] = i_order._registered_on_server
+            i_data["need_saving"] = i_order.need_saving()
+            i_data["idempotency_key"] = i_order._idempotency_key
+            data.append(i_data)
+
+        storage.save(self.__tgId, data, version, updated_at)
+
+    def __get_history_data(self, start: int, stop: int) -> Optional[List[Order]]:
+        """
+            Метод возвращает заказы истории с порядковыми номерами от start до stop (нумерация с единицы). Если данные
+        получить не удалось - возвращается None
+        """
+        try:
+            if self.__history_data is None and not self.__paged_api.get(
+                self.__url_order, True
+            ):
+                self.__get_all_data()
+
+            if self.__history_data is None:
+                data = self.__get_history_json(start, stop)
+            else:
+                data = self.__history_data[start - 1 : stop]
+
+            return self.__load_orders(data) if data is not None else None
+
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось получить историю заказов пользователя {self.__tgId} из-за ошибки:",
+                exc_info=ex,
+            )
+
+    def __get_history_json(
+        self, start: int, stop: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+            Метод получает от внешнего API данные заказов истории с порядковыми номерами от start до stop. Если метод
+        истории не поддерживается сервером - все заказы покупателя получаются одним запросом, и возвращается
+        соответствующая часть заказов истории
+        """
+        try:
+            return self.__get_json(
+                "/".join(
+                    [
+                        self.__url_order,
+                        str(self.__tgId),
+                        "history",
+                        str(start),
+                        str(stop),
+                    ]
+                ),
+                "историю заказов",
+            )
+
+        except PagedApiUnsupported as ex:
+            if self.__fall_back_to_all_data(ex) is not None:
+                return self.__history_data[start - 1 : stop]
+
+    def get_history_page(self, number: int, page_size: int = 10) -> List[Order]:
+        """
+            Метод возвращает страницу истории заказов с указанным номером (нумерация с нуля). Если страница еще не
+        загружалась - она запрашивается у внешнего API вместе с товарами её заказов
+        """
+        start, stop = number * page_size, (number + 1) * page_size
+        with self.__lock:
+            if len(self.__history) < stop and not self.__history_complete:
+                orders = self.__get_history_data(len(self.__history) + 1, stop)
+                if orders is not None:
+                    self.__history.extend(orders)
+                    self.__history_complete = len(self.__history) < stop
+
+            return self.__history[start:stop]
+
+    def iter_history(self, page_size: int = 10) -> Iterator[List[Order]]:
+        """
+            Метод возвращает итератор по страницам истории заказов (завершенных и отмененных заказов). Каждая
+        следующая страница загружается только при обращении к ней
+        """
+        number = 0
+        while True:
+            page = self.get_history_page(number, page_size)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            number += 1
+
+    def is_history_loaded(self) -> bool:
+        """Метод возвращает True, если история заказов загружена полностью"""
+        return self.__history_complete
+
     def __call__(self, *args, **kwargs) -> List[Order]:
-        """При обращении к объекту пула заказов как к вызываемому объекту будет возвращен список заказов"""
-        return self.pool
+        """
+            При обращении к объекту пула заказов как к вызываемому объекту будет возвращен список заказов покупателя:
+        действующие заказы, заказы, созданные за время сессии, и загруженные к этому моменту заказы истории
+        """
+        with self.__lock:
+            return self.pool + self.__history
 
     def __basket_search(self) -> Basket:
         """Метод осуществляет поиск корзины среди заказов покупателя. Если таковой нет - создает новую корзину"""
@@ -78,10 +442,11 @@ class ShopperOrdersPool:
             Метод создаёт новый заказ. Корзину отправляет на сервер в качестве нового заказа, её добавляет в список
         заказов, и создает новую корзину
         """
-        self.basket.create_new_order()
-        self.pool.append(self.basket)
-        self.basket = Basket(
-            tgId=self.__tgId,
-            order_url=self.__url_order,
-            datetimeCreation=datetime.now(moscow_tz).strftime("%d.%m.%Y %H:%M"),
-        )
+        with self.__lock:
+            self.basket.create_new_order()
+            self.pool.append(self.basket)
+            self.basket = Basket(
+                tgId=self.__tgId,
+                order_url=self.__url_order,
+                datetimeCreation=datetime.now(moscow_tz).strftime("%d.%m.%Y %H:%M"),
+            )
@@ -1 +1,17 @@
-from .products import Category, CategoryPool, Product, ProductSchema
+from .catalog_storage import CatalogStorage
+from .columnar_catalog import ColumnarCatalog
+from .file_id_storage import FileIdStorage
+from .image_fetcher import ImageFetcher
+from .image_processing import ImageProcessor
+from .image_store import ImageStore
+from .prefetcher import ProductPrefetcher
+from .price_index import CategoryPriceIndex, ProductPage
+from .products import (
+    CatalogSnapshot,
+    Category,
+    CategoryPool,
+    Product,
+    ProductPlaceholder,
+    ProductSchema,
+)
+from .search_index import SearchIndex
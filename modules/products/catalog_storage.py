@@ -0,0 +1,118 @@
+"""
+    Данный модуль содержит реализацию локального хранилища последнего успешно полученного каталога товаров. Каталог
+сохраняется в сжатый gzip файл json: данные категорий в том виде, в котором их вернул внешний API, товары в виде
+компактных строк (списков значений полей) вместе с хэшами их исходных данных, а так же валидаторы ответов сервера
+(ETag и Last-Modified). Это позволяет при запуске бота восстановить каталог за миллисекунды без обращения к внешнему
+API, а при последующем обновлении каталога получать от сервера ответ 304 для не изменившихся данных.
+"""
+
+import gzip
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..logger import get_development_logger
+
+dev_log = get_development_logger(__name__)
+
+FORMAT_VERSION = 1
+
+PRODUCT_FIELDS = (
+    "productId",
+    "name",
+    "description",
+    "price",
+    "image",
+    "delivery",
+    "category",
+)
+
+
+class CatalogStorage:
+    """
+        Класс - файловое хранилище каталога товаров. Запись выполняется во временный файл, который затем атомарно
+    заменяет файл каталога, поэтому при сбое во время записи сохраняется предыдущая версия каталога
+    """
+
+    def __init__(self, path: str):
+        self.__path: str = path
+
+    def save(
+        self,
+        category_data: List[Dict[str, Any]],
+        products: Dict[int, List[Tuple[Dict[str, Any], str]]],
+        validators: Dict[str, Dict[str, str]],
+    ) -> bool:
+        """
+            Метод сохраняет каталог товаров: список данных категорий, словарь id категории - список пар (данные товара,
+        хэш исходных данных товара) и валидаторы ответов сервера. Возвращает True, если каталог сохранен
+        """
+        data = {
+            "format": FORMAT_VERSION,
+            "saved_at": time.time(),
+            "categories": category_data,
+            "products": {
+                str(i_category_id): [
+                    [i_product_data.get(i_field) for i_field in PRODUCT_FIELDS]
+                    + [i_hash]
+                    for i_product_data, i_hash in i_products
+                ]
+                for i_category_id, i_products in products.items()
+            },
+            "validators": validators,
+        }
+
+        directory = os.path.dirname(self.__path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        tmp_path = "{}.{}.tmp".format(self.__path, os.getpid())
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as file:
+                json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.__path)
+            return True
+
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось сохранить каталог товаров в файл {self.__path}",
+                exc_info=ex,
+            )
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+            Метод возвращает сохраненный каталог товаров или None, если файл каталога отсутствует или поврежден.
+        Товары возвращаются в виде словаря id категории - список пар (данные товара, хэш исходных данных товара)
+        """
+        if not os.path.exists(self.__path):
+            return None
+
+        try:
+            with gzip.open(self.__path, "rt", encoding="utf-8") as file:
+                data = json.load(file)
+
+            if data.get("format") != FORMAT_VERSION:
+                dev_log.info(
+                    f"Файл каталога товаров {self.__path} имеет устаревший формат"
+                )
+                return None
+
+            data["products"] = {
+                int(i_category_id): [
+                    (dict(zip(PRODUCT_FIELDS, i_row)), i_row[len(PRODUCT_FIELDS)])
+                    for i_row in i_rows
+                ]
+                for i_category_id, i_rows in data["products"].items()
+            }
+            return data
+
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось прочитать каталог товаров из файла {self.__path}",
+                exc_info=ex,
+            )
+            return None
@@ -0,0 +1,224 @@
+"""
+    Данный модуль содержит реализацию колоночного представления каталога товаров для очень больших каталогов. Вместо
+отдельного объекта Product для каждого товара данные хранятся в параллельных массивах (модуль array): цена, наличие
+доставки и id категории - в числовых колонках, а названия, описания, категории и url изображений - в виде номеров
+строк общей таблицы строк, в которой каждая строка хранится один раз. Колонки заполняются непосредственно данными
+товаров, полученными от внешнего API, объекты Product создаются только по требованию при обращении к товару и
+существуют, пока на них есть ссылки. Товары одной категории хранятся в колонках подряд, поэтому список товаров
+категории - это диапазон строк. Если установлена библиотека NumPy, фильтрация по цене выполняется векторно над теми же
+массивами без их копирования.
+"""
+
+from array import array
+from collections.abc import Mapping, Sequence
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from weakref import WeakValueDictionary
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class StringTable:
+    """
+        Класс - таблица строк. Каждая строка хранится в таблице один раз, колонки каталога хранят только её номер.
+    После заполнения таблицы словарь поиска строк удаляется методом freeze
+    """
+
+    def __init__(self):
+        self.__strings: List[str] = list()
+        self.__index: Dict[str, int] = dict()
+
+    def add(self, value: str) -> int:
+        """Метод добавляет строку в таблицу, если её там еще нет, и возвращает её номер"""
+        number = self.__index.get(value, None)
+        if number is None:
+            number = len(self.__strings)
+            self.__strings.append(value)
+            self.__index[value] = number
+        return number
+
+    def get(self, number: int) -> str:
+        """Метод возвращает строку по её номеру"""
+        return self.__strings[number]
+
+    def freeze(self) -> None:
+        """Метод удаляет словарь поиска строк после заполнения таблицы"""
+        self.__index = dict()
+
+    def __len__(self) -> int:
+        return len(self.__strings)
+
+
+class ProductListView(Sequence):
+    """Класс - список товаров категории колоночного каталога. Объекты товаров создаются при обращении к элементам"""
+
+    def __init__(self, catalog: "ColumnarCatalog", rows: range):
+        self.__catalog: ColumnarCatalog = catalog
+        self.__rows: range = rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.__catalog.get_row(i_row) for i_row in self.__rows[index]]
+        return self.__catalog.get_row(self.__rows[index])
+
+    def __len__(self) -> int:
+        return len(self.__rows)
+
+
+class ColumnarCatalog(Mapping):
+    """
+        Класс - колоночный каталог товаров. Является неизменяемым словарем id товара - объект товара и используется
+    пулом категорий вместо словаря объектов товаров в снимке каталога. Каталог создается по данным товаров категорий -
+    словарям с теми же ключами, что и аргументы product_factory
+    """
+
+    def __init__(
+        self,
+        categories: Iterable[Tuple[int, Iterable[Dict[str, Any]]]],
+        product_factory: Callable,
+    ):
+        self.__product_factory: Callable = product_factory
+        self.__strings: StringTable = StringTable()
+        self.__product_id: List[str] = list()
+        self.__row_by_id: Dict[str, int] = dict()
+        self.__price = array("q")
+        self.__delivery = array("b")
+        self.__category_id = array("l")
+        self.__name = array("l")
+        self.__description = array("l")
+        self.__category = array("l")
+        self.__image = array("l")
+        self.__category_rows: Dict[int, range] = dict()
+        self.__views: WeakValueDictionary = WeakValueDictionary()
+        self.__lock = Lock()
+
+        for i_category_id, i_products in categories:
+            start = len(self.__product_id)
+            for i_product_data in i_products:
+                self.__append(i_category_id, i_product_data)
+            self.__category_rows[i_category_id] = range(start, len(self.__product_id))
+
+        self.__strings.freeze()
+
+    def __append(self, category_id: int, product_data: Dict[str, Any]) -> None:
+        """Метод добавляет данные товара в колонки каталога"""
+        self.__row_by_id[product_data["productId"]] = len(self.__product_id)
+        self.__product_id.append(product_data["productId"])
+        self.__price.append(product_data["price"])
+        self.__delivery.append(1 if product_data["delivery"] else 0)
+        self.__category_id.append(category_id)
+        self.__name.append(self.__strings.add(product_data["name"]))
+        self.__description.append(self.__strings.add(product_data["description"]))
+        self.__category.append(self.__strings.add(product_data["category"]))
+        self.__image.append(self.__strings.add("\n".join(product_data["image"])))
+
+    def get_row_data(self, row: int) -> Dict[str, Any]:
+        """Метод возвращает данные товара по номеру строки колонок без создания объекта товара"""
+        image = self.__strings.get(self.__image[row])
+        return {
+            "productId": self.__product_id[row],
+            "name": self.__strings.get(self.__name[row]),
+            "price": self.__price[row],
+            "description": self.__strings.get(self.__description[row]),
+            "image": image.split("\n") if image else list(),
+            "delivery": bool(self.__delivery[row]),
+            "category": self.__strings.get(self.__category[row]),
+        }
+
+    def get_row(self, row: int):
+        """
+            Метод возвращает объект товара по номеру строки колонок. Если объект этого товара уже создан и на него есть
+        ссылки - возвращается тот же объект
+        """
+        with self.__lock:
+            product = self.__views.get(row, None)
+            if product is None:
+                product = self.__product_factory(**self.get_row_data(row))
+                self.__views[row] = product
+            return product
+
+    def __getitem__(self, product_id: str):
+        return self.get_row(self.__row_by_id[product_id])
+
+    def __contains__(self, product_id) -> bool:
+        return product_id in self.__row_by_id
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__row_by_id)
+
+    def __len__(self) -> int:
+        return len(self.__row_by_id)
+
+    def get_category_products(self, category_id: int) -> ProductListView:
+        """Метод возвращает список товаров категории с указанным id"""
+        return ProductListView(self, self.__category_rows.get(category_id, range(0)))
+
+    def has_category(self, category_id: int) -> bool:
+        """Метод возвращает True, если в каталоге есть товары категории с указанным id"""
+        return category_id in self.__category_rows
+
+    def get_category_ids(self, category_id: int) -> List[str]:
+        """Метод возвращает список id товаров категории"""
+        rows = self.__category_rows.get(category_id, range(0))
+        return self.__product_id[rows.start : rows.stop]
+
+    def iter_category_data(self, category_id: int) -> Iterator[Dict[str, Any]]:
+        """Метод возвращает итератор данных товаров категории без создания объектов товаров"""
+        for i_row in self.__category_rows.get(category_id, range(0)):
+            yield self.get_row_data(i_row)
+
+    def iter_price_keys(self, category_id: int) -> Iterator[Tuple[int, str, bool]]:
+        """Метод возвращает итератор цен, id и наличия доставки товаров категории для построения индекса по цене"""
+        for i_row in self.__category_rows.get(category_id, range(0)):
+            yield self.__price[i_row], self.__product_id[i_row], bool(
+                self.__delivery[i_row]
+            )
+
+    def filter_by_price(
+        self,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        delivery: Optional[bool] = None,
+        category_id: Optional[int] = None,
+    ) -> List:
+        """
+            Метод возвращает товары, цена которых находится в указанном диапазоне (границы включаются), с указанным
+        наличием доставки и из указанной категории. Не указанные условия не проверяются
+        """
+        rows = (
+            self.__category_rows.get(category_id, range(0))
+            if category_id is not None
+            else range(len(self.__product_id))
+        )
+        if not rows:
+            return list()
+
+        if numpy is not None:
+            price = numpy.frombuffer(self.__price, dtype=numpy.int64)[
+                rows.start : rows.stop
+            ]
+            mask = numpy.ones(len(rows), dtype=bool)
+            if min_price is not None:
+                mask &= price >= min_price
+            if max_price is not None:
+                mask &= price <= max_price
+            if delivery is not None:
+                mask &= numpy.frombuffer(self.__delivery, dtype=numpy.int8)[
+                    rows.start : rows.stop
+                ] == int(delivery)
+            selected = (numpy.nonzero(mask)[0] + rows.start).tolist()
+
+        else:
+            price, has_delivery = self.__price, self.__delivery
+            selected = [
+                i_row
+                for i_row in rows
+                if (min_price is None or price[i_row] >= min_price)
+                and (max_price is None or price[i_row] <= max_price)
+                and (delivery is None or has_delivery[i_row] == int(delivery))
+            ]
+
+        return [self.get_row(i_row) for i_row in selected]
@@ -0,0 +1,87 @@
+"""
+    Данный модуль содержит реализацию хранилища идентификаторов файлов телеграмм (file_id) изображений товаров.
+После первой отправки изображения пользователю телеграмм присваивает ему file_id, по которому это изображение может быть
+отправлено повторно без загрузки его байтов. Хранилище сохраняет соответствие между ключом изображения (url или хэш его
+содержимого) и file_id в локальной базе данных, поэтому каждое изображение загружается в телеграмм только один раз -
+вне зависимости от обновлений каталога и перезапусков бота.
+"""
+
+import os
+from threading import Lock
+from typing import Dict, Optional
+
+from sqlalchemy import Column, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from ..logger import get_development_logger
+from ..utils import singleton
+
+dev_log = get_development_logger(__name__)
+
+Base = declarative_base()
+
+if not os.path.exists("database"):
+    os.makedirs("database")
+engine = create_engine(
+    "sqlite:///{}".format(os.path.join("database", "product_database.db")),
+    connect_args={"check_same_thread": False},
+)
+
+Session = sessionmaker(bind=engine)
+
+
+class TelegramFileTable(Base):
+    """Класс - модель таблицы для хранения file_id изображений товаров, загруженных в телеграмм"""
+
+    __tablename__ = "telegram_file"
+
+    key = Column(String, primary_key=True)
+    file_id = Column(String, nullable=False)
+
+
+Base.metadata.create_all(engine)
+
+
+@singleton
+class FileIdStorage:
+    """
+        Класс - хранилище file_id изображений товаров. Данные хранятся в локальной базе данных, а прочитанные из неё
+    значения дополнительно сохраняются в оперативной памяти.
+    """
+
+    def __init__(self):
+        self.__memory: Dict[str, str] = dict()
+        self.__lock = Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Метод возвращает file_id изображения по его ключу или None, если изображение еще не загружалось"""
+        file_id = self.__memory.get(key, None)
+
+        if file_id is None:
+            with Session() as session:
+                row: Optional[TelegramFileTable] = session.get(TelegramFileTable, key)
+                if row:
+                    file_id = row.file_id
+                    with self.__lock:
+                        self.__memory[key] = file_id
+
+        return file_id
+
+    def set(self, file_ids: Dict[str, str]) -> None:
+        """Метод сохраняет переданные соответствия ключей изображений и их file_id"""
+        with self.__lock:
+            self.__memory.update(file_ids)
+
+        with Session() as session:
+            for i_key, i_file_id in file_ids.items():
+                session.merge(TelegramFileTable(key=i_key, file_id=i_file_id))
+
+            try:
+                session.commit()
+
+            except Exception as ex:
+                session.rollback()
+                dev_log.exception(
+                    "Не удалось сохранить file_id изображений товаров в локальную базу данных",
+                    exc_info=ex,
+                )
@@ -0,0 +1,227 @@
+"""
+    Данный модуль содержит реализацию общего для всех товаров загрузчика изображений. Загрузчик использует один пул
+потоков ограниченного размера и одну http сессию с переиспользованием соединений, ограничивает количество одновременных
+запросов к одному хосту при помощи очередей хостов, объединяет одновременные запросы одного и того же url и ограничивает
+размер загружаемого изображения.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from threading import RLock
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..logger import get_development_logger
+from ..utils import get_remaining, singleton
+
+dev_log = get_development_logger(__name__)
+
+
+@singleton
+class ImageFetcher:
+    """
+        Класс - загрузчик изображений товаров. Объект класса является синглтоном и используется всеми товарами
+    каталога. Параметры загрузчика могут быть изменены методом configure, например значениями из файла config.yaml.
+        В пул потоков передаются только загрузки, для которых не превышен лимит одновременных запросов к хосту.
+    Остальные загрузки ждут в очереди своего хоста и передаются в пул по мере завершения предыдущих загрузок этого
+    хоста, поэтому медленный хост не занимает потоки пула, нужные для загрузки с других хостов
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 10,
+        max_per_host: int = 4,
+        timeout: float = 10,
+        max_size: int = 10485760,
+    ):
+        self.__lock = RLock()
+        self.__in_flight: Dict[str, Future] = dict()
+        self.__host_active: Dict[str, int] = dict()
+        self.__host_queues: Dict[str, Deque[Tuple[str, Future]]] = dict()
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__session: Optional[requests.Session] = None
+        self.configure(max_workers, max_per_host, timeout, max_size)
+
+    def configure(
+        self,
+        max_workers: int = 10,
+        max_per_host: int = 4,
+        timeout: float = 10,
+        max_size: int = 10485760,
+    ) -> None:
+        """
+            Метод устанавливает параметры загрузчика: размер пула потоков, максимальное количество одновременных
+        запросов к одному хосту, время ожидания загрузки одного изображения в секундах и максимальный размер
+        изображения в байтах
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        with self.__lock:
+            old_executor = self.__executor
+            self.__max_per_host: int = max_per_host
+            self.__timeout: float = timeout
+            self.__max_size: int = max_size
+            self.__session = session
+            self.__executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="image_fetcher"
+            )
+
+        if old_executor:
+            old_executor.shutdown(wait=False)
+
+    def __run(self, host: str, url: str, future: Future) -> None:
+        """
+            Метод выполняется в потоке пула: загружает изображение, передает результат в объект Future и освобождает
+        место загрузки хоста
+        """
+        try:
+            if future.set_running_or_notify_cancel():
+                future.set_result(self.__download(url))
+        except Exception as ex:
+            future.set_exception(ex)
+        finally:
+            self.__release_host(host)
+
+    def __release_host(self, host: str) -> None:
+        """
+            Метод вызывается по завершении загрузки с хоста. Если в очереди хоста есть ожидающие загрузки - первая из
+        них передается в пул потоков, иначе уменьшается количество выполняемых загрузок хоста
+        """
+        with self.__lock:
+            queue = self.__host_queues.get(host, None)
+            if queue:
+                url, future = queue.popleft()
+                self.__executor.submit(self.__run, host, url, future)
+                return
+
+            self.__host_queues.pop(host, None)
+            self.__host_active[host] -= 1
+            if self.__host_active[host] <= 0:
+                self.__host_active.pop(host)
+
+    def __download(self, url: str) -> Optional[bytes]:
+        """
+            Метод загружает изображение по указанному url. Тело ответа читается частями, загрузка прерывается если
+        размер изображения превышает установленный максимум или время загрузки превышает установленный таймаут
+        """
+        time_start = time.monotonic()
+        try:
+            with self.__session.get(
+                url, stream=True, timeout=self.__timeout
+            ) as response:
+                if response.status_code != 200:
+                    dev_log.warning(
+                        "По url {} не удалось получить изображение товара от сервера - код {}".format(
+                            url, response.status_code
+                        )
+                    )
+                    return None
+
+                content_length = response.headers.get("Content-Length", None)
+                if content_length and int(content_length) > self.__max_size:
+                    dev_log.warning(
+                        f"Изображение по url {url} превышает допустимый размер: {content_length} байт"
+                    )
+                    return None
+
+                content = bytearray()
+                for i_chunk in response.iter_content(chunk_size=65536):
+                    content.extend(i_chunk)
+
+                    if len(content) > self.__max_size:
+                        dev_log.warning(
+                            f"Изображение по url {url} превышает допустимый размер {self.__max_size} байт"
+                        )
+                        return None
+
+                    if time.monotonic() - time_start > self.__timeout:
+                        dev_log.warning(
+                            f"Превышено время загрузки изображения по url {url}"
+                        )
+                        return None
+
+                return bytes(content)
+
+        except Exception as ex:
+            dev_log.exception(
+                "По url {} не удалось получить изображение товара от сервера".format(
+                    url
+                ),
+                exc_info=ex,
+            )
+
+    def fetch(self, url: str) -> Future:
+        """
+            Метод ставит загрузку изображения по указанному url в очередь и возвращает объект Future с её результатом.
+        Если изображение по этому url уже загружается - возвращается тот же объект Future. Если лимит одновременных
+        запросов к хосту url исчерпан - загрузка ставится в очередь хоста
+        """
+        with self.__lock:
+            future = self.__in_flight.get(url, None)
+            if future is None:
+                future = Future()
+                self.__in_flight[url] = future
+                future.add_done_callback(lambda _: self.__forget(url))
+
+                host = urlsplit(url).netloc
+                if self.__host_active.get(host, 0) < self.__max_per_host:
+                    self.__host_active[host] = self.__host_active.get(host, 0) + 1
+                    self.__executor.submit(self.__run, host, url, future)
+                else:
+                    self.__host_queues.setdefault(host, deque()).append((url, future))
+        return future
+
+    def __get_wait_bound(self, list_url: List[str]) -> float:
+        """
+            Метод возвращает максимальное время ожидания загрузок по списку url: таймаут загрузчика, умноженный на
+        количество загрузок хоста, которые выполняются последовательно перед последней загрузкой из списка
+        """
+        with self.__lock:
+            depth = max(
+                (
+                    len(self.__host_queues.get(urlsplit(i_url).netloc, ()))
+                    for i_url in list_url
+                ),
+                default=0,
+            )
+            return self.__timeout * (depth // self.__max_per_host + 1)
+
+    def __forget(self, url: str) -> None:
+        """Метод удаляет завершенную загрузку из перечня выполняемых загрузок"""
+        with self.__lock:
+            self.__in_flight.pop(url, None)
+
+    def wait_many(self, list_url: List[str]) -> Tuple[List[Optional[bytes]], List[str]]:
+        """
+            Метод загружает изображения по списку url так же, как метод fetch_many, и возвращает список байтов
+        изображений и список url, загрузка которых не завершилась за время ожидания. В отличие от неудачной загрузки,
+        незавершенная загрузка продолжается и будет переиспользована повторным запросом
+        """
+        futures = [self.fetch(i_url) for i_url in list_url]
+        wait(futures, timeout=get_remaining(self.__get_wait_bound(list_url)))
+
+        list_content = [
+            i_future.result() if i_future.done() and not i_future.exception() else None
+            for i_future in futures
+        ]
+        pending_urls = [
+            i_url for i_url, i_future in zip(list_url, futures) if not i_future.done()
+        ]
+        return list_content, pending_urls
+
+    def fetch_many(self, list_url: List[str]) -> List[Optional[bytes]]:
+        """
+            Метод загружает изображения по списку url и возвращает список их байтов в том же порядке. Если изображение
+        не удалось загрузить, на его месте будет None. Время ожидания ограничено таймаутом загрузчика, умноженным на
+        глубину очереди хоста - загрузка из очереди начнется только после загрузок, стоящих перед ней. Если обработка
+        запроса пользователя ограничена крайним сроком - ожидание прерывается по его истечении. Незавершенные загрузки
+        продолжаются и будут переиспользованы повторным запросом
+        """
+        return self.wait_many(list_url)[0]
@@ -0,0 +1,147 @@
+"""
+    Данный модуль содержит реализацию необязательного этапа обработки изображений товаров перед их сохранением в
+хранилище изображений и отправкой в телеграмм. Изображение уменьшается до разрешения, которое использует телеграмм,
+перекодируется в JPEG с заданным качеством и очищается от метаданных. Обработка выполняется в пуле процессов, поэтому
+не ограничивается GIL. Для работы модуля необходима библиотека Pillow: если она не установлена, изображения
+сохраняются без обработки.
+"""
+
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from threading import Lock
+from typing import List, Optional
+
+from ..logger import get_development_logger
+from ..utils import singleton
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+dev_log = get_development_logger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def get_placeholder() -> bytes:
+    """Функция возвращает байты изображения-заглушки для товаров без изображений. Файл читается с диска один раз"""
+    path = os.path.join(
+        os.path.abspath(os.path.dirname(__file__)), "static", "placeholder.png"
+    )
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def normalize_image(content: bytes, max_side: int, quality: int) -> bytes:
+    """
+        Функция уменьшает изображение так, что бы его наибольшая сторона не превышала max_side пикселей, и
+    перекодирует его в JPEG с указанным качеством без метаданных. Если полученное изображение больше исходного -
+    возвращается исходное изображение. Функция выполняется в отдельном процессе пула обработки изображений
+    """
+    with Image.open(BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        result = BytesIO()
+        image.save(result, format="JPEG", quality=quality, optimize=True)
+
+    result = result.getvalue()
+    return result if len(result) < len(content) else content
+
+
+@singleton
+class ImageProcessor:
+    """
+        Класс - обработчик изображений товаров. Объект класса является синглтоном. По умолчанию обработка отключена,
+    параметры обработки устанавливаются методом configure, например значениями из файла config.yaml. Результаты
+    обработки сохраняются в хранилище изображений, поэтому каждое изображение обрабатывается один раз
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__enabled: bool = False
+        self.__max_side: int = 1280
+        self.__quality: int = 85
+        self.__processes: int = 2
+
+    def configure(
+        self,
+        enabled: bool = False,
+        max_side: int = 1280,
+        quality: int = 85,
+        processes: int = 2,
+    ) -> None:
+        """
+            Метод устанавливает параметры обработки изображений: включена ли обработка, максимальный размер стороны
+        изображения в пикселях, качество JPEG и количество процессов обработки
+        """
+        if enabled and Image is None:
+            dev_log.warning(
+                "Обработка изображений товаров отключена: не установлена библиотека Pillow"
+            )
+            enabled = False
+
+        with self.__lock:
+            old_executor = self.__executor
+            self.__executor = None
+            self.__enabled = enabled
+            self.__max_side = max_side
+            self.__quality = quality
+            self.__processes = processes
+
+        if old_executor:
+            old_executor.shutdown(wait=False)
+
+    def __get_executor(self) -> ProcessPoolExecutor:
+        """Метод возвращает пул процессов обработки изображений, создавая его при первом обращении"""
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ProcessPoolExecutor(max_workers=self.__processes)
+            return self.__executor
+
+    def process_many(
+        self, list_content: List[Optional[bytes]]
+    ) -> List[Optional[bytes]]:
+        """
+            Метод обрабатывает переданный список изображений и возвращает список результатов в том же порядке.
+        Если обработка отключена или изображение не удалось обработать - возвращается исходное изображение
+        """
+        if not self.__enabled:
+            return list_content
+
+        executor = self.__get_executor()
+        futures = [
+            (
+                executor.submit(
+                    normalize_image, i_content, self.__max_side, self.__quality
+                )
+                if isinstance(i_content, bytes)
+                else None
+            )
+            for i_content in list_content
+        ]
+
+        list_result = list()
+        for i_content, i_future in zip(list_content, futures):
+            if i_future is None:
+                list_result.append(i_content)
+                continue
+
+            try:
+                list_result.append(i_future.result())
+            except Exception as ex:
+                dev_log.warning(f"Не удалось обработать изображение товара: {ex}")
+                list_result.append(i_content)
+
+        return list_result
@@ -0,0 +1,201 @@
+"""
+    Данный модуль содержит реализацию локального хранилища изображений товаров. Изображения хранятся на диске в
+файлах, имя которых - хэш SHA-256 их содержимого, поэтому одинаковые изображения хранятся в одном экземпляре. Индекс
+хранилища (соответствие url изображения его хэшу, размер файлов и время последнего обращения к ним) хранится в базе
+данных SQLite. Изображения читаются через отображение файла в память (mmap). Общий размер хранилища ограничен: при
+превышении лимита удаляются изображения, к которым дольше всего не было обращений.
+"""
+
+import hashlib
+import mmap
+import os
+import time
+from threading import RLock
+from typing import Optional
+
+from sqlalchemy import Column, Float, Integer, String, create_engine, func
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from ..logger import get_development_logger
+from ..utils import singleton
+
+dev_log = get_development_logger(__name__)
+
+Base = declarative_base()
+
+
+class ImageUrlTable(Base):
+    """Класс - модель таблицы соответствия url изображения хэшу его содержимого"""
+
+    __tablename__ = "image_url"
+
+    url = Column(String, primary_key=True)
+    hash = Column(String, nullable=False, index=True)
+
+
+class ImageFileTable(Base):
+    """Класс - модель таблицы файлов изображений"""
+
+    __tablename__ = "image_file"
+
+    hash = Column(String, primary_key=True)
+    size = Column(Integer, nullable=False)
+    last_access = Column(Float, nullable=False, index=True)
+
+
+@singleton
+class ImageStore:
+    """
+        Класс - хранилище изображений товаров. Объект класса является синглтоном. Каталог хранилища и его максимальный
+    размер могут быть изменены методом configure, например значениями из файла config.yaml
+    """
+
+    def __init__(self, path: str = "image_data", max_size: int = 536870912):
+        self.__lock = RLock()
+        self.configure(path, max_size)
+
+    def configure(self, path: str = "image_data", max_size: int = 536870912) -> None:
+        """Метод устанавливает каталог хранилища и его максимальный размер в байтах"""
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        engine = create_engine(
+            "sqlite:///{}".format(os.path.join(path, "index.db")),
+            connect_args={"timeout": 30, "check_same_thread": False},
+        )
+        Base.metadata.create_all(engine)
+
+        with self.__lock:
+            self.__path: str = path
+            self.__max_size: int = max_size
+            self.__session_maker = sessionmaker(bind=engine)
+
+            with self.__session_maker() as session:
+                self.__total_size: int = (
+                    session.query(func.sum(ImageFileTable.size)).scalar() or 0
+                )
+
+    def __get_file_path(self, image_hash: str) -> str:
+        """Метод возвращает путь к файлу изображения с указанным хэшем"""
+        return os.path.join(self.__path, image_hash[:2], image_hash)
+
+    def get_hash(self, url: str) -> Optional[str]:
+        """Метод возвращает хэш изображения, загруженного по указанному url, или None"""
+        with self.__session_maker() as session:
+            row: Optional[ImageUrlTable] = session.get(ImageUrlTable, url)
+            if row and os.path.exists(self.__get_file_path(row.hash)):
+                return row.hash
+
+    def put(self, url: str, content: bytes) -> Optional[str]:
+        """
+            Метод сохраняет изображение, загруженное по указанному url, в хранилище и возвращает хэш его содержимого.
+        Если изображение с таким содержимым уже есть в хранилище - повторно оно не записывается
+        """
+        image_hash = hashlib.sha256(content).hexdigest()
+        path = self.__get_file_path(image_hash)
+
+        with self.__lock:
+            with self.__session_maker() as session:
+                file_row: Optional[ImageFileTable] = session.get(
+                    ImageFileTable, image_hash
+                )
+
+                if file_row is None or not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+                    with open(tmp_path, "wb") as file:
+                        file.write(content)
+                    os.replace(tmp_path, path)
+
+                    if file_row is None:
+                        self.__total_size += len(content)
+
+                session.merge(
+                    ImageFileTable(
+                        hash=image_hash, size=len(content), last_access=time.time()
+                    )
+                )
+                session.merge(ImageUrlTable(url=url, hash=image_hash))
+
+                try:
+                    session.commit()
+                except Exception as ex:
+                    session.rollback()
+                    dev_log.exception(
+                        f"Не удалось сохранить изображение {url} в хранилище изображений",
+                        exc_info=ex,
+                    )
+                    return None
+
+            if self.__total_size > self.__max_size:
+                self.cleanup()
+
+        return image_hash
+
+    def read(self, image_hash: str) -> Optional[bytes]:
+        """Метод возвращает байты изображения с указанным хэшем или None, если изображения нет в хранилище"""
+        try:
+            with open(self.__get_file_path(image_hash), "rb") as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    content = mm[:]
+
+        except (OSError, ValueError):
+            return None
+
+        with self.__session_maker() as session:
+            session.query(ImageFileTable).filter(
+                ImageFileTable.hash == image_hash
+            ).update({"last_access": time.time()})
+            try:
+                session.commit()
+            except Exception:
+                session.rollback()
+
+        return content
+
+    def cleanup(self) -> None:
+        """
+            Метод удаляет из хранилища изображения, к которым дольше всего не было обращений, до тех пор, пока общий
+        размер хранилища не станет меньше установленного максимума
+        """
+        with self.__lock:
+            with self.__session_maker() as session:
+                list_deleted_hash = list()
+
+                for i_row in session.query(ImageFileTable).order_by(
+                    ImageFileTable.last_access
+                ):
+                    if self.__total_size <= self.__max_size:
+                        break
+
+                    try:
+                        os.remove(self.__get_file_path(i_row.hash))
+                    except OSError:
+                        pass
+
+                    self.__total_size -= i_row.size
+                    list_deleted_hash.append(i_row.hash)
+
+                if list_deleted_hash:
+                    session.query(ImageFileTable).filter(
+                        ImageFileTable.hash.in_(list_deleted_hash)
+                    ).delete(synchronize_session=False)
+                    session.query(ImageUrlTable).filter(
+                        ImageUrlTable.hash.in_(list_deleted_hash)
+                    ).delete(synchronize_session=False)
+
+                    try:
+                        session.commit()
+                    except Exception as ex:
+                        session.rollback()
+                        dev_log.exception(
+                            "Не удалось очистить хранилище изображений", exc_info=ex
+                        )
+
+                    dev_log.debug(
+                        f"Из хранилища изображений удалено {len(list_deleted_hash)} файлов"
+                    )
+
+    def get_size(self) -> int:
+        """Метод возвращает общий размер изображений в хранилище в байтах"""
+        return self.__total_size
@@ -0,0 +1,127 @@
+"""
+    Данный модуль содержит реализацию предварительной загрузки товаров, которые пользователь, вероятно, откроет
+следующими. Когда пользователь открывает товар категории, следующие depth товаров этой категории загружаются в фоне:
+их изображения скачиваются в хранилище изображений, а если задана функция загрузки изображений в телеграмм - для них
+заранее получаются file_id. Количество одновременных загрузок ограничено для всех пользователей бота. Для подбора
+глубины предварительной загрузки ведется статистика попаданий: был ли открытый пользователем товар загружен заранее.
+"""
+
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, Optional, Sequence
+
+from ..logger import get_development_logger
+
+dev_log = get_development_logger(__name__)
+
+
+class ProductPrefetcher:
+    """
+        Класс - загрузчик товаров, которые пользователь откроет следующими. Объект класса принадлежит пулу категорий.
+    Если глубина предварительной загрузки равна нулю - загрузка отключена
+    """
+
+    def __init__(
+        self,
+        depth: int = 0,
+        max_workers: int = 4,
+        max_pending: int = 100,
+        max_scheduled: int = 1000,
+    ):
+        self.__depth: int = depth
+        self.__max_pending: int = max_pending
+        self.__max_scheduled: int = max_scheduled
+        self.__executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="product_prefetch"
+            )
+            if depth > 0
+            else None
+        )
+        self.__lock = Lock()
+        self.__pending: int = 0
+        self.__scheduled: OrderedDict[str, Future] = OrderedDict()
+        self.__statistics: Counter = Counter()
+        self.__uploader: Optional[Callable] = None
+
+    def set_uploader(self, uploader: Optional[Callable]) -> None:
+        """
+            Метод устанавливает функцию загрузки изображений товара в телеграмм. Функция принимает объект товара и
+        должна передать товару полученные file_id. Если функция не установлена - загружаются только байты изображений
+        """
+        self.__uploader = uploader
+
+    def prefetch(self, products: Sequence, product_index: int) -> None:
+        """
+            Метод ставит в очередь загрузки depth товаров, следующих в списке товаров категории за товаром с
+        указанным индексом. Товары, которые уже загружены или стоят в очереди, повторно не загружаются. Если в очереди
+        уже max_pending товаров - новые товары в неё не добавляются
+        """
+        if self.__executor is None or len(products) < 2:
+            return
+
+        for i_offset in range(1, min(self.__depth, len(products) - 1) + 1):
+            product = products[(product_index + i_offset) % len(products)]
+
+            with self.__lock:
+                if product.productsId in self.__scheduled:
+                    continue
+
+                if product.is_uploaded():
+                    future = Future()
+                    future.set_result(None)
+                elif self.__pending >= self.__max_pending:
+                    continue
+                else:
+                    self.__pending += 1
+                    future = self.__executor.submit(self.__warm, product)
+
+                self.__scheduled[product.productsId] = future
+                while len(self.__scheduled) > self.__max_scheduled:
+                    self.__scheduled.popitem(last=False)
+
+    def __warm(self, product) -> None:
+        """Метод загружает изображения товара и, если задана функция загрузки, получает для них file_id"""
+        try:
+            product.load_images()
+            if self.__uploader and not product.is_uploaded():
+                self.__uploader(product)
+
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось заранее загрузить товар {product.productsId}",
+                exc_info=ex,
+            )
+
+        finally:
+            with self.__lock:
+                self.__pending -= 1
+
+    def record_view(self, product) -> None:
+        """
+            Метод учитывает в статистике открытие товара пользователем: попадание (hit) - товар был загружен заранее,
+        опоздание (late) - загрузка товара еще не завершена, промах (miss) - товар не загружался заранее
+        """
+        if self.__executor is None:
+            return
+
+        with self.__lock:
+            future = self.__scheduled.pop(product.productsId, None)
+            if future is None:
+                self.__statistics["miss"] += 1
+            elif future.done():
+                self.__statistics["hit"] += 1
+            else:
+                self.__statistics["late"] += 1
+
+    def get_statistics(self) -> Dict[str, float]:
+        """Метод возвращает количество попаданий, опозданий и промахов предварительной загрузки и долю попаданий"""
+        with self.__lock:
+            statistics = {
+                i_key: self.__statistics[i_key] for i_key in ("hit", "late", "miss")
+            }
+
+        total = sum(statistics.values())
+        statistics["hit_rate"] = statistics["hit"] / total if total else 0.0
+        return statistics
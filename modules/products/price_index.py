@@ -0,0 +1,133 @@
+"""
+    Данный модуль содержит реализацию отсортированных индексов товаров категории по цене. Индекс строится один раз
+при обновлении каталога и позволяет получать товары категории в порядке возрастания или убывания цены, в том числе
+только товары с доставкой и только товары из заданного диапазона цен, за O(log n) без перебора всех товаров категории.
+Постраничный просмотр выполняется при помощи курсора - цены и id последнего показанного товара - поэтому страницы
+остаются согласованными и после обновления каталога.
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+ORDER_ASC = "asc"
+ORDER_DESC = "desc"
+
+
+@dataclass
+class ProductPage:
+    """
+        Класс - страница товаров: id товаров страницы, курсор для получения следующей страницы (None, если страница
+    последняя) и общее количество товаров, соответствующих условиям запроса
+    """
+
+    products: List = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    total: int = 0
+
+
+def encode_cursor(key: Tuple[int, str]) -> str:
+    """Функция возвращает курсор страницы - строку из цены и id товара, пригодную для передачи в callback_data"""
+    return "{}:{}".format(*key)
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Функция возвращает цену и id товара из курсора страницы"""
+    price, _, product_id = cursor.partition(":")
+    return int(price), product_id
+
+
+class SortedKeys:
+    """Класс - отсортированный по цене и id перечень товаров"""
+
+    def __init__(self, keys: Iterable[Tuple[int, str]]):
+        self.keys: List[Tuple[int, str]] = sorted(keys)
+        self.prices: List[int] = [i_key[0] for i_key in self.keys]
+
+    def get_range(
+        self, min_price: Optional[int], max_price: Optional[int]
+    ) -> Tuple[int, int]:
+        """Метод возвращает границы диапазона позиций товаров с ценой в указанных пределах (границы включаются)"""
+        start = 0 if min_price is None else bisect_left(self.prices, min_price)
+        stop = (
+            len(self.prices)
+            if max_price is None
+            else bisect_right(self.prices, max_price)
+        )
+        return start, max(start, stop)
+
+
+class CategoryPriceIndex:
+    """
+        Класс - индекс товаров одной категории по цене: все товары категории и отдельно товары с доставкой,
+    отсортированные по цене, а при равной цене - по id товара
+    """
+
+    def __init__(self, products: Iterable):
+        self.__set_keys(
+            (i_product.price, i_product.productsId, i_product.delivery)
+            for i_product in products
+        )
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[Tuple[int, str, bool]]) -> "CategoryPriceIndex":
+        """
+            Метод создает индекс по ценам, id и наличию доставки товаров, например полученным из колонок колоночного
+        каталога без создания объектов товаров
+        """
+        index = cls.__new__(cls)
+        index.__set_keys(keys)
+        return index
+
+    def __set_keys(self, keys: Iterable[Tuple[int, str, bool]]) -> None:
+        """Метод строит отсортированные перечни всех товаров и товаров с доставкой"""
+        keys = list(keys)
+        self.__all: SortedKeys = SortedKeys((i_key[0], i_key[1]) for i_key in keys)
+        self.__delivery: SortedKeys = SortedKeys(
+            (i_key[0], i_key[1]) for i_key in keys if i_key[2]
+        )
+
+    def __len__(self) -> int:
+        return len(self.__all.keys)
+
+    def query(
+        self,
+        order: str = ORDER_ASC,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        delivery_only: bool = False,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+    ) -> ProductPage:
+        """
+            Метод возвращает страницу id товаров в порядке возрастания (order = "asc") или убывания (order = "desc")
+        цены. Если передан курсор - страница начинается с товара, следующего за товаром курсора
+        """
+        sorted_keys = self.__delivery if delivery_only else self.__all
+        start, stop = sorted_keys.get_range(min_price, max_price)
+        total = stop - start
+
+        if order == ORDER_DESC:
+            if cursor is not None:
+                stop = max(
+                    start,
+                    min(stop, bisect_left(sorted_keys.keys, decode_cursor(cursor))),
+                )
+            page_start = max(start, stop - limit)
+            keys = sorted_keys.keys[page_start:stop][::-1]
+            has_next = page_start > start
+        else:
+            if cursor is not None:
+                start = min(
+                    stop,
+                    max(start, bisect_right(sorted_keys.keys, decode_cursor(cursor))),
+                )
+            page_stop = min(stop, start + limit)
+            keys = sorted_keys.keys[start:page_stop]
+            has_next = page_stop < stop
+
+        return ProductPage(
+            products=[i_key[1] for i_key in keys],
+            next_cursor=encode_cursor(keys[-1]) if keys and has_next else None,
+            total=total,
+        )
@@ -3,28 +3,57 @@
 продаваемыми в магазине товарами.
 """
 
+import hashlib
 import json
-import os.path
 import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
 from multiprocessing.pool import ThreadPool
-from threading import Semaphore
-from typing import Any, Dict, List, Optional
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
 
-import requests
-from marshmallow import Schema, fields, post_load
+from marshmallow import Schema, ValidationError, fields, post_load
 from telebot.types import InputMediaPhoto
 
 from ..logger import get_development_logger
-from ..utils import DataTunnel, ProjectCache, execute_in_new_thread
+from ..utils import (
+    CATALOG,
+    Backend,
+    DataTunnel,
+    ProjectCache,
+    RequestRejectedError,
+    bind_deadline,
+    execute_in_new_thread,
+)
+from .catalog_storage import CatalogStorage
+from .columnar_catalog import ColumnarCatalog
+from .file_id_storage import FileIdStorage
+from .image_fetcher import ImageFetcher
+from .image_processing import ImageProcessor, get_placeholder
+from .image_store import ImageStore
+from .prefetcher import ProductPrefetcher
+from .price_index import ORDER_ASC, CategoryPriceIndex, ProductPage
+from .search_index import SearchIndex
 
 dev_log = get_development_logger(__name__)
+backend = Backend()
 modul_cache = ProjectCache()
 data_tunnel = DataTunnel()
+file_id_storage = FileIdStorage()
+image_fetcher = ImageFetcher()
+image_store = ImageStore()
+image_processor = ImageProcessor()
+
+PLACEHOLDER_KEY = "static/placeholder.png"
 
 
 class Product:
     """Класс - модель единицы продаваемой продукции"""
 
+    image_retry_delay: float = 30
+    image_retry_max_delay: float = 1800
+
     def __init__(
         self,
         productId: str,
@@ -40,70 +69,219 @@ class Product:
         self.name: str = name
         self.price: int = price
         self.description: str = description
-        self.image: List[InputMediaPhoto] = self.__get_input_media_photo(image)
+        self.image_urls: List[str] = image[:10]
         self.delivery: bool = delivery
         self.category: str = category
 
+        self.__image_keys: List[str] = list()
+        self.__image_hashes: List[Optional[str]] = list()
+        self.__file_ids: List[Optional[str]] = list()
+        self.__images_loaded: bool = False
+        self.__image_retry_delay: float = 0
+        self.__image_retry_time: float = 0
+        self.__image_lock = Lock()
+
     def __eq__(self, other):
         """Метод сравнения двух продуктов по их id"""
         return self.productsId == getattr(other, "productsId", None)
 
-    @classmethod
-    @modul_cache
-    def __get_bytes_by_url(cls, url: str) -> bytes:
+    def __getstate__(self) -> Dict[str, Any]:
         """
-            Данный метод вспомогательный, используется в методе get_list_images и служит для получения байтов
-        изображения товара по указанному url
+            Метод возвращает состояние объекта для сериализации (например, при сохранении товара в общем хранилище
+        кэша). Блокировка загрузки изображений не сериализуется
         """
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                return response.content
-            dev_log.exception(
-                "По url {} не удалось получить изображение товара от сервера - код {}".format(
-                    url, response.status_code
+        state = self.__dict__.copy()
+        state.pop("_Product__image_lock", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Метод восстанавливает состояние объекта после десериализации"""
+        self.__dict__.update(state)
+        self.__image_retry_time = 0
+        self.__image_lock = Lock()
+
+    def get_data(self) -> Dict[str, Any]:
+        """Метод возвращает данные товара в том виде, в котором их передает внешний API"""
+        return {
+            "productId": self.productsId,
+            "name": self.name,
+            "description": self.description,
+            "price": self.price,
+            "image": self.image_urls,
+            "delivery": self.delivery,
+            "category": self.category,
+        }
+
+    @property
+    def image(self) -> List[InputMediaPhoto]:
+        """
+            Список изображений товара в виде объектов InputMediaPhoto. Изображения загружаются не при создании товара,
+        а при первом обращении к этому атрибуту - как правило, при первой отправке товара пользователю. Объект товара
+        хранит только file_id и хэши изображений: байты изображений, еще не загруженных в телеграмм, читаются из
+        хранилища изображений при каждом обращении к этому атрибуту и в оперативной памяти не сохраняются
+        """
+        if not self.__images_loaded:
+            self.load_images()
+
+        list_input_media_photo = list()
+        for i_key, i_hash, i_file_id in zip(
+            self.__image_keys, self.__image_hashes, self.__file_ids
+        ):
+            if i_file_id:
+                list_input_media_photo.append(InputMediaPhoto(i_file_id))
+                continue
+
+            content = image_store.read(i_hash) if i_hash else None
+            if content is None:
+                content = self.__get_image_content(i_key)
+            list_input_media_photo.append(InputMediaPhoto(content))
+
+        return list_input_media_photo
+
+    def load_images(self) -> None:
+        """
+            Метод загружает изображения товара, если они еще не были загружены. Может быть вызван заранее, например
+        фоновым потоком предварительной загрузки изображений. Изображения считаются загруженными, только если для
+        каждого url получен file_id или хэш изображения. Изображения, которые загрузить не удалось, загружаются
+        повторно при следующем обращении, но не чаще чем раз в image_retry_delay секунд - интервал удваивается после
+        каждой неудачной попытки, но не превышает image_retry_max_delay секунд. Загрузки, не завершившиеся до
+        крайнего срока обработки запроса, неудачными не считаются - они продолжаются в фоне, и изображения загружаются
+        при следующем обращении без ожидания интервала
+        """
+        with self.__image_lock:
+            if self.__images_loaded or time.monotonic() < self.__image_retry_time:
+                return
+
+            missing_urls, pending_urls = self.__get_images(self.image_urls)
+            if not missing_urls and not pending_urls:
+                self.__images_loaded = True
+                self.__image_retry_delay = 0
+                return
+
+            if not missing_urls:
+                dev_log.debug(
+                    f"Загрузка {len(pending_urls)} изображений товара {self.productsId} не завершилась к крайнему "
+                    f"сроку обработки запроса"
                 )
+                return
+
+            self.__image_retry_delay = min(
+                self.__image_retry_delay * 2 or self.image_retry_delay,
+                self.image_retry_max_delay,
+            )
+            self.__image_retry_time = time.monotonic() + self.__image_retry_delay
+            dev_log.info(
+                f"Не удалось загрузить {len(missing_urls)} изображений товара {self.productsId}, повторная "
+                f"попытка через {self.__image_retry_delay} секунд"
             )
 
-        except Exception as ex:
-            dev_log.exception(
-                "По url {} не удалось получить изображение товара от сервера".format(
-                    url
-                ),
-                exc_info=ex,
+    def is_images_loaded(self) -> bool:
+        """Метод возвращает True, если изображения товара уже загружены"""
+        return self.__images_loaded
+
+    def is_uploaded(self) -> bool:
+        """Метод возвращает True, если для всех изображений товара уже известны file_id телеграмм"""
+        return self.__images_loaded and all(self.__file_ids)
+
+    def __get_images(self, list_url: List[str]) -> Tuple[List[str], List[str]]:
+        """
+            Данный метод вспомогательный и служит для получения file_id или хэшей изображений товара по списку их url.
+        Изображения, которые уже загружались в телеграмм, не скачиваются - для них используется сохраненный file_id.
+        Изображения, которые уже есть в хранилище изображений, так же не скачиваются. Остальные изображения
+        загружаются общим загрузчиком изображений и сохраняются в хранилище. Ключи, хэши и file_id изображений
+        сохраняются в одинаковом порядке. Метод возвращает список url изображений, которые загрузить не удалось, и
+        список url изображений, загрузка которых не завершилась за время ожидания
+        """
+        file_ids = [file_id_storage.get(i_url) for i_url in list_url]
+        hashes = [
+            None if i_file_id else image_store.get_hash(i_url)
+            for i_url, i_file_id in zip(list_url, file_ids)
+        ]
+
+        list_url_download = [
+            i_url
+            for i_url, i_file_id, i_hash in zip(list_url, file_ids, hashes)
+            if i_file_id is None and i_hash is None
+        ]
+        list_content, pending_urls = image_fetcher.wait_many(list_url_download)
+        downloaded_hashes = {
+            i_url: image_store.put(i_url, i_content)
+            for i_url, i_content in zip(
+                list_url_download, image_processor.process_many(list_content)
+            )
+            if isinstance(i_content, bytes)
+        }
+
+        keys, image_hashes, image_file_ids, missing_urls = (
+            list(),
+            list(),
+            list(),
+            list(),
+        )
+        for i_url, i_file_id, i_hash in zip(list_url, file_ids, hashes):
+            i_hash = i_hash or downloaded_hashes.get(i_url, None)
+            if i_file_id or i_hash:
+                keys.append(i_url)
+                image_hashes.append(i_hash)
+                image_file_ids.append(i_file_id)
+            elif i_url not in pending_urls:
+                missing_urls.append(i_url)
+
+        if len(keys) == 0:
+            file_id = file_id_storage.get(PLACEHOLDER_KEY)
+            keys.append(PLACEHOLDER_KEY)
+            image_hashes.append(
+                None if file_id else image_store.get_hash(PLACEHOLDER_KEY)
             )
+            image_file_ids.append(file_id)
+
+        self.__image_keys = keys
+        self.__image_hashes = image_hashes
+        self.__file_ids = image_file_ids
 
-    def __get_list_images(self, list_url: List[str]) -> List[bytes]:
+        return missing_urls, pending_urls
+
+    @classmethod
+    def __get_image_content(cls, key: str) -> bytes:
         """
-            Данный метод вспомогательный и служит для получения списка байт-массивов изображений товаров из списка
-        переданных url. Этот метод используется в методы get_input_media_photo
+            Метод возвращает байты изображения по его ключу, если изображения нет в хранилище изображений (например,
+        оно было удалено при очистке хранилища). Изображение загружается повторно и снова сохраняется в хранилище. Если
+        загрузить изображение не удалось - возвращается изображение-заглушка
         """
-        thread_pool = ThreadPool(10)
-        result = thread_pool.map_async(self.__get_bytes_by_url, list_url)
-        thread_pool.close()
-        thread_pool.join()
-        return result.get(timeout=10)
+        if key != PLACEHOLDER_KEY:
+            content = image_processor.process_many(image_fetcher.fetch_many([key]))[0]
+            if isinstance(content, bytes):
+                image_store.put(key, content)
+                return content
+
+        content = get_placeholder()
+        image_store.put(PLACEHOLDER_KEY, content)
 
-    def __get_input_media_photo(self, list_url: List[str]) -> List[InputMediaPhoto]:
+        return content
+
+    def set_file_id(self, list_file_id: List[str]) -> None:
         """
-            Данный метод вспомогательный и служит для преобразования списка url изображений товаров в список объектов
-        InputMediaPhoto - объекты, которые объект телеграм бота способен отправить пользователю в виде группового
-        сообщения
+            Метод получает на вход список file_id, присвоенных телеграммом изображениям товара после их отправки
+        пользователю (в порядке следования изображений), и сохраняет их в хранилище file_id, что бы при последующих
+        обновлениях каталога и перезапусках бота изображения не загружались повторно
         """
-        list_input_media_photo = [
-            InputMediaPhoto(i_elem)
-            for i_elem in self.__get_list_images(list_url[:10])
-            if isinstance(i_elem, bytes)
-        ]
+        if len(list_file_id) != len(self.__image_keys):
+            dev_log.warning(
+                f"Количество file_id не совпадает с количеством изображений товара {self.productsId}"
+            )
+            return
 
-        if len(list_input_media_photo) == 0:
-            path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "static", "placeholder.png"
+        new_file_ids = {
+            i_key: i_file_id
+            for i_key, i_file_id, i_old_file_id in zip(
+                self.__image_keys, list_file_id, self.__file_ids
             )
-            with open(path, "rb") as file:
-                list_input_media_photo.append(InputMediaPhoto(file.read()))
+            if i_old_file_id is None
+        }
+        if new_file_ids:
+            file_id_storage.set(new_file_ids)
 
-        return list_input_media_photo
+        self.__file_ids = list(list_file_id)
 
     def __repr__(self) -> str:
         """Метод возвращает строку с информацией о товаре при обращении к объекту продукта как к типу str"""
@@ -113,10 +291,29 @@ class Product:
         )
 
 
-class ProductSchema(Schema):
+class ProductPlaceholder(Product):
     """
-        Класс - модель данных json получаемого от внешнего API при запросе продукта. Служит для валидации, сериализации
-    и десериализации данных.
+        Класс - заглушка товара, которого больше нет ни в каталоге, ни у внешнего API. Используется в заказах вместо
+    отсутствующего товара, чтобы заказ оставался целым: id и количество товара в заказе сохраняются, а пользователю
+    показывается, что товар недоступен
+    """
+
+    def __init__(self, productId: str):
+        super().__init__(
+            productId=productId,
+            name="Товар недоступен",
+            price=0,
+            description="Товар больше не продается",
+            image=list(),
+            delivery=False,
+            category="Нет в каталоге",
+        )
+
+
+class ProductDataSchema(Schema):
+    """
+        Класс - модель данных json получаемого от внешнего API при запросе продукта. Служит для валидации данных
+    товара без создания объекта товара, например при заполнении колоночного каталога
     """
 
     productId = fields.Str(required=True, allow_none=False)
@@ -127,11 +324,114 @@ class ProductSchema(Schema):
     delivery = fields.Boolean(required=True, allow_none=False)
     category = fields.Str(required=True, allow_none=False)
 
+
+class ProductSchema(ProductDataSchema):
+    """
+        Класс - модель данных json получаемого от внешнего API при запросе продукта. Служит для валидации, сериализации
+    и десериализации данных.
+    """
+
     @post_load
     def create_category(self, data, **kwargs) -> Product:
         return Product(**data)
 
 
+class CatalogClient:
+    """
+        Класс - клиент внешнего API каталога товаров. Для каждого url клиент сохраняет валидаторы ответа сервера (ETag
+    и Last-Modified) и передает их в последующих запросах к этому url в заголовках If-None-Match и If-Modified-Since.
+    Если данные на сервере не изменились - сервер отвечает кодом 304 без тела ответа, а вызывающий код переиспользует
+    имеющиеся объекты вместо повторного разбора данных.
+        Если кэш проекта использует общее для нескольких процессов хранилище, полученные данные сохраняются в нем
+    вместе с валидаторами. Процесс, у которого еще нет собственных данных для url, выполняет условный запрос с
+    валидаторами из общего кэша и при ответе 304 использует данные, полученные ранее другим процессом бота
+    """
+
+    def __init__(self, cache: Optional[ProjectCache] = None):
+        self.__content_type: Dict[str, str] = {"Content-Type": "application/json"}
+        self.__validators: Dict[str, Dict[str, str]] = dict()
+        self.__cache: ProjectCache = cache or modul_cache
+        self.__lock = Lock()
+
+    @staticmethod
+    def __get_cache_key(url: str) -> str:
+        """Метод возвращает ключ, под которым данные url хранятся в общем кэше"""
+        return f"catalog:{url}"
+
+    def get_json(
+        self, url: str, description: str, conditional: bool = True
+    ) -> Tuple[Optional[int], Optional[Any]]:
+        """
+            Метод выполняет запрос к внешнему API по указанному url и возвращает статус код ответа и полученные данные
+        json. Если conditional = True, запрос выполняется с сохраненными для этого url валидаторами, и при отсутствии
+        изменений на сервере возвращается статус код 304 без данных. Если conditional = False, валидаторы не
+        передаются, в том числе валидаторы общего кэша. Если выполнить запрос не удалось - возвращается (None, None)
+        """
+        headers = dict(self.__content_type)
+        shared_data = None
+        if conditional:
+            if url in self.__validators:
+                headers.update(self.__validators[url])
+            elif self.__cache.is_shared:
+                shared_data = self.__cache.get_data(self.__get_cache_key(url))
+                if shared_data is not None:
+                    headers.update(shared_data["validators"])
+
+        try:
+            response = backend.get(CATALOG, url, headers=headers)
+            if response.status_code == 304:
+                if shared_data is None:
+                    return response.status_code, None
+
+                with self.__lock:
+                    self.__validators[url] = shared_data["validators"]
+                return 200, shared_data["data"]
+
+            if response.status_code == 200:
+                data = json.loads(response.text)
+                validators = dict()
+                if response.headers.get("ETag", None):
+                    validators["If-None-Match"] = response.headers["ETag"]
+                if response.headers.get("Last-Modified", None):
+                    validators["If-Modified-Since"] = response.headers["Last-Modified"]
+
+                with self.__lock:
+                    self.__validators[url] = validators
+
+                if self.__cache.is_shared and validators:
+                    self.__cache.set_data(
+                        self.__get_cache_key(url),
+                        {"validators": validators, "data": data},
+                    )
+
+                return response.status_code, data
+
+            dev_log.info(
+                f"Не удалось получить {description} - статус код {response.status_code}"
+            )
+            return response.status_code, None
+
+        except RequestRejectedError as ex:
+            dev_log.info(f"Не удалось получить {description}: {ex}")
+
+        except Exception as ex:
+            dev_log.exception(
+                f"При попытке получить {description} возникла ошибка", exc_info=ex
+            )
+
+        return None, None
+
+    def get_validators(self) -> Dict[str, Dict[str, str]]:
+        """Метод возвращает сохраненные валидаторы ответов сервера для всех url"""
+        with self.__lock:
+            return dict(self.__validators)
+
+    def set_validators(self, validators: Dict[str, Dict[str, str]]) -> None:
+        """Метод устанавливает валидаторы ответов сервера, например восстановленные из файла каталога"""
+        with self.__lock:
+            self.__validators.update(validators)
+
+
 class Category:
     """
         Класс - объекты которого объединяют в себе продукты относящиеся к определенному типу. Объект класса category
@@ -139,36 +439,80 @@ class Category:
     """
 
     def __init__(
-        self, categoryId: int, name: str, variability: bool, url_category: str
+        self,
+        categoryId: int,
+        name: str,
+        variability: bool,
+        url_category: str,
+        products: Optional[List[Product]] = None,
+        client: Optional[CatalogClient] = None,
+        loader: Optional[Callable[["Category"], Optional[List[Product]]]] = None,
     ):
         self.__url_category: str = url_category
         self.__product_schema: ProductSchema = ProductSchema()
-        self.__content_type: Dict[str, str] = {"Content-Type": "application/json"}
+        self.__client: CatalogClient = client or CatalogClient()
+        self.__loader: Optional[Callable[["Category"], Optional[List[Product]]]] = (
+            loader
+        )
+        self.__products_lock = Lock()
         self.categoryId: int = categoryId
         self.name: str = name
         self.variability: bool = variability
-        self.products: List[Product] = self.__api_get_list_product(categoryId)
+        self.access_count: int = 0
+        self.__products: Optional[List[Product]] = (
+            products
+            if products is not None or loader is not None
+            else self.__api_get_list_product(categoryId)
+        )
 
-    def __api_get_list_product(self, category_id: int) -> List[Product]:
-        """Метод служит для получения данных о продуктах указанной категории от внешнего API"""
-        try:
-            response = requests.get(
-                "/".join([self.__url_category, str(category_id)]),
-                headers=self.__content_type,
-            )
+    @property
+    def products(self) -> List[Product]:
+        """
+            Список товаров категории. Если категория создана с загрузчиком (ленивая категория) - товары запрашиваются
+        при первом обращении к списку. Каждое обращение учитывается в счетчике access_count
+        """
+        self.access_count += 1
 
-            if response.status_code == 200:
-                return self.__product_schema.loads(response.text, many=True)
+        if self.__products is None:
+            with self.__products_lock:
+                if self.__products is None:
+                    products = self.__loader(self)
+                    if products is None:
+                        return list()
+                    self.__products = products
 
-            dev_log.info(
-                f"Не удалось получить данные о продуктах категории {self.categoryId}"
-            )
+        return self.__products
 
-        except Exception as ex:
-            dev_log.exception(
-                f"При попытке получить данные о продуктах категории {self.categoryId} возникла ошибка",
-                exc_info=ex,
-            )
+    @products.setter
+    def products(self, products: List[Product]) -> None:
+        self.__products = products
+
+    def is_loaded(self) -> bool:
+        """Метод возвращает True, если товары категории уже получены от внешнего API"""
+        return self.__products is not None
+
+    def get_loaded_products(self) -> Optional[List[Product]]:
+        """
+            Метод возвращает список товаров категории без их загрузки и без учета обращения или None, если товары
+        ленивой категории еще не загружены. Используется пулом категорий при обновлении каталога
+        """
+        return self.__products
+
+    def __api_get_list_product(self, category_id: int) -> List[Product]:
+        """Метод служит для получения данных о продуктах указанной категории от внешнего API"""
+        _, product_data = self.__client.get_json(
+            "/".join([self.__url_category, str(category_id)]),
+            f"данные о продуктах категории {category_id}",
+            conditional=False,
+        )
+
+        if product_data is not None:
+            try:
+                return self.__product_schema.load(product_data, many=True)
+            except ValidationError as ex:
+                dev_log.warning(
+                    f"Получены некорректные данные о продуктах категории {category_id}: {ex}"
+                )
 
         return []
 
@@ -187,13 +531,82 @@ class CategorySchema(Schema):
     name = fields.Str(required=True, allow_none=False)
     variability = fields.Boolean(required=True, allow_none=False)
     url_category = fields.Str(required=False, allow_none=False, load_only=True)
+    products = fields.Raw(required=False, allow_none=True, load_only=True)
+    client = fields.Raw(required=False, allow_none=True, load_only=True)
+    loader = fields.Raw(required=False, allow_none=True, load_only=True)
 
     @post_load
     def create_category(self, data, **kwargs) -> Category:
         return Category(**data)
 
 
-@data_tunnel.add_methods("get_product")
+@dataclass
+class CatalogUpdateReport:
+    """
+        Класс - отчет об обновлении каталога: количество добавленных, измененных, удаленных и не изменившихся товаров,
+    количество добавленных, измененных и удаленных категорий, а так же количество запросов к API, на которые сервер
+    ответил, что данные не изменились (статус код 304)
+    """
+
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    not_modified: int = 0
+    categories_added: int = 0
+    categories_changed: int = 0
+    categories_removed: int = 0
+
+    def has_changes(self) -> bool:
+        """Метод возвращает True, если при обновлении каталога были добавлены, изменены или удалены товары или категории"""
+        return any(
+            (
+                self.added,
+                self.changed,
+                self.removed,
+                self.categories_added,
+                self.categories_changed,
+                self.categories_removed,
+            )
+        )
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+        Класс - неизменяемый снимок каталога товаров: версия каталога, категории, словарь товаров по их id, хэши
+    исходных данных товаров и данные категорий, полученные от внешнего API. Пул категорий публикует новый снимок
+    одним присваиванием ссылки, поэтому код, читающий каталог, всегда видит согласованные между собой категории и
+    товары без использования блокировок. Снимок так же содержит индексы товаров загруженных категорий по цене,
+    построенные при его публикации. Версия увеличивается при каждом изменении каталога и позволяет определить,
+    что сохраненные данные (например, позиция пользователя в каталоге) относятся к устаревшему каталогу
+    """
+
+    version: int = 0
+    categories: Tuple[Category, ...] = ()
+    products: Mapping[str, Product] = field(
+        default_factory=lambda: MappingProxyType(dict())
+    )
+    product_hash: Mapping[str, str] = field(
+        default_factory=lambda: MappingProxyType(dict())
+    )
+    category_data: Tuple[Dict[str, Any], ...] = ()
+    price_indexes: Mapping[int, CategoryPriceIndex] = field(
+        default_factory=lambda: MappingProxyType(dict())
+    )
+
+
+def get_data_hash(data: Dict[str, Any]) -> str:
+    """
+        Функция возвращает хэш данных, полученных от внешнего API. Используется для определения - изменились ли данные
+    товара с момента предыдущего обновления каталога
+    """
+    return hashlib.md5(
+        json.dumps(data, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+@data_tunnel.add_methods("get_product", "get_products", "prefetch")
 class CategoryPool:
     """
         Класс объект которого является для бота основной сущность для взаимодействия с каталогом продаваемых продуктов.
@@ -203,86 +616,980 @@ class CategoryPool:
     """
 
     def __init__(
-        self, url_category: str, url_product: str, update_period: Optional[int] = None
+        self,
+        url_category: str,
+        url_product: str,
+        update_period: Optional[int] = None,
+        prefetch_images: bool = False,
+        max_workers: int = 10,
+        lazy_categories: bool = False,
+        warm_up_categories: int = 0,
+        snapshot_path: Optional[str] = None,
+        columnar: bool = False,
+        prefetch_depth: int = 0,
+        prefetch_workers: int = 4,
     ):
+        if columnar and lazy_categories:
+            dev_log.warning(
+                "Ленивая загрузка категорий не используется вместе с колоночным каталогом и будет отключена"
+            )
+            lazy_categories = False
+
+        if columnar and prefetch_images:
+            dev_log.warning(
+                "Предварительная загрузка изображений не используется вместе с колоночным каталогом и будет отключена: "
+                "объекты товаров колоночного каталога создаются по требованию, и состояние загруженных изображений не "
+                "сохранялось бы"
+            )
+            prefetch_images = False
+
         self.__url_category = url_category
         self.__url_product = url_product
-        self.__content_type: Dict[str, str] = {"Content-Type": "application/json"}
+        self.__prefetch_images: bool = prefetch_images
+        self.__max_workers: int = max_workers
+        self.__columnar: bool = columnar
+        self.__lazy_categories: bool = lazy_categories
+        self.__warm_up_categories: int = warm_up_categories
+        self.__access_statistics: Counter = Counter()
+        self.__lock = Lock()
+        self.__client: CatalogClient = CatalogClient()
         self.__category_schema: CategorySchema = CategorySchema()
         self.__product_schema: ProductSchema = ProductSchema()
+        self.__product_data_schema: ProductDataSchema = ProductDataSchema()
         self.__update_period: Optional[int] = update_period
-        self.categories: List[Category] = list()
-        self.__product_dict: Dict[str, Product] = dict()
+        self.__snapshot: CatalogSnapshot = CatalogSnapshot()
+        self.__search_index: SearchIndex = SearchIndex()
+        self.__prefetch_depth: int = prefetch_depth
+        self.__prefetcher: ProductPrefetcher = ProductPrefetcher(
+            prefetch_depth, prefetch_workers
+        )
+        self.__external_products: Dict[str, Product] = dict()
+        self.__storage: Optional[CatalogStorage] = (
+            CatalogStorage(snapshot_path) if snapshot_path else None
+        )
 
-        self.update()
+        if self.__restore_catalog():
+            self.__update_in_background()
+        else:
+            self.update()
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Текущий снимок каталога. Для согласованного чтения каталога следует один раз получить снимок и работать с ним"""
+        return self.__snapshot
+
+    @property
+    def categories(self) -> Tuple[Category, ...]:
+        """Категории текущего снимка каталога"""
+        return self.__snapshot.categories
+
+    @property
+    def version(self) -> int:
+        """Версия текущего снимка каталога"""
+        return self.__snapshot.version
 
-    @modul_cache
-    def __api_get_product(self, products_id: str) -> str:
+    def __api_get_product(self, products_id: str) -> Optional[Product]:
         """
             Данный метод осуществляет запрос к внешнему API для получения информации о конкретном товаре по указанному
-        id товара
+        id товара. Если товар уже запрашивался, выполняется условный запрос, и если данные на сервере не изменились -
+        возвращается имеющийся объект товара
         """
+        url = "/".join([self.__url_product, products_id])
+        old_product = self.__external_products.get(products_id, None)
+        status, product_data = self.__client.get_json(
+            url, f"данные товара {products_id}", conditional=old_product is not None
+        )
+
+        if status == 304:
+            return old_product
+
+        if product_data is not None:
+            try:
+                product = self.__product_schema.load(product_data)
+                self.__external_products[products_id] = product
+                return product
+            except ValidationError as ex:
+                dev_log.warning(
+                    f"Получены некорректные данные товара {products_id}: {ex}"
+                )
+
+    def __api_get_product_data(
+        self, category_data: Dict[str, Any]
+    ) -> Tuple[Optional[int], Optional[Any]]:
+        """
+            Метод получает от внешнего API данные о товарах категории. Используется в методе update, где выполняется
+        параллельно для всех категорий каталога
+        """
+        category_id = category_data.get("categoryId", None)
+        old_category = self.__get_category(category_id)
+        return self.__client.get_json(
+            "/".join([self.__url_category, str(category_id)]),
+            f"данные о продуктах категории {category_id}",
+            conditional=old_category is not None and old_category.is_loaded(),
+        )
+
+    def __load_category_products(self, category: Category) -> Optional[List[Product]]:
+        """
+            Метод - загрузчик товаров ленивой категории. Вызывается при первом обращении к списку товаров категории,
+        добавляет полученные товары в пул, после чего они доступны через метод get_product. Если данные получить не
+        удалось - возвращается None и загрузка будет повторена при следующем обращении
+        """
+        _, product_data = self.__client.get_json(
+            "/".join([self.__url_category, str(category.categoryId)]),
+            f"данные о продуктах категории {category.categoryId}",
+            conditional=False,
+        )
+
+        if product_data is None:
+            return None
+
+        report = CatalogUpdateReport()
+        products: List[Product] = list()
+        product_hash: Dict[str, str] = dict()
+        for i_product_data in product_data:
+            product = self.__get_product_obj(i_product_data, report)
+            if product:
+                products.append(product)
+                product_hash[product.productsId] = get_data_hash(i_product_data)
+
+        with self.__lock:
+            snapshot = self.__snapshot
+            if any(i_category is category for i_category in snapshot.categories):
+                self.__snapshot = replace(
+                    snapshot,
+                    products=MappingProxyType(
+                        {
+                            **snapshot.products,
+                            **{
+                                i_product.productsId: i_product
+                                for i_product in products
+                            },
+                        }
+                    ),
+                    product_hash=MappingProxyType(
+                        {**snapshot.product_hash, **product_hash}
+                    ),
+                    price_indexes=MappingProxyType(
+                        {
+                            **snapshot.price_indexes,
+                            category.categoryId: CategoryPriceIndex(products),
+                        }
+                    ),
+                )
+                self.__search_index.add_products(self.__snapshot.products, product_hash)
+
+        dev_log.debug(
+            f"Загружены товары категории {category.name}: {len(products)} товаров"
+        )
+        return products
+
+    def __get_product_obj(
+        self, product_data: Dict[str, Any], report: CatalogUpdateReport
+    ) -> Optional[Product]:
+        """
+            Метод возвращает объект товара по полученным от внешнего API данным. Если данные товара не изменились с
+        момента предыдущего обновления каталога - возвращается имеющийся объект товара (вместе с загруженными
+        изображениями и file_id), иначе создается новый объект
+        """
+        product_id = product_data.get("productId", None)
+        snapshot = self.__snapshot
+        old_product = snapshot.products.get(product_id, None)
+
+        if old_product and snapshot.product_hash.get(product_id) == get_data_hash(
+            product_data
+        ):
+            report.unchanged += 1
+            return old_product
+
         try:
-            response = requests.get(
-                "/".join([self.__url_product, products_id]), headers=self.__content_type
+            product = self.__product_schema.load(product_data)
+        except ValidationError as ex:
+            dev_log.warning(f"Получены некорректные данные товара {product_id}: {ex}")
+            return None
+
+        if old_product:
+            report.changed += 1
+        else:
+            report.added += 1
+
+        return product
+
+    def __get_category_obj(
+        self,
+        category_data: Dict[str, Any],
+        products: List[Product],
+        report: CatalogUpdateReport,
+    ) -> Optional[Category]:
+        """
+            Метод возвращает объект категории по полученным от внешнего API данным и списку её товаров. Если данные
+        категории и её товары не изменились с момента предыдущего обновления каталога - возвращается имеющийся объект
+        категории
+        """
+        old_category = self.__get_category(category_data.get("categoryId", None))
+        old_products = old_category.get_loaded_products() if old_category else None
+
+        if (
+            old_products is not None
+            and self.__is_same_category(old_category, category_data)
+            and len(old_products) == len(products)
+            and all(i_old is i_new for i_old, i_new in zip(old_products, products))
+        ):
+            return old_category
+
+        category = self.__create_category_obj(category_data, products=products)
+        if category and old_category:
+            report.categories_changed += 1
+        elif category:
+            report.categories_added += 1
+
+        return category
+
+    def __get_lazy_category_obj(
+        self, category_data: Dict[str, Any], report: CatalogUpdateReport
+    ) -> Optional[Category]:
+        """
+            Метод возвращает объект ленивой категории по полученным от внешнего API данным: товары такой категории
+        будут запрошены при первом обращении к ним. Если данные категории не изменились и её товары еще не загружены -
+        возвращается имеющийся объект категории
+        """
+        old_category = self.__get_category(category_data.get("categoryId", None))
+
+        if (
+            old_category
+            and not old_category.is_loaded()
+            and self.__is_same_category(old_category, category_data)
+        ):
+            return old_category
+
+        category = self.__create_category_obj(
+            category_data, loader=self.__load_category_products
+        )
+        if category and old_category is None:
+            report.categories_added += 1
+        elif category and not self.__is_same_category(old_category, category_data):
+            report.categories_changed += 1
+
+        return category
+
+    def __create_category_obj(
+        self, category_data: Dict[str, Any], **kwargs
+    ) -> Optional[Category]:
+        """
+            Метод создает новый объект категории по полученным от внешнего API данным. Дополнительные аргументы
+        (список товаров или загрузчик товаров) передаются в конструктор категории
+        """
+        try:
+            category = self.__category_schema.load(
+                dict(
+                    category_data,
+                    url_category=self.__url_category,
+                    client=self.__client,
+                    **kwargs,
+                )
             )
-            if response.status_code == 200:
-                return self.__product_schema.loads(response.text)
+        except ValidationError as ex:
+            dev_log.warning(f"Получены некорректные данные категории: {ex}")
+            return None
+
+        return category
+
+    @staticmethod
+    def __is_same_category(category: Category, category_data: Dict[str, Any]) -> bool:
+        """Метод возвращает True, если данные категории, полученные от внешнего API, совпадают с имеющимися"""
+        return category.name == category_data.get(
+            "name", None
+        ) and category.variability == category_data.get("variability", None)
 
-            dev_log.debug(
-                f"Не удалось получить данные о товаре {products_id} при загрузке заказа: статус код "
-                f"{response.status_code}"
+    def __collect_access_statistics(self) -> Set[int]:
+        """
+            Метод переносит счетчики обращений к товарам категорий в общую статистику обращений пула и возвращает
+        множество id категорий, к товарам которых обращались с момента предыдущего обновления каталога
+        """
+        accessed = set()
+        for i_category in self.categories:
+            access_count, i_category.access_count = i_category.access_count, 0
+            if access_count:
+                self.__access_statistics[i_category.categoryId] += access_count
+                accessed.add(i_category.categoryId)
+        return accessed
+
+    def __get_required_categories(
+        self, category_data: List[Dict[str, Any]]
+    ) -> Set[int]:
+        """
+            Метод возвращает множество id категорий, товары которых должны быть загружены при обновлении каталога.
+        Без ленивой загрузки это все категории каталога. При ленивой загрузке - категории, товары которых уже
+        загружены и к которым обращались с момента предыдущего обновления, а так же warm_up_categories категорий с
+        наибольшим количеством обращений за все время работы бота (прогрев)
+        """
+        if not self.__lazy_categories:
+            return {i_data.get("categoryId", None) for i_data in category_data}
+
+        accessed = self.__collect_access_statistics()
+        required = {
+            i_category.categoryId
+            for i_category in self.categories
+            if i_category.is_loaded() and i_category.categoryId in accessed
+        }
+        if self.__warm_up_categories > 0:
+            required.update(
+                i_category_id
+                for i_category_id, _ in self.__access_statistics.most_common(
+                    self.__warm_up_categories
+                )
             )
+        return required
 
-        except Exception as ex:
-            dev_log.exception(
-                f"При попытке получить данные товара {products_id} произошла ошибка:",
-                exc_info=ex,
+    def __get_category(self, category_id: Optional[int]) -> Optional[Category]:
+        """Метод возвращает имеющуюся в пуле категорию по её id"""
+        for i_category in self.categories:
+            if i_category.categoryId == category_id:
+                return i_category
+
+    def update(self) -> Optional[CatalogUpdateReport]:
+        """
+            Метод служит для получения или обновления списка категорий продаваемых товаров. Данные о товарах всех
+        категорий запрашиваются параллельно (не более max_workers запросов одновременно), каталог собирается только
+        после получения всех ответов. Обновление выполняется инкрементально: данные категорий и товаров сравниваются
+        по их id с данными предыдущего обновления, объекты не изменившихся товаров и категорий переиспользуются, а
+        новые объекты создаются только для добавленных и измененных. Метод возвращает отчет о количестве добавленных,
+        измененных и удаленных товаров и категорий. При ленивой загрузке категорий запрашиваются товары только
+        востребованных категорий, остальные категории создаются без товаров
+        """
+        report = CatalogUpdateReport()
+        snapshot = self.__snapshot
+        status, category_data = self.__client.get_json(
+            self.__url_category,
+            "список категорий",
+            conditional=len(snapshot.category_data) > 0,
+        )
+
+        if status == 304:
+            report.not_modified += 1
+            category_data = snapshot.category_data
+        elif not category_data:
+            return None
+
+        required = self.__get_required_categories(category_data)
+        required_data = [
+            i_data
+            for i_data in category_data
+            if i_data.get("categoryId", None) in required
+        ]
+        thread_pool = ThreadPool(max(1, min(self.__max_workers, len(required_data))))
+        list_response = thread_pool.map(self.__api_get_product_data, required_data)
+        thread_pool.close()
+        thread_pool.join()
+        responses = {
+            i_data.get("categoryId", None): i_response
+            for i_data, i_response in zip(required_data, list_response)
+        }
+
+        if self.__columnar:
+            self.__update_columnar(category_data, responses, report)
+        else:
+            self.__update_objects(category_data, responses, report)
+
+        dev_log.info(f"Каталог товаров обновлен до версии {self.version}: {report}")
+        if self.__prefetch_depth:
+            dev_log.info(
+                f"Статистика предварительной загрузки товаров: {self.__prefetcher.get_statistics()}"
             )
+        self.__save_catalog()
+
+        if self.__prefetch_images:
+            self.__load_images(list(self.__snapshot.products.values()))
 
-    def __api_get_list_category(self) -> List[Category]:
-        """Метод служит для получения от внешнего API списка категорий продаваемых товаров"""
+        return report
+
+    def __update_objects(
+        self,
+        category_data: List[Dict[str, Any]],
+        responses: Dict[int, Tuple[Optional[int], Optional[Any]]],
+        report: CatalogUpdateReport,
+    ) -> None:
+        """
+            Метод собирает и публикует новый снимок каталога из объектов товаров по ответам внешнего API. Объекты не
+        изменившихся товаров и категорий переиспользуются
+        """
+        snapshot = self.__snapshot
+        new_list_category: List[Category] = list()
+        new_product_dict: Dict[str, Product] = dict()
+        new_product_hash: Dict[str, str] = dict()
+        unloaded_products: Set[str] = set()
+
+        for i_category_data in category_data:
+            category_id = i_category_data.get("categoryId", None)
+            old_category = self.__get_category(category_id)
+            old_products = old_category.get_loaded_products() if old_category else None
+
+            if category_id not in responses:
+                category = self.__get_lazy_category_obj(i_category_data, report)
+                if category:
+                    new_list_category.append(category)
+                if old_products:
+                    unloaded_products.update(
+                        i_product.productsId for i_product in old_products
+                    )
+                continue
+
+            status, product_data = responses[category_id]
+
+            if product_data is None:
+                if status == 304:
+                    report.not_modified += 1
+
+                products = list(old_products or list())
+                for i_product in products:
+                    new_product_hash[i_product.productsId] = snapshot.product_hash.get(
+                        i_product.productsId
+                    )
+                    report.unchanged += 1
+
+            else:
+                products = list()
+                for i_product_data in product_data:
+                    product = self.__get_product_obj(i_product_data, report)
+                    if product:
+                        products.append(product)
+                        new_product_hash[product.productsId] = get_data_hash(
+                            i_product_data
+                        )
+
+            category = self.__get_category_obj(i_category_data, products, report)
+            if category:
+                new_list_category.append(category)
+                new_product_dict.update(
+                    {
+                        i_product.productsId: i_product
+                        for i_product in category.get_loaded_products() or list()
+                    }
+                )
+
+        report.removed = len(
+            snapshot.products.keys() - new_product_dict.keys() - unloaded_products
+        )
+        report.categories_removed = len(
+            {i_category.categoryId for i_category in snapshot.categories}
+            - {i_category.categoryId for i_category in new_list_category}
+        )
+
+        self.__publish(
+            new_list_category,
+            new_product_dict,
+            new_product_hash,
+            category_data,
+            report.has_changes(),
+        )
+
+    def __update_columnar(
+        self,
+        category_data: List[Dict[str, Any]],
+        responses: Dict[int, Tuple[Optional[int], Optional[Any]]],
+        report: CatalogUpdateReport,
+    ) -> None:
+        """
+            Метод собирает и публикует новый колоночный каталог по ответам внешнего API. Колонки заполняются
+        непосредственно данными товаров, а товары категорий, данные которых не изменились или не были получены,
+        переносятся из колонок текущего каталога - объекты товаров при этом не создаются. Для нового каталога всегда
+        создаются новые объекты категорий, поэтому категории опубликованного снимка не изменяются
+        """
+        snapshot = self.__snapshot
+        old_catalog = (
+            snapshot.products
+            if isinstance(snapshot.products, ColumnarCatalog)
+            else None
+        )
+        categories: List[Category] = list()
+        category_rows: List[Tuple[int, Iterable[Dict[str, Any]]]] = list()
+        product_hash: Dict[str, str] = dict()
+
+        for i_category_data in category_data:
+            category_id = i_category_data.get("categoryId", None)
+            old_category = self.__get_category(category_id)
+            old_ids = (
+                old_catalog.get_category_ids(category_id) if old_catalog else list()
+            )
+            status, product_data = responses.get(category_id, (None, None))
+
+            if product_data is None:
+                if status == 304:
+                    report.not_modified += 1
+
+                rows = (
+                    old_catalog.iter_category_data(category_id) if old_catalog else ()
+                )
+                for i_product_id in old_ids:
+                    product_hash[i_product_id] = snapshot.product_hash.get(i_product_id)
+                report.unchanged += len(old_ids)
+                changed = False
+
+            else:
+                rows = list()
+                for i_product_data in product_data:
+                    data_hash = get_data_hash(i_product_data)
+                    row = self.__get_product_row(i_product_data, data_hash, report)
+                    if row:
+                        rows.append(row)
+                        product_hash[row["productId"]] = data_hash
+
+                changed = [i_row["productId"] for i_row in rows] != old_ids or any(
+                    product_hash[i_row["productId"]]
+                    != snapshot.product_hash.get(i_row["productId"], None)
+                    for i_row in rows
+                )
+
+            category = self.__create_category_obj(i_category_data, products=list())
+            if category is None:
+                continue
+
+            if old_category is None:
+                report.categories_added += 1
+            elif changed or not self.__is_same_category(old_category, i_category_data):
+                report.categories_changed += 1
+
+            categories.append(category)
+            category_rows.append((category.categoryId, rows))
+
+        catalog = self.__build_columnar_catalog(categories, category_rows)
+        report.removed = len(snapshot.products.keys() - catalog.keys())
+        report.categories_removed = len(
+            {i_category.categoryId for i_category in snapshot.categories}
+            - {i_category.categoryId for i_category in categories}
+        )
+
+        self.__publish(
+            categories, catalog, product_hash, category_data, report.has_changes()
+        )
+
+    def __get_product_row(
+        self, product_data: Dict[str, Any], data_hash: str, report: CatalogUpdateReport
+    ) -> Optional[Dict[str, Any]]:
+        """
+            Метод возвращает проверенные данные товара для колоночного каталога и учитывает товар в отчете об
+        обновлении каталога. Объект товара не создается
+        """
+        product_id = product_data.get("productId", None)
         try:
-            response = requests.get(self.__url_category, headers=self.__content_type)
-            if response.status_code == 200:
-                category_data: List[Dict[str, Any]] = json.loads(response.text)
+            row = self.__product_data_schema.load(product_data)
+        except ValidationError as ex:
+            dev_log.warning(f"Получены некорректные данные товара {product_id}: {ex}")
+            return None
 
-                for i_dict in category_data:
-                    i_dict.update({"url_category": self.__url_category})
+        snapshot = self.__snapshot
+        if product_id not in snapshot.products:
+            report.added += 1
+        elif snapshot.product_hash.get(product_id, None) == data_hash:
+            report.unchanged += 1
+        else:
+            report.changed += 1
 
-                return self.__category_schema.loads(
-                    json.dumps(category_data), many=True
+        return row
+
+    @staticmethod
+    def __build_columnar_catalog(
+        categories: List[Category],
+        category_rows: List[Tuple[int, Iterable[Dict[str, Any]]]],
+    ) -> ColumnarCatalog:
+        """
+            Метод создает колоночный каталог по данным товаров категорий и заменяет списки товаров переданных новых
+        (еще не опубликованных) категорий представлениями колоночного каталога
+        """
+        catalog = ColumnarCatalog(category_rows, Product)
+        for i_category in categories:
+            i_category.products = catalog.get_category_products(i_category.categoryId)
+        return catalog
+
+    def __publish(
+        self,
+        categories: List[Category],
+        product_dict: Mapping[str, Product],
+        product_hash: Dict[str, str],
+        category_data: List[Dict[str, Any]],
+        changed: bool,
+    ) -> None:
+        """
+            Метод публикует новый снимок каталога одним присваиванием ссылки. Если каталог изменился - версия снимка
+        увеличивается. Блокировка упорядочивает только пишущие потоки, читающий каталог код её не использует.
+        Поисковый индекс обновляется вместе с публикацией снимка. Колоночный каталог публикуется как есть, словарь
+        объектов товаров - в виде неизменяемого представления
+        """
+        products: Mapping[str, Product] = (
+            product_dict
+            if isinstance(product_dict, ColumnarCatalog)
+            else MappingProxyType(product_dict)
+        )
+
+        with self.__lock:
+            version = (
+                self.__snapshot.version + 1 if changed else self.__snapshot.version
+            )
+            self.__snapshot = CatalogSnapshot(
+                version=version,
+                categories=tuple(categories),
+                products=products,
+                product_hash=MappingProxyType(product_hash),
+                category_data=tuple(category_data),
+                price_indexes=MappingProxyType(
+                    self.__get_price_indexes(categories, products)
+                ),
+            )
+            self.__search_index.update(
+                self.__snapshot.products, self.__snapshot.product_hash
+            )
+
+    def __get_price_indexes(
+        self, categories: List[Category], products: Mapping[str, Product]
+    ) -> Dict[int, CategoryPriceIndex]:
+        """
+            Метод возвращает индексы товаров загруженных категорий по цене. Индексы категорий, объекты которых не
+        изменились с момента публикации предыдущего снимка, переиспользуются. Индексы колоночного каталога строятся по
+        его колонкам без создания объектов товаров
+        """
+        if isinstance(products, ColumnarCatalog):
+            return {
+                i_category.categoryId: CategoryPriceIndex.from_keys(
+                    products.iter_price_keys(i_category.categoryId)
                 )
+                for i_category in categories
+                if i_category.is_loaded()
+            }
+
+        snapshot = self.__snapshot
+        old_categories = {
+            i_category.categoryId: i_category for i_category in snapshot.categories
+        }
+        price_indexes: Dict[int, CategoryPriceIndex] = dict()
+
+        for i_category in categories:
+            products = i_category.get_loaded_products()
+            if products is None:
+                continue
+
+            index = snapshot.price_indexes.get(i_category.categoryId, None)
+            if (
+                index is None
+                or old_categories.get(i_category.categoryId) is not i_category
+            ):
+                index = CategoryPriceIndex(products)
+            price_indexes[i_category.categoryId] = index
+
+        return price_indexes
+
+    def __restore_catalog(self) -> bool:
+        """
+            Метод восстанавливает каталог из файла последнего успешно полученного каталога. Товары категорий, которых
+        нет в файле, будут запрошены при первом обращении к ним. Возвращает True, если каталог восстановлен
+        """
+        if self.__storage is None:
+            return False
+
+        time_start = time.monotonic()
+        data = self.__storage.load()
+        if not data or not data.get("categories"):
+            return False
 
-            dev_log.info(f"Не удалось получить список категорий")
+        categories: List[Category] = list()
+        category_rows: List[Tuple[int, Iterable[Dict[str, Any]]]] = list()
+        product_dict: Dict[str, Product] = dict()
+        product_hash: Dict[str, str] = dict()
+
+        try:
+            for i_category_data in data["categories"]:
+                rows = data["products"].get(i_category_data.get("categoryId"), None)
+
+                if rows is None:
+                    category = self.__create_category_obj(
+                        i_category_data, loader=self.__load_category_products
+                    )
+                elif self.__columnar:
+                    product_hash.update(
+                        {
+                            i_product_data["productId"]: i_hash
+                            for i_product_data, i_hash in rows
+                        }
+                    )
+                    category = self.__create_category_obj(
+                        i_category_data, products=list()
+                    )
+                    if category:
+                        category_rows.append(
+                            (
+                                category.categoryId,
+                                [i_product_data for i_product_data, _ in rows],
+                            )
+                        )
+                else:
+                    products = [Product(**i_product_data) for i_product_data, _ in rows]
+                    product_hash.update(
+                        {
+                            i_product_data["productId"]: i_hash
+                            for i_product_data, i_hash in rows
+                        }
+                    )
+                    category = self.__create_category_obj(
+                        i_category_data, products=products
+                    )
+
+                if category:
+                    categories.append(category)
+                    product_dict.update(
+                        {
+                            i_product.productsId: i_product
+                            for i_product in category.get_loaded_products() or list()
+                        }
+                    )
 
         except Exception as ex:
-            dev_log.exception(
-                f"При попытке получить список категорий возникла ошибка", exc_info=ex
+            dev_log.exception("Не удалось восстановить каталог из файла", exc_info=ex)
+            return False
+
+        products: Mapping[str, Product] = product_dict
+        if self.__columnar:
+            products = self.__build_columnar_catalog(categories, category_rows)
+
+        self.__client.set_validators(data.get("validators", dict()))
+        self.__publish(categories, products, product_hash, data["categories"], True)
+        dev_log.info(
+            "Каталог товаров восстановлен из файла за {:.3f} с: {} категорий, {} товаров".format(
+                time.monotonic() - time_start, len(categories), len(products)
             )
+        )
+        return True
 
-        return []
+    def __save_catalog(self) -> None:
+        """
+            Метод сохраняет каталог в файл после успешного обновления. Сохраняются товары только загруженных
+        категорий
+        """
+        if self.__storage is None:
+            return
 
-    def update(self) -> None:
-        """Метод служит для получения или обновления списка категорий продаваемых товаров"""
-        new_list_category = self.__api_get_list_category()
-        if len(new_list_category) > 0:
-            with Semaphore():
-                self.categories = new_list_category
-                self.__product_dict = {
-                    i_product.productsId: i_product
-                    for i_category in self.categories
-                    for i_product in i_category.products
-                }
+        snapshot = self.__snapshot
+        if isinstance(snapshot.products, ColumnarCatalog):
+            products = {
+                i_category.categoryId: [
+                    (i_data, snapshot.product_hash.get(i_data["productId"]))
+                    for i_data in snapshot.products.iter_category_data(
+                        i_category.categoryId
+                    )
+                ]
+                for i_category in snapshot.categories
+            }
+        else:
+            products = {
+                i_category.categoryId: [
+                    (
+                        i_product.get_data(),
+                        snapshot.product_hash.get(i_product.productsId),
+                    )
+                    for i_product in i_category.get_loaded_products()
+                ]
+                for i_category in snapshot.categories
+                if i_category.is_loaded()
+            }
+        self.__storage.save(
+            list(snapshot.category_data), products, self.__client.get_validators()
+        )
+
+    @execute_in_new_thread(daemon=True)
+    def __update_in_background(self) -> None:
+        """
+            Метод выполняется в отдельном потоке и служит для обновления каталога после его восстановления из файла.
+        До завершения обновления бот работает с восстановленным каталогом
+        """
+        self.update()
+
+    @execute_in_new_thread(daemon=True)
+    def __load_images(self, list_product: List[Product]) -> None:
+        """
+            Метод выполняется в отдельном потоке и служит для фоновой предварительной загрузки изображений товаров
+        каталога. Обновление каталога не ожидает завершения этого метода
+        """
+        for i_product in list_product:
+            i_product.load_images()
 
     def get_product(self, product_id: str) -> Optional[Product]:
-        """Метод возвращает объект продукт из пула по указанному id"""
-        product = self.__product_dict.get(product_id, None)
+        """
+            Метод возвращает объект продукт из пула по указанному id. Если товара нет в пуле - он запрашивается у
+        внешнего API. При ленивой загрузке категорий после этого загружаются товары категории найденного товара и
+        возвращается объект товара из каталога
+        """
+        product = self.__snapshot.products.get(product_id, None)
         if product is None:
             dev_log.info(
                 f"Товар с id {product_id} не был найден в пуле, выполняется запрос к API"
             )
             product = self.__api_get_product(product_id)
+
+            if product and self.__lazy_categories:
+                product = self.__materialize_product(product)
+
+        return product
+
+    def get_products(self, list_product_id: Iterable[str]) -> Dict[str, Product]:
+        """
+            Метод возвращает словарь id товара - объект товара для всех переданных id. Товары, которых нет в пуле,
+        запрашиваются у внешнего API одновременно в нескольких потоках, каждый id - один раз. Запросы выполняются с
+        крайним сроком текущей обработки. Товары, которые не удалось получить, в словарь не попадают
+        """
+        snapshot_products = self.__snapshot.products
+        products: Dict[str, Product] = dict()
+        missing: List[str] = list()
+
+        for i_product_id in dict.fromkeys(list_product_id):
+            product = snapshot_products.get(i_product_id, None)
+            if product is None:
+                missing.append(i_product_id)
+            else:
+                products[i_product_id] = product
+
+        if not missing:
+            return products
+
+        dev_log.info(
+            f"{len(missing)} товаров не было найдено в пуле, выполняется запрос к API"
+        )
+        if len(missing) == 1:
+            fetched = [self.__api_get_product(missing[0])]
+        else:
+            thread_pool = ThreadPool(min(self.__max_workers, len(missing)))
+            fetched = thread_pool.map(bind_deadline(self.__api_get_product), missing)
+            thread_pool.close()
+            thread_pool.join()
+
+        for i_product_id, i_product in zip(missing, fetched):
+            if i_product and self.__lazy_categories:
+                i_product = self.__materialize_product(i_product)
+            if i_product:
+                products[i_product_id] = i_product
+
+        return products
+
+    def filter_products(
+        self,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        delivery: Optional[bool] = None,
+        category_id: Optional[int] = None,
+    ) -> List[Product]:
+        """
+            Метод возвращает товары каталога, цена которых находится в указанном диапазоне (границы включаются), с
+        указанным наличием доставки и из указанной категории. Не указанные условия не проверяются. Для колоночного
+        каталога фильтрация выполняется над колонками данных
+        """
+        snapshot = self.__snapshot
+        if isinstance(snapshot.products, ColumnarCatalog):
+            return snapshot.products.filter_by_price(
+                min_price, max_price, delivery, category_id
+            )
+
+        if category_id is None:
+            products = snapshot.products.values()
+        else:
+            category = self.__get_category(category_id)
+            products = (category.get_loaded_products() if category else None) or list()
+
+        return [
+            i_product
+            for i_product in products
+            if (min_price is None or i_product.price >= min_price)
+            and (max_price is None or i_product.price <= max_price)
+            and (delivery is None or i_product.delivery == delivery)
+        ]
+
+    def get_products_page(
+        self,
+        category_id: int,
+        order: str = ORDER_ASC,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        delivery_only: bool = False,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+    ) -> ProductPage:
+        """
+            Метод возвращает страницу товаров категории, отсортированных по возрастанию (order = "asc") или убыванию
+        (order = "desc") цены, с ценой в указанном диапазоне и, если delivery_only = True, только с доставкой. Для
+        получения следующей страницы передается курсор next_cursor предыдущей страницы. Товары выбираются из индекса
+        категории по цене за O(log n), курсор остается действительным и после обновления каталога
+        """
+        snapshot = self.__snapshot
+        index = snapshot.price_indexes.get(category_id, None)
+
+        if index is None:
+            category = self.__get_category(category_id)
+            if category is None or not category.products:
+                return ProductPage()
+            snapshot = self.__snapshot
+            index = snapshot.price_indexes.get(category_id, None)
+            if index is None:
+                return ProductPage()
+
+        page = index.query(order, min_price, max_price, delivery_only, cursor, limit)
+        return ProductPage(
+            products=[
+                snapshot.products[i_product_id]
+                for i_product_id in page.products
+                if i_product_id in snapshot.products
+            ],
+            next_cursor=page.next_cursor,
+            total=page.total,
+        )
+
+    def prefetch(
+        self, product: Optional[Product], category_index: int, product_index: int
+    ) -> None:
+        """
+            Метод вызывается при отправке пользователю товара из категории каталога: учитывает открытие товара в
+        статистике предварительной загрузки и ставит в очередь загрузки товары категории, следующие за ним. Индексы
+        категории и товара - текущие значения category_index и product_index пользователя. Товары категории берутся
+        без учета обращения к категории и без их загрузки: если товары ленивой категории еще не загружены,
+        предварительная загрузка не выполняется
+        """
+        if not self.__prefetch_depth:
+            return
+
+        if product is not None:
+            self.__prefetcher.record_view(product)
+
+        categories = self.__snapshot.categories
+        if 0 <= category_index < len(categories):
+            products = categories[category_index].get_loaded_products()
+            if products is not None:
+                self.__prefetcher.prefetch(products, product_index)
+
+    def set_prefetch_uploader(self, uploader: Optional[Callable]) -> None:
+        """
+            Метод устанавливает функцию загрузки изображений товара в телеграмм для предварительной загрузки товаров,
+        например метод бота upload_product_images со служебным чатом
+        """
+        self.__prefetcher.set_uploader(uploader)
+
+    def get_prefetch_statistics(self) -> Dict[str, float]:
+        """Метод возвращает статистику попаданий предварительной загрузки товаров"""
+        return self.__prefetcher.get_statistics()
+
+    def search(self, query: str, limit: int = 10) -> List[Product]:
+        """
+            Метод возвращает найденные по запросу товары каталога в порядке убывания релевантности. Поиск выполняется
+        по названию, описанию и категории товара, слово запроса может совпадать с началом слова в данных товара. При
+        ленивой загрузке категорий поиск выполняется только по товарам загруженных категорий
+        """
+        return self.__search_index.search(query, limit)
+
+    def __materialize_product(self, product: Product) -> Product:
+        """
+            Метод загружает товары ленивой категории, к которой относится указанный товар, и возвращает объект этого
+        товара из каталога. Если товар не найден в категории - возвращается переданный объект
+        """
+        for i_category in self.categories:
+            if i_category.name == product.category:
+                for i_product in i_category.products:
+                    if i_product.productsId == product.productsId:
+                        return i_product
+                break
+
         return product
 
     @execute_in_new_thread(daemon=False)
@@ -0,0 +1,263 @@
+"""
+    Данный модуль содержит реализацию полнотекстового поискового индекса каталога товаров. Индекс - инвертированный:
+для каждого термина хранится перечень товаров, в названии, описании или категории которых он встречается, и вес
+термина для каждого товара. Тексты нормализуются с учетом особенностей русского языка: приведение к нижнему регистру,
+замена ё на е и отсечение окончаний (простой стемминг). Поиск поддерживает совпадение по началу слова и возвращает
+товары в порядке убывания релевантности. Индекс обновляется инкрементально - при обновлении каталога повторно
+индексируются только добавленные и измененные товары, а при загрузке товаров ленивой категории - только товары этой
+категории. Индекс не хранит объекты товаров: товары ранжируются по id и названиям, сохраненным в индексе, и только
+возвращаемые товары получаются из словаря товаров текущего каталога.
+"""
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from threading import RLock
+from typing import Dict, List, Mapping
+
+from ..logger import get_development_logger
+
+dev_log = get_development_logger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[0-9a-zа-я]+")
+
+ENDINGS = sorted(
+    (
+        "иями",
+        "ями",
+        "ами",
+        "ого",
+        "его",
+        "ому",
+        "ему",
+        "ыми",
+        "ими",
+        "ией",
+        "ий",
+        "ый",
+        "ой",
+        "ей",
+        "ая",
+        "яя",
+        "ое",
+        "ее",
+        "ые",
+        "ие",
+        "ых",
+        "их",
+        "ом",
+        "ем",
+        "ам",
+        "ям",
+        "ах",
+        "ях",
+        "ов",
+        "ев",
+        "ую",
+        "юю",
+        "ью",
+        "ия",
+        "а",
+        "я",
+        "о",
+        "е",
+        "ы",
+        "и",
+        "у",
+        "ю",
+        "ь",
+        "й",
+    ),
+    key=len,
+    reverse=True,
+)
+
+MIN_STEM_LENGTH = 3
+
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+
+PREFIX_FACTOR = 0.5
+
+
+def stem(word: str) -> str:
+    """Функция отсекает от слова наиболее длинное окончание, оставляя основу не короче MIN_STEM_LENGTH символов"""
+    for i_ending in ENDINGS:
+        if word.endswith(i_ending) and len(word) - len(i_ending) >= MIN_STEM_LENGTH:
+            return word[: -len(i_ending)]
+    return word
+
+
+def normalize(text: str) -> List[str]:
+    """
+        Функция разбивает текст на слова и возвращает список их основ: текст приводится к нижнему регистру, буква ё
+    заменяется на е, от слов отсекаются окончания
+    """
+    text = text.lower().replace("ё", "е")
+    return [stem(i_word) for i_word in TOKEN_PATTERN.findall(text)]
+
+
+class SearchIndex:
+    """
+        Класс - поисковый индекс товаров каталога. Объект класса принадлежит пулу категорий и обновляется им после
+    каждого изменения каталога
+    """
+
+    def __init__(self):
+        self.__lock = RLock()
+        self.__postings: Dict[str, Dict[str, float]] = dict()
+        self.__terms: List[str] = list()
+        self.__products: Mapping[str, object] = dict()
+        self.__product_hash: Dict[str, str] = dict()
+        self.__product_terms: Dict[str, Dict[str, float]] = dict()
+        self.__product_names: Dict[str, str] = dict()
+
+    def __len__(self) -> int:
+        """Метод возвращает количество проиндексированных товаров"""
+        return len(self.__product_hash)
+
+    @staticmethod
+    def __get_product_terms(product) -> Dict[str, float]:
+        """Метод возвращает термины товара и их веса: вес термина - сумма весов полей, в которых он встречается"""
+        terms: Dict[str, float] = dict()
+        for i_field, i_weight in FIELD_WEIGHTS.items():
+            for i_term in set(normalize(str(getattr(product, i_field, "") or ""))):
+                terms[i_term] = terms.get(i_term, 0) + i_weight
+        return terms
+
+    def __add(self, product, product_hash: str) -> None:
+        """Метод добавляет товар в индекс"""
+        terms = self.__get_product_terms(product)
+        for i_term, i_weight in terms.items():
+            posting = self.__postings.get(i_term, None)
+            if posting is None:
+                posting = dict()
+                self.__postings[i_term] = posting
+                insort(self.__terms, i_term)
+            posting[product.productsId] = i_weight
+
+        self.__product_hash[product.productsId] = product_hash
+        self.__product_terms[product.productsId] = terms
+        self.__product_names[product.productsId] = str(product.name)
+
+    def __remove(self, product_id: str) -> None:
+        """Метод удаляет товар из индекса"""
+        self.__product_hash.pop(product_id, None)
+        self.__product_names.pop(product_id, None)
+        for i_term in self.__product_terms.pop(product_id, dict()):
+            posting = self.__postings.get(i_term, dict())
+            posting.pop(product_id, None)
+            if not posting:
+                self.__postings.pop(i_term, None)
+                self.__terms.pop(bisect_left(self.__terms, i_term))
+
+    def update(
+        self, products: Mapping[str, object], product_hash: Mapping[str, str]
+    ) -> None:
+        """
+            Метод приводит индекс в соответствие с переданными словарем товаров каталога и хэшами данных товаров:
+        удаляет из индекса товары, которых нет в каталоге, и индексирует новые товары и товары, данные которых
+        изменились. Не изменившиеся товары повторно не индексируются
+        """
+        with self.__lock:
+            removed = [
+                i_product_id
+                for i_product_id, i_hash in self.__product_hash.items()
+                if i_product_id not in products
+                or product_hash.get(i_product_id, None) != i_hash
+            ]
+            for i_product_id in removed:
+                self.__remove(i_product_id)
+
+            added = 0
+            for i_product_id, i_hash in product_hash.items():
+                if i_product_id not in self.__product_hash and i_product_id in products:
+                    self.__add(products[i_product_id], i_hash)
+                    added += 1
+
+            self.__products = products
+
+        dev_log.debug(
+            f"Поисковый индекс обновлен: проиндексировано товаров - {added}, удалено из индекса - {len(removed)}"
+        )
+
+    def add_products(
+        self, products: Mapping[str, object], product_hash: Mapping[str, str]
+    ) -> None:
+        """
+            Метод индексирует только товары, хэши данных которых переданы в product_hash, например товары загруженной
+        ленивой категории. Остальные товары индекса не проверяются. products - словарь всех товаров каталога, из
+        которого возвращаются найденные товары
+        """
+        with self.__lock:
+            added = 0
+            for i_product_id, i_hash in product_hash.items():
+                old_hash = self.__product_hash.get(i_product_id, None)
+                if old_hash == i_hash or i_product_id not in products:
+                    continue
+
+                if old_hash is not None:
+                    self.__remove(i_product_id)
+                self.__add(products[i_product_id], i_hash)
+                added += 1
+
+            self.__products = products
+
+        dev_log.debug(f"В поисковый индекс добавлено товаров - {added}")
+
+    def __match(self, token: str) -> Dict[str, float]:
+        """
+            Метод возвращает товары, соответствующие одному слову запроса, и их вес. Полное совпадение основы слова
+        учитывается с полным весом, совпадение по началу слова - с весом, уменьшенным в PREFIX_FACTOR раз
+        """
+        result: Dict[str, float] = dict(self.__postings.get(token, dict()))
+
+        index = bisect_left(self.__terms, token)
+        while index < len(self.__terms) and self.__terms[index].startswith(token):
+            term = self.__terms[index]
+            index += 1
+            if term == token:
+                continue
+
+            for i_product_id, i_weight in self.__postings[term].items():
+                weight = i_weight * PREFIX_FACTOR
+                if weight > result.get(i_product_id, 0):
+                    result[i_product_id] = weight
+
+        return result
+
+    def search(self, query: str, limit: int = 10) -> List:
+        """
+            Метод возвращает список товаров, соответствующих всем словам запроса, в порядке убывания релевантности.
+        Релевантность - сумма весов слов запроса для товара. Товары с одинаковой релевантностью упорядочиваются по
+        названию. Ранжирование выполняется по id товаров, а объекты товаров получаются только для первых limit
+        найденных товаров
+        """
+        tokens = list(dict.fromkeys(normalize(query)))
+        if not tokens:
+            return list()
+
+        with self.__lock:
+            scores: Dict[str, float] = dict()
+            for i_number, i_token in enumerate(tokens):
+                matches = self.__match(i_token)
+                if i_number == 0:
+                    scores = matches
+                else:
+                    scores = {
+                        i_product_id: i_score + matches[i_product_id]
+                        for i_product_id, i_score in scores.items()
+                        if i_product_id in matches
+                    }
+
+                if not scores:
+                    return list()
+
+            ranked = heapq.nsmallest(
+                limit,
+                scores,
+                key=lambda i_product_id: (
+                    -scores[i_product_id],
+                    self.__product_names[i_product_id],
+                ),
+            )
+            return [self.__products[i_product_id] for i_product_id in ranked]
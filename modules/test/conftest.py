@@ -2,13 +2,22 @@ import random
 
 import pytest
 
+from modules.products import CategoryPool
 from modules.test.server.app import create_app
 from modules.test.server.model import db
-from modules.test.server.random_data import UserFaker
+from modules.test.server.random_data import CatalogFaker, UserFaker
 from modules.user.seller import SellerPool
 from modules.user.shopper import ShopperPool
 
 
+def pytest_configure(config):
+    """Функция регистрирует метку benchmark, которой отмечены тесты производительности"""
+    config.addinivalue_line(
+        "markers",
+        "benchmark: тест производительности, выполняется при RUN_BENCHMARKS=1",
+    )
+
+
 @pytest.fixture()
 def shopper_url():
     """Фикстура возвращает url для получения данных пользователей"""
@@ -81,3 +90,16 @@ def seller_pool(shopper_url, order_url, authorization_url):
 @pytest.fixture(scope="module")
 def user_id():
     return random.randint(1000000, 99999999)
+
+
+@pytest.fixture(scope="session")
+def category_pool(app):
+    """
+        Фикстура заполняет каталог тестового сервера случайными данными и возвращает пул категорий. Объект пула
+    категорий является синглтоном, поэтому он создается один раз для всех тестов
+    """
+    CatalogFaker.create()
+    return CategoryPool(
+        url_category="http://127.0.0.1:5000/category",
+        url_product="http://127.0.0.1:5000/product",
+    )
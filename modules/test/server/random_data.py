@@ -1,4 +1,6 @@
-from typing import Optional
+import random
+import uuid
+from typing import Any, Dict, List, Optional
 
 from faker import Faker
 
@@ -23,3 +25,98 @@ class UserFaker:
     @classmethod
     def get_fake_user(cls, tgId: int) -> Optional["UserFaker"]:
         return cls.all_object.get(tgId, None)
+
+
+class CatalogFaker:
+    """Класс - модель каталога товаров со случайными данными, который тестовый сервер отдает по запросам к API"""
+
+    categories: Dict[int, Dict[str, Any]] = dict()
+    products: Dict[int, List[Dict[str, Any]]] = dict()
+    statistics: Dict[int, int] = dict()
+
+    @classmethod
+    def create(cls, count_category: int = 3, count_product: int = 5) -> None:
+        """Метод заполняет каталог случайными категориями и товарами"""
+        cls.categories.clear()
+        cls.products.clear()
+
+        for i_category_id in range(1, count_category + 1):
+            cls.add_category(i_category_id)
+            for _ in range(count_product):
+                cls.add_product(i_category_id)
+
+    @classmethod
+    def add_category(cls, category_id: int) -> Dict[str, Any]:
+        """Метод добавляет в каталог категорию с указанным id"""
+        category = {
+            "categoryId": category_id,
+            "name": fake.word().capitalize(),
+            "variability": False,
+        }
+        cls.categories[category_id] = category
+        cls.products[category_id] = list()
+        return category
+
+    @classmethod
+    def add_product(cls, category_id: int) -> Dict[str, Any]:
+        """Метод добавляет в указанную категорию каталога товар со случайными данными"""
+        product = {
+            "productId": str(uuid.uuid4()),
+            "name": fake.word().capitalize(),
+            "description": fake.sentence(),
+            "price": random.randint(100, 10000),
+            "image": [],
+            "delivery": random.choice([True, False]),
+            "category": cls.categories[category_id]["name"],
+        }
+        cls.products[category_id].append(product)
+        return product
+
+    @classmethod
+    def get_product(cls, product_id: str) -> Optional[Dict[str, Any]]:
+        """Метод возвращает данные товара по его id"""
+        for i_products in cls.products.values():
+            for i_product in i_products:
+                if i_product["productId"] == product_id:
+                    return i_product
+
+
+class OrderFaker:
+    """
+        Класс - модель заказов покупателя, которые тестовый сервер отдает по запросам к API: корзина и действующие
+    заказы со статусами active_statuses и history_size завершенных и отмененных заказов. Покупатель с id unknown_user
+    серверу не известен
+    """
+
+    active_statuses: List[int] = [0, 1, 3]
+    history_size: int = 25
+    unknown_user: int = 999
+    statistics: Dict[str, int] = dict()
+
+    @classmethod
+    def get_orders(
+        cls, tg_id: int, request_name: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+            Метод возвращает данные всех заказов покупателя и учитывает запрос в статистике запросов. Для
+        неизвестного серверу покупателя возвращается None
+        """
+        cls.statistics[request_name] = cls.statistics.get(request_name, 0) + 1
+        if tg_id == cls.unknown_user:
+            return None
+
+        statuses = cls.active_statuses + [
+            7 + i_number % 3 for i_number in range(cls.history_size)
+        ]
+        return [
+            {
+                "tgId": tg_id,
+                "idOrder": tg_id * 1000 + i_number,
+                "status": i_status,
+                "datetimeCreation": "01.01.2024 12:00",
+                "totalCost": 0,
+                "delivery": False,
+                "products": [],
+            }
+            for i_number, i_status in enumerate(statuses)
+        ]
@@ -1,9 +1,11 @@
+import os
 import random
 from typing import Any, Dict, Optional
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, send_file
 
 from .model import User, db
+from .random_data import CatalogFaker, OrderFaker
 
 valid_user_key = [
     "tgId",
@@ -72,9 +74,99 @@ def create_routs(app: Flask) -> None:
 
     @app.route("/order/<int:user_id>", methods=["GET"])
     def get_order(user_id: int):
-        data = {"idOrder": random.randint(100, 10000)}
+        data = OrderFaker.get_orders(user_id, "all")
+        if data is None:
+            return jsonify({"error": "user not found"}), 404
         return jsonify(data), 200
 
+    @app.route("/order/<int:user_id>/active", methods=["GET"])
+    def get_active_orders(user_id: int):
+        data = OrderFaker.get_orders(user_id, "active")
+        if data is None:
+            return jsonify({"error": "user not found"}), 404
+        return (
+            jsonify(
+                [i_order for i_order in data if i_order["status"] not in (7, 8, 9)]
+            ),
+            200,
+        )
+
+    @app.route("/order/<int:user_id>/history/<int:start>/<int:stop>", methods=["GET"])
+    def get_order_history(user_id: int, start: int, stop: int):
+        data = [
+            i_order
+            for i_order in OrderFaker.get_orders(user_id, "history")
+            if i_order["status"] in (7, 8, 9)
+        ]
+        return jsonify(data[start - 1 : stop]), 200
+
+    @app.route("/legacy/order/<int:user_id>", methods=["GET"])
+    def get_order_legacy(user_id: int):
+        return jsonify(OrderFaker.get_orders(user_id, "legacy")), 200
+
     @app.route("/order", methods=["POST"])
     def post_order():
+        return jsonify({"idOrder": random.randint(100, 10000)}), 200
+
+    @app.route("/order", methods=["PUT"])
+    def put_order():
         return "OK", 200
+
+    bulk_keys: Dict[str, int] = dict()
+
+    @app.route("/order/bulk", methods=["POST"])
+    def post_orders_bulk():
+        data = list()
+        for i_order in request.get_json():
+            if i_order.get("userComment") == "error":
+                data.append({"error": "Некорректный заказ"})
+                continue
+
+            key = i_order.get("idempotencyKey")
+            if key is not None and key not in bulk_keys:
+                bulk_keys[key] = random.randint(100, 10000)
+            data.append(
+                {
+                    "idOrder": i_order.get("idOrder")
+                    or bulk_keys.get(key)
+                    or random.randint(100, 10000)
+                }
+            )
+        return jsonify(data), 200
+
+    @app.route("/image/<string:name>", methods=["GET"])
+    def get_image(name: str):
+        path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "products",
+            "static",
+            "placeholder.png",
+        )
+        return send_file(path, mimetype="image/png")
+
+    def catalog_response(data: Any):
+        """Функция возвращает ответ с данными каталога, поддерживающий условные запросы (ETag)"""
+        response = jsonify(data)
+        response.add_etag()
+        response = response.make_conditional(request)
+        CatalogFaker.statistics[response.status_code] = (
+            CatalogFaker.statistics.get(response.status_code, 0) + 1
+        )
+        return response
+
+    @app.route("/category", methods=["GET"])
+    def get_categories():
+        return catalog_response(list(CatalogFaker.categories.values()))
+
+    @app.route("/category/<int:category_id>", methods=["GET"])
+    def get_category_products(category_id: int):
+        if category_id not in CatalogFaker.products:
+            return "Not Found", 404
+        return catalog_response(CatalogFaker.products[category_id])
+
+    @app.route("/product/<string:product_id>", methods=["GET"])
+    def get_product(product_id: str):
+        product = CatalogFaker.get_product(product_id)
+        if product is None:
+            return "Not Found", 404
+        return catalog_response(product)
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules.utils import (
+    CATALOG,
+    USERS,
+    Backend,
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    bind_deadline,
+    get_deadline,
+    wait_for,
+)
+
+
+def test_circuit_breaker_error_rate():
+    """
+    Тест размыкания выключателя по доле ошибок и по времени выполнения запросов:
+        - чередуем успешные и неудачные запросы и проверяем, что выключатель размыкается, когда доля ошибок среди
+            последних запросов достигает допустимой, хотя ошибок подряд было меньше порога;
+        - проверяем, что слишком долгие успешные запросы учитываются как ошибки
+    """
+    breaker = CircuitBreaker(
+        "test", failure_threshold=10, error_rate=0.5, window=4, min_calls=4
+    )
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.get_statistics()["error_rate"] == 0.5
+
+    breaker = CircuitBreaker("test", failure_threshold=2, slow_call_time=0.5)
+    breaker.record_success(0.1)
+    breaker.record_success(1)
+    assert breaker.state == "closed"
+    breaker.record_success(1)
+    assert breaker.state == "open"
+
+
+def test_backend(app, shopper_url):
+    """
+    Тест клиента внешнего API:
+        - выполняем запросы к действующему серверу и проверяем, что выключатели всех групп замкнуты;
+        - выполняем запросы к недоступному серверу и проверяем, что выключатель группы пользователей разомкнут, а
+            выключатели других групп - нет;
+        - проверяем, что пока выключатель разомкнут, запросы сразу завершаются исключением CircuitOpenError;
+        - по истечении времени ожидания проверяем, что успешный пробный запрос замыкает выключатель
+    """
+    backend = Backend.__wrapped__(
+        failure_threshold=2, reset_timeout=0.2, error_rate=None
+    )
+    assert backend.get(USERS, shopper_url + "/1").status_code in (200, 404)
+    assert backend.get(CATALOG, "http://127.0.0.1:5000/").status_code == 200
+    assert set(backend.get_states().values()) == {"closed"}
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            backend.get(USERS, "http://127.0.0.1:1/user/1")
+    assert backend.get_states()[USERS] == "open"
+    assert backend.is_available(CATALOG)
+
+    time_start = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        backend.get(USERS, shopper_url + "/1")
+    assert time.monotonic() - time_start < 0.05
+
+    time.sleep(0.25)
+    backend.get(USERS, shopper_url + "/1")
+    assert backend.get_states()[USERS] == "closed"
+
+
+def test_deadline(app, shopper_url, monkeypatch):
+    """
+    Тест крайнего срока обработки:
+        - выполняем запрос к серверу в рамках крайнего срока и проверяем, что время запроса записано в шаги обработки;
+        - проверяем, что ожидание данных прерывается по наступлении крайнего срока, а не по своему таймауту;
+        - проверяем, что после наступления крайнего срока запросы не выполняются, а выключатель не считает это
+            ошибкой сервера;
+        - проверяем, что крайний срок передается в функцию, выполняемую в другом потоке, только через bind_deadline;
+        - проверяем, что запрос не выполняется с нулевым временем ожидания, если крайний срок наступил после проверки
+    """
+    backend = Backend.__wrapped__(failure_threshold=1)
+    url = shopper_url + "/1"
+
+    with Deadline(0.3, "теста") as deadline:
+        backend.get(USERS, url)
+        assert get_deadline() is deadline
+        assert [i_step for i_step, _ in deadline.get_steps()] == [f"GET {url}"]
+
+        time_start = time.monotonic()
+        assert wait_for(lambda: None, 5, "ожидание") is None
+        assert time.monotonic() - time_start < 1
+        assert deadline.is_expired()
+
+        with pytest.raises(DeadlineExceeded):
+            backend.get(USERS, url)
+
+        with ThreadPoolExecutor(1) as executor:
+            assert executor.submit(get_deadline).result() is None
+            assert executor.submit(bind_deadline(get_deadline)).result() is deadline
+
+    with Deadline(0, "теста") as deadline:
+        monkeypatch.setattr(deadline, "is_expired", lambda: False)
+        with pytest.raises(DeadlineExceeded):
+            backend.get(USERS, url)
+
+    assert get_deadline() is None
+    assert backend.get_states()[USERS] == "closed"
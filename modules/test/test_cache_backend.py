@@ -0,0 +1,97 @@
+import os
+from datetime import datetime, timedelta
+
+import pytz
+
+from modules.products.products import CatalogClient
+from modules.test.server.random_data import CatalogFaker
+from modules.utils import (
+    MemoryCacheBackend,
+    ProjectCache,
+    SharedCacheBackend,
+    create_cache_backend,
+)
+from modules.utils.cache_backend import CacheData
+
+moscow_tz = pytz.timezone("Europe/Moscow")
+
+
+def test_memory_backend():
+    """
+    Тест хранилища кэша в оперативной памяти:
+        - сохраняем значение и получаем его по ключу;
+        - удаляем устаревшие данные и проверяем, что хранилище пустое
+    """
+    backend = create_cache_backend("memory")
+    assert isinstance(backend, MemoryCacheBackend)
+
+    backend.set("key", CacheData(b"value", datetime.now(moscow_tz)))
+    assert backend.get("key").result == b"value"
+    assert backend.size() == 1
+
+    assert (
+        backend.delete_older_than(datetime.now(moscow_tz) + timedelta(seconds=1)) == 1
+    )
+    assert backend.get("key") is None
+
+
+def test_shared_backend(tmp_path):
+    """
+    Тест общего хранилища кэша:
+        - создаем два объекта хранилища в одном каталоге (имитация двух процессов бота);
+        - сохраняем небольшое и большое значения через первое хранилище;
+        - проверяем, что большое значение записано в отдельный файл;
+        - проверяем, что второе хранилище получает оба значения;
+        - удаляем устаревшие данные и проверяем, что файл большого значения удален
+    """
+    path = str(tmp_path)
+    first = SharedCacheBackend(path=path, mmap_threshold=1024)
+    second = SharedCacheBackend(path=path, mmap_threshold=1024)
+
+    small = {"productId": "1", "name": "Товар"}
+    large = os.urandom(4096)
+    first.set("small", CacheData(small, datetime.now(moscow_tz)))
+    first.set("large", CacheData(large, datetime.now(moscow_tz)))
+
+    assert len(os.listdir(os.path.join(path, "values"))) == 1
+
+    assert second.get("small").result == small
+    assert second.get("large").result == large
+    assert second.get("unknown") is None
+    assert second.size() == 2
+
+    assert second.delete_older_than(datetime.now(moscow_tz) + timedelta(seconds=1)) == 2
+    assert first.get("large") is None
+    assert len(os.listdir(os.path.join(path, "values"))) == 0
+
+
+def test_shared_catalog_payloads(app, tmp_path, category):
+    """
+    Тест общего кэша данных каталога:
+        - создаем два клиента каталога с общим хранилищем кэша (имитация двух процессов бота);
+        - первый клиент получает список категорий от сервера;
+        - второй клиент выполняет условный запрос с валидаторами из общего кэша и получает те же данные без их
+        повторной передачи сервером;
+        - повторный условный запрос второго клиента возвращает статус 304;
+        - безусловный запрос третьего клиента не использует валидаторы общего кэша и получает данные от сервера
+    """
+    cache = ProjectCache.__wrapped__(SharedCacheBackend(path=str(tmp_path)))
+    first = CatalogClient(cache)
+    second = CatalogClient(cache)
+    CatalogFaker.statistics.clear()
+
+    status, data = first.get_json(category, "список категорий")
+    assert status == 200
+
+    assert second.get_json(category, "список категорий") == (200, data)
+    assert CatalogFaker.statistics == {200: 1, 304: 1}
+
+    assert second.get_json(category, "список категорий") == (304, None)
+
+    CatalogFaker.statistics.clear()
+    third = CatalogClient(cache)
+    assert third.get_json(category, "список категорий", conditional=False) == (
+        200,
+        data,
+    )
+    assert CatalogFaker.statistics == {200: 1}
@@ -0,0 +1,339 @@
+import os
+
+import pytest
+
+from modules.products import CategoryPool, ColumnarCatalog
+from modules.test.server.random_data import CatalogFaker
+
+
+def test_incremental_update(category_pool):
+    """
+    Тест инкрементального обновления каталога:
+        - проверяем, что каталог загружен;
+        - обновляем каталог без изменений на сервере и проверяем, что все объекты товаров и категорий переиспользованы;
+        - изменяем цену одного товара, добавляем один товар и удаляем один товар;
+        - обновляем каталог и проверяем отчет об обновлении;
+        - проверяем, что объекты не изменившихся товаров переиспользованы, а измененный товар создан заново
+    """
+    assert len(category_pool.categories) == 3
+    old_categories = list(category_pool.categories)
+    unchanged_product = category_pool.categories[0].products[0]
+    changed_product = category_pool.categories[0].products[1]
+    removed_product_id = CatalogFaker.products[3][-1]["productId"]
+
+    report = category_pool.update()
+    assert (report.added, report.changed, report.removed) == (0, 0, 0)
+    assert report.unchanged == 15
+    assert all(
+        i_old is i_new for i_old, i_new in zip(old_categories, category_pool.categories)
+    )
+
+    CatalogFaker.products[1][1]["price"] += 1
+    added_product_id = CatalogFaker.add_product(2)["productId"]
+    CatalogFaker.products[3].pop()
+
+    report = category_pool.update()
+    assert (report.added, report.changed, report.removed) == (1, 1, 1)
+    assert report.unchanged == 13
+    assert report.categories_changed == 3
+
+    assert category_pool.get_product(unchanged_product.productsId) is unchanged_product
+    new_product = category_pool.get_product(changed_product.productsId)
+    assert new_product is not changed_product
+    assert new_product.price == changed_product.price + 1
+    assert category_pool.get_product(added_product_id).productsId == added_product_id
+    assert removed_product_id not in [
+        i_product.productsId for i_product in category_pool.categories[2].products
+    ]
+
+
+def test_conditional_update(category_pool):
+    """
+    Тест условных запросов к API каталога:
+        - обновляем каталог без изменений на сервере;
+        - проверяем, что на все запросы сервер ответил кодом 304 и данные каталога не передавались;
+        - изменяем товар одной категории и обновляем каталог;
+        - проверяем, что полные данные переданы только для списка товаров измененной категории
+    """
+    CatalogFaker.statistics.clear()
+    report = category_pool.update()
+    assert report.not_modified == 4
+    assert CatalogFaker.statistics == {304: 4}
+    assert (report.added, report.changed, report.removed) == (0, 0, 0)
+
+    CatalogFaker.statistics.clear()
+    CatalogFaker.products[2][0]["name"] = "Новое название"
+    report = category_pool.update()
+    assert report.not_modified == 3
+    assert CatalogFaker.statistics == {200: 1, 304: 3}
+    assert report.changed == 1
+    assert category_pool.categories[1].products[0].name == "Новое название"
+
+
+def test_lazy_categories(category_pool):
+    """
+    Тест ленивой загрузки товаров категорий:
+        - создаем отдельный (не синглтон) пул категорий с ленивой загрузкой;
+        - проверяем, что при создании пула запрошен только список категорий;
+        - обращаемся к товарам первой категории и проверяем, что загружена только она;
+        - запрашиваем товар второй категории через get_product и проверяем, что загружена и вторая категория;
+        - обновляем каталог и проверяем, что загруженные категории, к которым обращались, остались загруженными;
+        - обновляем каталог еще раз без обращений и проверяем, что товары категорий выгружены
+    """
+    CatalogFaker.statistics.clear()
+    lazy_pool = CategoryPool.__wrapped__(
+        url_category="http://127.0.0.1:5000/category",
+        url_product="http://127.0.0.1:5000/product",
+        lazy_categories=True,
+    )
+    assert CatalogFaker.statistics == {200: 1}
+    assert not any(i_category.is_loaded() for i_category in lazy_pool.categories)
+
+    first, second, third = lazy_pool.categories
+    assert len(first.products) == len(CatalogFaker.products[1])
+    assert [first.is_loaded(), second.is_loaded(), third.is_loaded()] == [
+        True,
+        False,
+        False,
+    ]
+
+    product_id = CatalogFaker.products[2][0]["productId"]
+    product = lazy_pool.get_product(product_id)
+    assert second.is_loaded() and not third.is_loaded()
+    assert product is second.products[0]
+    assert lazy_pool.get_product(product_id) is product
+
+    report = lazy_pool.update()
+    assert report.removed == 0
+    assert [i_category.is_loaded() for i_category in lazy_pool.categories] == [
+        True,
+        True,
+        False,
+    ]
+
+    lazy_pool.update()
+    assert not any(i_category.is_loaded() for i_category in lazy_pool.categories)
+
+
+def test_prefetch_lazy_category(category_pool):
+    """
+    Тест предварительной загрузки товаров ленивой категории:
+        - создаем пул категорий с ленивой загрузкой и предварительной загрузкой товаров;
+        - запускаем предварительную загрузку для не загруженной категории и проверяем, что её товары не загружены, а
+        обращение к категории не учтено;
+        - обращаемся к товарам категории и снова запускаем предварительную загрузку;
+        - проверяем, что учтено только обращение к товарам категории
+    """
+    lazy_pool = CategoryPool.__wrapped__(
+        url_category="http://127.0.0.1:5000/category",
+        url_product="http://127.0.0.1:5000/product",
+        lazy_categories=True,
+        prefetch_depth=2,
+    )
+    first = lazy_pool.categories[0]
+
+    lazy_pool.prefetch(None, 0, 0)
+    assert not first.is_loaded()
+    assert first.access_count == 0
+
+    products = first.products
+    lazy_pool.prefetch(products[0], 0, 0)
+    assert first.access_count == 1
+
+
+def test_catalog_snapshot(category_pool, tmp_path):
+    """
+    Тест восстановления каталога из файла:
+        - создаем отдельный пул категорий с файлом каталога и проверяем, что файл создан после загрузки каталога;
+        - создаем пул с недоступным API и проверяем, что каталог восстановлен из файла;
+        - создаем пул с доступным API и проверяем, что фоновое обновление каталога получило от сервера только
+        ответы 304
+    """
+    path = str(tmp_path / "catalog.json.gz")
+    pool = CategoryPool.__wrapped__(
+        url_category="http://127.0.0.1:5000/category",
+        url_product="http://127.0.0.1:5000/product",
+        snapshot_path=path,
+    )
+    assert os.path.exists(path)
+
+    offline_pool = CategoryPool.__wrapped__(
+        url_category="http://127.0.0.1:5000/no_valid",
+        url_product="http://127.0.0.1:5000/no_valid",
+        snapshot_path=path,
+    )
+    assert [i_category.name for i_category in offline_pool.categories] == [
+        i_category.name for i_category in pool.categories
+    ]
+    product = pool.categories[0].products[0]
+    restored_product = offline_pool.get_product(product.productsId)
+    assert restored_product is not product
+    assert (restored_product.name, restored_product.price) == (
+        product.name,
+        product.price,
+    )
+
+    CatalogFaker.statistics.clear()
+    restored_pool = CategoryPool.__wrapped__(
+        url_category="http://127.0.0.1:5000/category",
+        url_product="http://127.0.0.1:5000/product",
+        snapshot_path=path,
+    )
+    report = restored_pool.update()
+    assert (report.added, report.changed, report.removed) == (0, 0, 0)
+    assert set(CatalogFaker.statistics) == {304}
+
+
+def test_catalog_version(category_pool):
+    """
+    Тест версий снимков каталога:
+        - обновляем каталог без изменений на сервере и проверяем, что версия каталога не изменилась;
+        - изменяем цену товара, обновляем каталог и проверяем, что версия увеличилась;
+        - проверяем, что ранее полученный снимок каталога не изменился и не может быть изменен
+    """
+    snapshot = category_pool.snapshot
+    category_pool.update()
+    assert category_pool.version == snapshot.version
+
+    product_data = CatalogFaker.products[1][0]
+    product_data["price"] += 1
+    category_pool.update()
+    assert category_pool.version == snapshot.version + 1
+    assert category_pool.get_product(product_data["productId"]).price == (
+        snapshot.products[product_data["productId"]].price + 1
+    )
+
+    with pytest.raises(TypeError):
+        snapshot.products[product_data["productId"]] = None
+    with pytest.raises(AttributeError):
+        snapshot.version = 0
+
+
+def test_columnar_catalog(category_pool, tmp_path):
+    """
+    Тест колоночного каталога:
+        - создаем отдельный пул категорий с колоночным каталогом и проверяем, что предварительная загрузка
+        изображений для него отключена;
+        - проверяем, что товары категорий и товары, полученные по id, соответствуют данным сервера;
+        - проверяем, что пока на объект товара есть ссылка, повторное обращение возвращает тот же объект;
+        - проверяем фильтрацию товаров по цене, наличию доставки и категории;
+        - обновляем каталог без изменений и проверяем, что все товары остались неизменными;
+        - изменяем цену товара на сервере и обновляем каталог;
+        - проверяем, что категории и товары опубликованного ранее снимка не изменились, а новый снимок и его индекс
+        по цене содержат новую цену;
+        - создаем пул категорий с колоночным каталогом из сохраненного файла каталога и проверяем его товары
+    """
+    pool = CategoryPool.__wrapped__(
+        url_category="http://127.0.0.1:5000/category",
+        url_product="http://127.0.0.1:5000/product",
+        columnar=True,
+        prefetch_images=True,
+    )
+    assert isinstance(pool.snapshot.products, ColumnarCatalog)
+    assert not pool._CategoryPool__prefetch_images
+
+    for i_category in pool.categories:
+        assert [i_product.productsId for i_product in i_category.products] == [
+            i_data["productId"]
+            for i_data in CatalogFaker.products[i_category.categoryId]
+        ]
+
+    product_data = CatalogFaker.products[1][0]
+    product = pool.get_product(product_data["productId"])
+    assert (product.name, product.price, product.category) == (
+        product_data["name"],
+        product_data["price"],
+        product_data["category"],
+    )
+    assert pool.get_product(product_data["productId"]) is product
+    assert pool.categories[0].products[0] is product
+
+    all_data = [
+        i_data for i_list in CatalogFaker.products.values() for i_data in i_list
+    ]
+    expected = {
+        i_data["productId"]
+        for i_data in all_data
+        if 1000 <= i_data["price"] <= 5000 and i_data["delivery"]
+    }
+    assert {
+        i_product.productsId
+        for i_product in pool.filter_products(1000, 5000, delivery=True)
+    } == expected
+    assert [
+        i_product.productsId for i_product in pool.filter_products(category_id=2)
+    ] == [i_data["productId"] for i_data in CatalogFaker.products[2]]
+
+    report = pool.update()
+    assert (report.added, report.changed, report.removed) == (0, 0, 0)
+    assert report.unchanged == len(all_data)
+    assert report.categories_changed == 0
+
+    old_snapshot = pool.snapshot
+    old_view = old_snapshot.categories[0].products
+    old_price = product_data["price"]
+    product_data["price"] += 1
+    try:
+        report = pool.update()
+        assert (report.added, report.changed, report.removed) == (0, 1, 0)
+        assert report.categories_changed == 1
+
+        assert old_snapshot.categories[0].products is old_view
+        assert old_view[0].price == old_price
+        assert product.price == old_price
+        assert pool.categories[0].products[0].price == old_price + 1
+        assert pool.get_products_page(1, order="desc", limit=len(all_data)).total == (
+            len(CatalogFaker.products[1])
+        )
+        assert (
+            pool.get_products_page(1, min_price=old_price + 1, max_price=old_price + 1)
+            .products[0]
+            .productsId
+            == product_data["productId"]
+        )
+
+    finally:
+        product_data["price"] = old_price
+
+    path = str(tmp_path / "catalog.json.gz")
+    CategoryPool.__wrapped__(
+        url_category="http://127.0.0.1:5000/category",
+        url_product="http://127.0.0.1:5000/product",
+        columnar=True,
+        snapshot_path=path,
+    )
+    restored_pool = CategoryPool.__wrapped__(
+        url_category="http://127.0.0.1:5000/no_valid",
+        url_product="http://127.0.0.1:5000/no_valid",
+        columnar=True,
+        snapshot_path=path,
+    )
+    assert isinstance(restored_pool.snapshot.products, ColumnarCatalog)
+    assert len(restored_pool.snapshot.products) == len(all_data)
+    assert restored_pool.get_product(product_data["productId"]).price == old_price
+
+
+def test_external_product(category_pool):
+    """
+    Тест получения товара, которого нет в пуле:
+        - добавляем товар на сервер без обновления каталога;
+        - запрашиваем товар дважды и проверяем, что повторный запрос выполнен условно и возвращен тот же объект;
+        - изменяем цену товара на сервере и проверяем, что получен новый объект товара с новой ценой;
+        - удаляем товар с сервера
+    """
+    product_data = CatalogFaker.add_product(1)
+    product_id = product_data["productId"]
+    try:
+        CatalogFaker.statistics.clear()
+        product = category_pool.get_product(product_id)
+        assert product.productsId == product_id
+        assert category_pool.get_product(product_id) is product
+        assert CatalogFaker.statistics == {200: 1, 304: 1}
+
+        product_data["price"] += 1
+        new_product = category_pool.get_product(product_id)
+        assert new_product is not product
+        assert new_product.price == product.price + 1
+
+    finally:
+        CatalogFaker.products[1].remove(product_data)
@@ -0,0 +1,371 @@
+import os
+import subprocess
+import sys
+import uuid
+from typing import List, Tuple
+
+import requests
+
+from modules.orders import (
+    Basket,
+    Order,
+    OrderSchema,
+    OrderSynchronizer,
+    ShopperOrdersPool,
+    ShopperOrdersStorage,
+    hydrate_orders,
+)
+from modules.orders import order_sync as order_sync_module
+from modules.products import Product, ProductPlaceholder
+from modules.test.server.random_data import OrderFaker
+
+
+def get_order_data(products_id, status: int = 1):
+    """Функция возвращает данные заказа с указанными товарами в том виде, в котором их передает внешний API"""
+    return {
+        "tgId": 1,
+        "idOrder": 1,
+        "status": status,
+        "datetimeCreation": "01.01.2024 12:00",
+        "totalCost": 0,
+        "delivery": False,
+        "products": [
+            {"productsId": i_product_id, "count": 2} for i_product_id in products_id
+        ],
+        "order_url": "http://127.0.0.1:5000/order",
+        "registered_on_server": True,
+        "resolve_products": False,
+    }
+
+
+def test_hydrate_orders(category_pool):
+    """
+    Тест пакетного получения товаров заказов:
+        - загружаем заказы без получения товаров и проверяем, что у заказов нет товаров и они не считаются измененными;
+        - передаем заказам товары одним пакетным запросом;
+        - проверяем, что заказы получили объекты товаров каталога в порядке товаров заказа, а одинаковые товары разных
+            заказов - это один и тот же объект;
+        - проверяем, что вместо отсутствующего товара в заказ добавлена заглушка с тем же id и количеством;
+        - проверяем, что после получения товаров заказы не считаются измененными
+    """
+    products_id = list(category_pool.snapshot.products)[:3]
+    missing_id = str(uuid.uuid4())
+    orders = OrderSchema().load(
+        [
+            get_order_data(products_id[:2]),
+            get_order_data([products_id[1], products_id[2], missing_id], status=0),
+        ],
+        many=True,
+    )
+
+    assert all(i_order.products == list() for i_order in orders)
+    assert not any(i_order.is_updated() for i_order in orders)
+
+    hydrate_orders(orders)
+
+    assert [i_product.productsId for i_product in orders[0].products] == products_id[:2]
+    assert orders[0].products[1] is orders[1].products[0]
+    assert orders[1].products[0] is category_pool.get_product(products_id[1])
+
+    placeholder = orders[1].products[2]
+    assert isinstance(placeholder, ProductPlaceholder)
+    assert placeholder.productsId == missing_id
+    assert orders[1].get_product_count(missing_id) == 2
+    assert missing_id in str(orders[1].products_data)
+
+    assert not any(i_order.is_updated() for i_order in orders)
+
+
+def test_order_hash_sum():
+    """
+    Тест хэш суммы заказа: хэш сумма одного и того же заказа, вычисленная в процессах с разной солью хэширования
+    строк, одинакова, поэтому её можно сравнивать после перезапуска бота
+    """
+    code = (
+        "from modules.orders import Order; "
+        "print(Order(tgId=1, idOrder=2, datetimeCreation='01.01.2024 12:00', "
+        "products_data=[{'productsId': '1', 'count': 2}], resolve_products=False)._get_hash_sum())"
+    )
+    hash_sums = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONHASHSEED": i_seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        for i_seed in ["1", "2"]
+    }
+    assert len(hash_sums) == 1 and hash_sums != {""}
+
+
+def test_basket_items():
+    """
+    Тест позиций корзины:
+        - добавляем товары в корзину, в том числе повторно, и проверяем количество товаров и стоимость корзины;
+        - изменяем количество товара и проверяем стоимость корзины;
+        - удаляем товары по порядковому номеру и по id и проверяем, что товары, их количество и данные о товарах для
+            сервера изменились согласованно;
+        - очищаем корзину
+    """
+    basket = Basket(tgId=1, order_url="http://127.0.0.1:5000/order")
+    products = [
+        Product(str(i_number), f"Товар {i_number}", 100 * i_number, "", [], True, "")
+        for i_number in range(1, 4)
+    ]
+
+    for i_product in products:
+        basket.add_product(i_product, 1)
+    basket.add_product(products[0], 2)
+
+    assert basket.products == products
+    assert basket.get_product_count(products[0]) == 3
+    assert basket.totalCost == 3 * 100 + 200 + 300
+
+    basket.set_product_count("2", 5)
+    assert basket.totalCost == 3 * 100 + 5 * 200 + 300
+
+    basket.delete(0)
+    basket.remove_product(products[2])
+    assert basket.products == [products[1]]
+    assert basket.get_product_count("1") is None
+    assert basket.products_data == [{"productsId": "2", "count": 5}]
+    assert basket.totalCost == 5 * 200
+    assert '"products": [{"productsId": "2", "count": 5}]' in OrderSchema().dumps(
+        basket
+    )
+
+    basket.clear()
+    assert basket.products == list()
+    assert basket.products_data == list()
+    assert basket.totalCost == 0
+
+
+def test_order_render_cache():
+    """
+    Тест кэширования текста заказов на примере экрана продавца с 30 заказами по 10 товаров:
+        - формируем текст и заголовки всех заказов;
+        - повторно формируем текст и заголовки и проверяем, что возвращены те же объекты строк из кэша;
+        - изменяем статус заказа и количество товара в другом заказе и проверяем, что их текст сформирован заново,
+        а текст остальных заказов по-прежнему берется из кэша
+    """
+    products = [
+        Product(str(i_number), f"Товар {i_number}", i_number, "", [], True, "Категория")
+        for i_number in range(10)
+    ]
+    orders = list()
+    for i_number in range(30):
+        order = OrderSchema().load(
+            get_order_data([i_product.productsId for i_product in products])
+        )
+        order.idOrder = i_number
+        order.set_products({i_product.productsId: i_product for i_product in products})
+        orders.append(order)
+
+    def render_dashboard() -> List[Tuple[str, str]]:
+        return [(str(i_order), i_order.get_title()) for i_order in orders]
+
+    first = render_dashboard()
+    second = render_dashboard()
+    assert all(
+        i_first[0] is i_second[0] and i_first[1] is i_second[1]
+        for i_first, i_second in zip(first, second)
+    )
+
+    orders[0].status = 3
+    assert str(orders[0]) != first[0][0]
+    assert "оплачен" in orders[0].get_title()
+
+    orders[1].set_product_count("1", 7)
+    assert "Товар 1 - 7 шт." in str(orders[1])
+    assert str(orders[2]) is first[2][0]
+
+
+def test_order_synchronizer(app, order_url, url_no_valid, monkeypatch):
+    """
+    Тест пакетного сохранения заказов на сервере:
+        - создаем пять новых заказов, один из которых нельзя сохранить (недействительный url);
+        - сохраняем заказы пакетами по два заказа и проверяем результаты пакетов: заказ, который сервер отказался
+            сохранить, повторно не передается;
+        - проверяем, что сохраненные заказы получили id и не требуют сохранения, а несохраненный заказ требует;
+        - сохраняем заказы методом пакетного сохранения внешнего API и проверяем, что заказ, отклоненный сервером,
+            повторно не передается;
+        - имитируем потерю ответа на пакетный запрос, обработанный сервером, и проверяем, что повторная передача
+            пакета с ключами идемпотентности не создает новые заказы на сервере
+    """
+    orders = [Order(tgId=1, status=1, order_url=order_url) for _ in range(5)]
+    orders[2]._order_url = url_no_valid
+
+    synchronizer = OrderSynchronizer(batch_size=2, retries=1, retry_delay=0)
+    results = synchronizer.sync(orders)
+
+    assert [(i_result.attempt, i_result.total) for i_result in results] == [
+        (0, 2),
+        (0, 2),
+        (0, 1),
+    ]
+    assert sum(i_result.saved for i_result in results) == 4
+    assert results[1].failed == [orders[2]]
+    assert all(i_order.idOrder for i_order in orders if i_order is not orders[2])
+    assert [i_order.need_saving() for i_order in orders] == [
+        False,
+        False,
+        True,
+        False,
+        False,
+    ]
+    assert synchronizer.sync(orders[:2]) == list()
+
+    orders = [Order(tgId=1, status=1, order_url=order_url) for _ in range(3)]
+    orders[1].userComment = "error"
+    synchronizer = OrderSynchronizer(
+        batch_size=5, retries=1, retry_delay=0, bulk_url=order_url + "/bulk"
+    )
+    results = synchronizer.sync(orders)
+
+    assert [(i_result.saved, i_result.failed) for i_result in results] == [
+        (2, [orders[1]]),
+    ]
+    assert not orders[0].need_saving() and orders[0].idOrder
+
+    post, responses = order_sync_module.backend.post, list()
+
+    def post_and_lose_response(*args, **kwargs):
+        response = post(*args, **kwargs)
+        responses.append(response.json())
+        if len(responses) == 1:
+            raise requests.Timeout()
+        return response
+
+    monkeypatch.setattr(order_sync_module.backend, "post", post_and_lose_response)
+    orders = [Order(tgId=1, status=1, order_url=order_url) for _ in range(2)]
+    results = synchronizer.sync(orders)
+
+    assert [(i_result.attempt, i_result.saved) for i_result in results] == [
+        (0, 0),
+        (1, 2),
+    ]
+    assert [i_order.idOrder for i_order in orders] == [
+        i_item["idOrder"] for i_item in responses[0]
+    ]
+
+
+def test_shopper_order_history(app, order_url):
+    """
+    Тест постраничной загрузки истории заказов покупателя:
+        - создаем пул заказов и проверяем, что получены только корзина и действующие заказы, а история не запрашивалась;
+        - перебираем страницы истории и проверяем их размер, статусы заказов и количество запросов к серверу;
+        - повторно перебираем историю и проверяем, что сервер не запрашивался, а заказы - те же объекты, и что
+            список заказов пула содержит действующие заказы и загруженную историю;
+        - создаем пул заказов неизвестного серверу покупателя и проверяем, что ответ 404 не отключает постраничное
+            получение заказов для других покупателей;
+        - создаем пул заказов для сервера без постраничного получения заказов и проверяем, что все заказы получены
+            одним запросом, а история доступна по страницам
+    """
+    OrderFaker.statistics.clear()
+    pool = ShopperOrdersPool(3, order_url)
+
+    assert pool.basket.status == 0
+    assert [i_order.status for i_order in pool()] == [1, 3]
+    assert OrderFaker.statistics == {"active": 1}
+
+    pages = list(pool.iter_history(10))
+    assert [len(i_page) for i_page in pages] == [10, 10, 5]
+    assert all(i_order.status in (7, 8, 9) for i_page in pages for i_order in i_page)
+    assert OrderFaker.statistics["history"] == 3
+    assert pool.is_history_loaded()
+
+    assert list(pool.iter_history(10))[1][0] is pages[1][0]
+    assert pool.get_history_page(2, 10) == pages[2]
+    assert OrderFaker.statistics["history"] == 3
+    assert pool() == pool.pool + [i_order for i_page in pages for i_order in i_page]
+
+    OrderFaker.statistics.clear()
+    pool = ShopperOrdersPool(OrderFaker.unknown_user, order_url)
+    assert pool() == []
+    assert OrderFaker.statistics == {"active": 1, "all": 1}
+    pool = ShopperOrdersPool(3, order_url)
+    assert len(pool()) == 2
+    assert OrderFaker.statistics == {"active": 2, "all": 1}
+
+    pool = ShopperOrdersPool(3, "http://127.0.0.1:5000/legacy/order")
+    assert pool.basket.status == 0 and len(pool()) == 2
+    assert [len(i_page) for i_page in pool.iter_history(20)] == [20, 5]
+    assert OrderFaker.statistics["legacy"] == 1
+
+
+def test_shopper_orders_cache(app, category_pool, order_url, tmp_path):
+    """
+    Тест локального хранилища заказов покупателя:
+        - создаем пул заказов, добавляем товар в корзину и сохраняем заказы в хранилище;
+        - создаем пул заказов повторно и проверяем, что заказы и измененная корзина восстановлены из хранилища, а
+            сервер запрошен только для проверки заказов в фоне;
+        - проверяем, что при неизменной версии данных на сервере заказы не заменяются;
+        - добавляем на сервере действующий заказ и проверяем, что после проверки он появился в пуле, а измененная
+            корзина осталась прежней
+    """
+    storage = ShopperOrdersStorage()
+    storage.configure(path=str(tmp_path / "orders.db"))
+    product = Product("1", "Товар 1", 100, "", [], True, "")
+    try:
+        pool = ShopperOrdersPool(5, order_url)
+        pool.basket.add_product(product, 2)
+        pool.save_local()
+
+        OrderFaker.statistics.clear()
+        pool = ShopperOrdersPool(5, order_url)
+        assert [i_order.status for i_order in pool()] == [1, 3]
+        assert pool.basket.get_product_count(product) == 2
+        assert pool.basket.need_saving()
+
+        orders = pool()
+        assert pool.wait_revalidation(5)
+        assert OrderFaker.statistics == {"active": 1}
+        assert pool()[0] is orders[0]
+
+        pool.save_local()
+        OrderFaker.active_statuses = [0, 1, 3, 4]
+        pool = ShopperOrdersPool(5, order_url)
+        assert pool.wait_revalidation(5)
+        assert [i_order.status for i_order in pool()] == [1, 3, 4]
+        assert pool.basket.get_product_count(product) == 2
+
+    finally:
+        OrderFaker.active_statuses = [0, 1, 3]
+        storage.configure()
+
+
+def test_shopper_orders_merge(app, category_pool, order_url, tmp_path):
+    """
+    Тест обновления восстановленных заказов данными сервера:
+        - сохраняем в хранилище заказы покупателя без корзины на сервере - пул создает новую пустую корзину;
+        - добавляем на сервере корзину, создаем пул заказов повторно и проверяем, что после проверки заказов пустая
+            корзина заменена корзиной сервера, а данные сервера перенесены в ранее полученные объекты корзины и заказов;
+        - изменяем корзину через ранее полученный объект и проверяем, что изменение осталось в корзине пула
+    """
+    storage = ShopperOrdersStorage()
+    storage.configure(path=str(tmp_path / "orders.db"))
+    product = Product("1", "Товар 1", 100, "", [], True, "")
+    try:
+        OrderFaker.active_statuses = [1, 3]
+        pool = ShopperOrdersPool(6, order_url)
+        assert pool.basket.idOrder is None and pool.basket.need_saving()
+        pool.save_local()
+
+        OrderFaker.active_statuses = [1, 3, 0]
+        pool = ShopperOrdersPool(6, order_url)
+        basket, orders = pool.basket, pool()
+        assert pool.wait_revalidation(5)
+
+        assert pool.basket is basket
+        assert basket.idOrder == 6002 and not basket.need_saving()
+        assert [i_order.status for i_order in pool()] == [1, 3]
+        assert pool()[0] is orders[0]
+
+        basket.add_product(product, 1)
+        assert pool.basket.get_product_count(product) == 1
+        assert pool.basket.need_saving()
+
+    finally:
+        OrderFaker.active_statuses = [0, 1, 3]
+        storage.configure()
@@ -0,0 +1,165 @@
+import time
+
+import requests
+
+from modules.orders import Order, OrderSynchronizer
+from modules.orders import orders as orders_module
+from modules.utils import CircuitBreaker, Outbox
+from modules.utils import outbox as outbox_module
+
+
+def create_outbox(path: str, **kwargs) -> Outbox:
+    """
+        Функция создает исходящую очередь запросов с указанным файлом базы данных. Объект очереди является синглтоном,
+    поэтому для теста создается отдельный объект класса
+    """
+    return Outbox.__wrapped__(path=path, base_delay=0, **kwargs)
+
+
+def test_circuit_breaker():
+    """
+    Тест автоматического выключателя:
+        - после двух ошибок подряд выключатель размыкается и не пропускает запросы;
+        - по истечении времени ожидания пропускается только один пробный запрос;
+        - после ошибки пробного запроса выключатель снова размыкается, после успешного - замыкается
+    """
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.1)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    time.sleep(0.15)
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.15)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_outbox(app, tmp_path, order_url, url_no_valid):
+    """
+    Тест исходящей очереди запросов:
+        - добавляем в очередь запрос к недоступному серверу и дважды запрос к действующему серверу с одним ключом;
+        - проверяем, что запросы с одним ключом заменяют друг друга и что очередь сохраняется в базе данных;
+        - повторяем запросы и проверяем, что выполненный запрос удален из очереди, а запрос к недоступному серверу
+            остался в очереди, а после двух ошибок подряд выключатель запросов разомкнут;
+        - проверяем, что запрос, на который сервер ответил ошибкой клиента, удаляется из очереди без повторов;
+        - удаляем запрос из очереди по ключу
+    """
+    path = str(tmp_path / "outbox.db")
+    outbox = create_outbox(path, failure_threshold=2, reset_timeout=60)
+
+    outbox.add("user:1", "PUT", "http://127.0.0.1:1/user", "{}")
+    outbox.add("order:1", "PUT", order_url, '{"idOrder": 1}')
+    outbox.add("order:1", "PUT", order_url, '{"idOrder": 2}')
+    assert outbox.get_keys() == ["user:1", "order:1"]
+    assert create_outbox(path).get_keys() == ["user:1", "order:1"]
+
+    assert outbox.drain_once() == 1
+    assert outbox.get_keys() == ["user:1"]
+    assert outbox.drain_once() == 0
+    assert outbox.breaker.state == "closed"
+    assert outbox.drain_once() == 0
+    assert outbox.breaker.state == "open"
+    assert len(outbox) == 1
+
+    outbox = create_outbox(path)
+    outbox.add("order:2", "POST", url_no_valid, "{}")
+    outbox.discard("user:1")
+    assert outbox.get_keys() == ["order:2"]
+    assert outbox.drain_once() == 0
+    assert len(outbox) == 0
+
+
+def test_outbox_revision(app, tmp_path, order_url, monkeypatch):
+    """
+    Тест замены запроса во время его повтора:
+        - добавляем запрос в очередь и во время его выполнения заменяем его в очереди новым запросом;
+        - проверяем, что после выполнения старого запроса новый запрос остался в очереди;
+        - повторяем запросы еще раз и проверяем, что новый запрос выполнен и удален из очереди
+    """
+    outbox = create_outbox(str(tmp_path / "outbox.db"))
+    outbox.add("order:1", "PUT", order_url, '{"idOrder": 1}')
+
+    request = requests.request
+    bodies = list()
+
+    def replacing_request(method, url, **kwargs):
+        bodies.append(kwargs["data"])
+        if len(bodies) == 1:
+            outbox.add("order:1", "PUT", order_url, '{"idOrder": 2}')
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(outbox_module.requests, "request", replacing_request)
+
+    assert outbox.drain_once() == 1
+    assert outbox.get_keys() == ["order:1"]
+    assert outbox.drain_once() == 1
+    assert outbox.get_keys() == []
+    assert bodies == [b'{"idOrder": 1}', b'{"idOrder": 2}']
+
+
+def test_outbox_idempotency_key(app, tmp_path, order_url, monkeypatch):
+    """
+    Тест ключа идемпотентности при замене запроса:
+        - добавляем в очередь POST запрос без ключа идемпотентности и во время его выполнения заменяем его новым
+            запросом, так же без ключа;
+        - повторяем запросы и проверяем, что оба запроса переданы с одним и тем же ключом идемпотентности
+    """
+    outbox = create_outbox(str(tmp_path / "outbox.db"))
+    outbox.add("user:1", "POST", order_url, '{"tgId": 1}')
+
+    request = requests.request
+    keys = list()
+
+    def replacing_request(method, url, **kwargs):
+        keys.append(kwargs["headers"]["Idempotency-Key"])
+        if len(keys) == 1:
+            outbox.add("user:1", "POST", order_url, '{"tgId": 1, "phoneNumber": "1"}')
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(outbox_module.requests, "request", replacing_request)
+
+    assert outbox.drain_once() == 1
+    assert outbox.drain_once() == 1
+    assert len(keys) == 2 and keys[0] == keys[1]
+
+
+def test_outbox_order_result(app, tmp_path, order_url, monkeypatch):
+    """
+    Тест передачи результата выполненного очередью запроса заказу:
+        - записываем новый заказ в очередь и проверяем, что синхронизатор заказов не передает его на сервер;
+        - выполняем запрос очереди и проверяем, что его результат хранится в очереди до сверки с ним заказа;
+        - сверяем заказ с очередью и проверяем, что заказ получил id от сервера, зарегистрирован на сервере и
+            требует сохранения изменений, а результат удален из очереди;
+        - сохраняем заказ и проверяем, что он больше не требует сохранения
+    """
+    outbox = create_outbox(str(tmp_path / "outbox.db"))
+    monkeypatch.setattr(orders_module, "outbox", outbox)
+
+    order = Order(tgId=1, status=1, order_url=order_url)
+    order.prepare_saving()
+    order.enqueue_saving()
+    outbox_key = order._get_outbox_key()
+
+    assert OrderSynchronizer(retries=0).sync([order]) == []
+    assert outbox.get_entry(outbox_key).pending
+
+    assert outbox.drain_once() == 1
+    assert len(outbox) == 0
+    assert not outbox.get_entry(outbox_key).pending
+
+    assert not order.check_outbox()
+    assert order.idOrder is not None
+    assert order.need_saving()
+    assert outbox.get_entry(outbox_key) is None
+
+    assert order.save_on_server()
+    assert not order.need_saving()
@@ -0,0 +1,80 @@
+import random
+
+from modules.products import CategoryPriceIndex, Product
+from modules.test.server.random_data import CatalogFaker
+
+
+def create_product(product_id: str, price: int, delivery: bool) -> Product:
+    """Функция создает товар с указанными id, ценой и наличием доставки"""
+    return Product(
+        productId=product_id,
+        name=product_id,
+        price=price,
+        description="",
+        image=[],
+        delivery=delivery,
+        category="",
+    )
+
+
+def get_all_pages(index: CategoryPriceIndex, **kwargs) -> list:
+    """Функция получает все страницы индекса и возвращает id товаров всех страниц"""
+    result, cursor = list(), None
+    while True:
+        page = index.query(cursor=cursor, limit=3, **kwargs)
+        result.extend(page.products)
+        cursor = page.next_cursor
+        if cursor is None:
+            return result
+
+
+def test_price_index():
+    """
+    Тест индекса товаров категории по цене:
+        - проверяем постраничный просмотр по возрастанию и убыванию цены, в том числе при одинаковых ценах;
+        - проверяем выборку по диапазону цен и только товаров с доставкой;
+        - проверяем, что курсор остается действительным после перестроения индекса с новым товаром
+    """
+    products = [
+        create_product(
+            str(i_number), random.choice([100, 200, 300, 400]), i_number % 2 == 0
+        )
+        for i_number in range(20)
+    ]
+    index = CategoryPriceIndex(products)
+    expected = [
+        i_product.productsId
+        for i_product in sorted(
+            products, key=lambda i_product: (i_product.price, i_product.productsId)
+        )
+    ]
+
+    assert get_all_pages(index) == expected
+    assert get_all_pages(index, order="desc") == expected[::-1]
+
+    prices = {i_product.productsId: i_product.price for i_product in products}
+    page = index.query(min_price=200, max_price=300, limit=100)
+    assert page.products == [
+        i_product_id for i_product_id in expected if 200 <= prices[i_product_id] <= 300
+    ]
+    assert page.total == len(page.products) and page.next_cursor is None
+
+    assert get_all_pages(index, delivery_only=True) == [
+        i_product_id for i_product_id in expected if int(i_product_id) % 2 == 0
+    ]
+
+    first_page = index.query(limit=5)
+    new_index = CategoryPriceIndex(products + [create_product("20", 50, True)])
+    second_page = new_index.query(cursor=first_page.next_cursor, limit=5)
+    assert second_page.products == expected[5:10]
+
+
+def test_category_pool_pages(category_pool):
+    """Тест постраничного просмотра товаров категории пула категорий по убыванию цены"""
+    page = category_pool.get_products_page(1, order="desc", limit=2)
+    prices = [i_data["price"] for i_data in CatalogFaker.products[1]]
+    assert page.total == len(prices)
+    assert [i_product.price for i_product in page.products] == sorted(
+        prices, reverse=True
+    )[:2]
+    assert page.next_cursor is not None
@@ -0,0 +1,243 @@
+import time
+import uuid
+from io import BytesIO
+
+from PIL import Image
+
+from modules.products import (
+    ImageFetcher,
+    ImageProcessor,
+    ImageStore,
+    Product,
+    ProductPrefetcher,
+)
+from modules.utils import Deadline
+
+
+def get_product(image_url: str) -> Product:
+    """Функция создает объект товара с одним изображением по указанному url"""
+    return Product(
+        productId=str(uuid.uuid4()),
+        name="Товар",
+        price=100,
+        description="Описание товара",
+        image=[image_url],
+        delivery=True,
+        category="Категория",
+    )
+
+
+def test_file_id_storage(app):
+    """
+    Тест сохранения file_id изображений товаров:
+        - создаем товар с изображением, которое еще не загружалось в телеграмм;
+        - проверяем, что изображение товара получено в виде байтов;
+        - передаем товару file_id, присвоенный изображению телеграммом;
+        - проверяем, что изображение товара заменено на file_id;
+        - создаем новый объект товара с тем же изображением (имитация обновления каталога или перезапуска бота);
+        - проверяем, что изображение нового товара сразу представлено сохраненным file_id
+    """
+    image_url = "http://127.0.0.1:5000/image/{}.png".format(uuid.uuid4())
+
+    product = get_product(image_url)
+    assert isinstance(product.image[0].media, bytes)
+
+    product.set_file_id(["TEST_FILE_ID"])
+    assert product.image[0].media == "TEST_FILE_ID"
+
+    new_product = get_product(image_url)
+    assert len(new_product.image) == 1
+    assert new_product.image[0].media == "TEST_FILE_ID"
+
+
+def test_lazy_images(app):
+    """
+    Тест отложенной загрузки изображений товара:
+        - создаем товар и проверяем, что его изображения не загружены;
+        - обращаемся к изображениям товара;
+        - проверяем, что изображения загружены
+    """
+    product = get_product("http://127.0.0.1:5000/image/{}.png".format(uuid.uuid4()))
+    assert not product.is_images_loaded()
+
+    assert isinstance(product.image[0].media, bytes)
+    assert product.is_images_loaded()
+
+
+def test_image_retry(app):
+    """
+    Тест повторной загрузки изображений товара:
+        - создаем товар с двумя изображениями, одно из которых сервер не отдает;
+        - проверяем, что товар содержит одно изображение и не считается загруженным и загруженным в телеграмм;
+        - исправляем url второго изображения (имитация восстановления сервера изображений);
+        - проверяем, что до истечения интервала повторной загрузки изображение не загружается;
+        - по истечении интервала проверяем, что загружены оба изображения
+    """
+    product = get_product("http://127.0.0.1:5000/image/{}.png".format(uuid.uuid4()))
+    product.image_urls.append(
+        "http://127.0.0.1:5000/no_image/{}.png".format(uuid.uuid4())
+    )
+    product.image_retry_delay = 0.2
+
+    assert len(product.image) == 1
+    assert not product.is_images_loaded()
+    product.set_file_id(["TEST_FILE_ID"])
+    assert not product.is_uploaded()
+
+    product.image_urls[1] = "http://127.0.0.1:5000/image/{}.png".format(uuid.uuid4())
+    assert len(product.image) == 1
+
+    time.sleep(0.3)
+    assert len(product.image) == 2
+    assert product.is_images_loaded()
+
+
+def test_image_deadline(app):
+    """
+    Тест загрузки изображений товара в рамках крайнего срока обработки запроса:
+        - загружаем изображения товара после наступления крайнего срока и проверяем, что товар не считается
+        загруженным;
+        - проверяем, что незавершенная загрузка не считается неудачной: интервал повторной загрузки не установлен,
+        и изображение загружается при следующем обращении
+    """
+    product = get_product("http://127.0.0.1:5000/image/{}.png".format(uuid.uuid4()))
+    product.image_retry_delay = 60
+
+    with Deadline(0, "теста"):
+        product.load_images()
+    assert not product.is_images_loaded()
+    assert product._Product__image_retry_time == 0
+
+    product.load_images()
+    assert product.is_images_loaded()
+
+
+def test_image_fetcher(app):
+    """
+    Тест общего загрузчика изображений:
+        - загружаем одно и то же изображение дважды в одном запросе и проверяем, что получены одинаковые байты;
+        - ограничиваем загрузку одним запросом к хосту и проверяем, что загрузки, ожидавшие в очереди хоста,
+        завершаются успешно, а загрузки с другого хоста выполняются параллельно с ними;
+        - уменьшаем максимальный размер изображения и проверяем, что слишком большое изображение не загружается;
+        - возвращаем загрузчику параметры по умолчанию
+    """
+    fetcher = ImageFetcher()
+    image_url = "http://127.0.0.1:5000/image/{}.png".format(uuid.uuid4())
+
+    first, second = fetcher.fetch_many([image_url, image_url])
+    assert isinstance(first, bytes)
+    assert first == second
+
+    fetcher.configure(max_workers=2, max_per_host=1)
+    list_url = [
+        "http://{}:5000/image/{}.png".format(i_host, uuid.uuid4())
+        for i_host in ["127.0.0.1", "localhost"]
+        for _ in range(4)
+    ]
+    assert all(isinstance(i_image, bytes) for i_image in fetcher.fetch_many(list_url))
+
+    fetcher.configure(max_size=10)
+    try:
+        big_image_url = "http://127.0.0.1:5000/image/{}.png".format(uuid.uuid4())
+        assert fetcher.fetch_many([big_image_url]) == [None]
+    finally:
+        fetcher.configure()
+
+
+def test_image_store(tmp_path):
+    """
+    Тест локального хранилища изображений:
+        - сохраняем одинаковое изображение по двум url и проверяем, что оно хранится в одном экземпляре;
+        - читаем изображение по его хэшу;
+        - сохраняем еще одно изображение, превышая лимит размера хранилища;
+        - проверяем, что удалено изображение, к которому дольше всего не было обращений;
+        - возвращаем хранилищу параметры по умолчанию
+    """
+    store = ImageStore()
+    store.configure(path=str(tmp_path), max_size=150)
+    try:
+        first_hash = store.put("http://first/1.png", b"1" * 100)
+        assert store.put("http://first/2.png", b"1" * 100) == first_hash
+        assert store.get_size() == 100
+        assert store.read(first_hash) == b"1" * 100
+        assert store.get_hash("http://first/2.png") == first_hash
+
+        second_hash = store.put("http://second/1.png", b"2" * 100)
+        assert store.get_size() == 100
+        assert store.read(first_hash) is None
+        assert store.get_hash("http://first/1.png") is None
+        assert store.read(second_hash) == b"2" * 100
+    finally:
+        store.configure()
+
+
+def test_image_processing():
+    """
+    Тест обработки изображений товаров:
+        - создаем большое изображение с метаданными;
+        - проверяем, что при отключенной обработке изображение не изменяется;
+        - включаем обработку и проверяем, что изображение уменьшено, перекодировано в JPEG и не содержит метаданных;
+        - отключаем обработку
+    """
+    image = Image.effect_noise((3000, 2000), 64).convert("RGB")
+    exif = Image.Exif()
+    exif[0x010E] = "Описание изображения"
+    content = BytesIO()
+    image.save(content, format="JPEG", quality=100, exif=exif)
+    content = content.getvalue()
+
+    processor = ImageProcessor()
+    assert processor.process_many([content, None]) == [content, None]
+
+    processor.configure(enabled=True, max_side=1280, quality=80, processes=1)
+    try:
+        result, empty = processor.process_many([content, None])
+    finally:
+        processor.configure()
+
+    assert empty is None
+    assert len(result) < len(content)
+    with Image.open(BytesIO(result)) as processed_image:
+        assert processed_image.format == "JPEG"
+        assert max(processed_image.size) == 1280
+        assert len(processed_image.getexif()) == 0
+
+
+def test_prefetcher(app):
+    """
+    Тест предварительной загрузки товаров:
+        - пользователь открывает первый товар списка, следующие два товара ставятся в очередь загрузки;
+        - проверяем, что изображения следующих товаров загружены, а изображения остальных товаров - нет;
+        - проверяем, что функция загрузки изображений в телеграмм вызвана для загруженных товаров;
+        - открываем загруженный заранее товар и товар, который заранее не загружался, и проверяем статистику
+    """
+    products = [
+        get_product("http://127.0.0.1:5000/image/{}.png".format(uuid.uuid4()))
+        for _ in range(5)
+    ]
+    uploaded = list()
+
+    def upload(product: Product) -> None:
+        """Функция имитирует загрузку изображений товара в телеграмм"""
+        uploaded.append(product.productsId)
+        product.set_file_id(["PREFETCH_FILE_ID"])
+
+    prefetcher = ProductPrefetcher(depth=2, max_workers=2)
+    prefetcher.set_uploader(upload)
+
+    prefetcher.prefetch(products, 0)
+    time_start = time.time()
+    while not all(i_product.is_uploaded() for i_product in products[1:3]):
+        assert time.time() - time_start < 10
+        time.sleep(0.05)
+
+    assert not any(i_product.is_images_loaded() for i_product in products[3:])
+    assert sorted(uploaded) == sorted(
+        i_product.productsId for i_product in products[1:3]
+    )
+
+    prefetcher.record_view(products[1])
+    prefetcher.record_view(products[4])
+    statistics = prefetcher.get_statistics()
+    assert (statistics["hit"], statistics["miss"]) == (1, 1)
+    assert statistics["hit_rate"] == 0.5
@@ -0,0 +1,171 @@
+import os
+import random
+import statistics
+import time
+from typing import Dict, List
+
+import pytest
+from faker import Faker
+
+from modules.products import Product, SearchIndex
+from modules.products.products import get_data_hash
+from modules.products.search_index import normalize
+from modules.test.server.random_data import CatalogFaker
+
+fake = Faker("ru_RU")
+
+LATENCY_MEDIAN = 0.005
+LATENCY_P95 = 0.02
+
+
+class CountingCatalog(dict):
+    """Словарь товаров каталога, который подсчитывает количество полученных из него товаров"""
+
+    def __init__(self, products: Dict[str, Product]):
+        super().__init__(products)
+        self.requested: int = 0
+
+    def __getitem__(self, product_id: str) -> Product:
+        self.requested += 1
+        return super().__getitem__(product_id)
+
+
+def create_product(name: str, description: str = "", category: str = "") -> Product:
+    """Функция создает товар с указанными названием, описанием и категорией"""
+    return Product(
+        productId=str(random.randint(1, 10**12)),
+        name=name,
+        price=100,
+        description=description,
+        image=[],
+        delivery=False,
+        category=category,
+    )
+
+
+def update_index(index: SearchIndex, products: List[Product]) -> None:
+    """Функция обновляет поисковый индекс по переданному списку товаров"""
+    index.update(
+        {i_product.productsId: i_product for i_product in products},
+        {
+            i_product.productsId: get_data_hash(i_product.get_data())
+            for i_product in products
+        },
+    )
+
+
+def test_normalize():
+    """Тест нормализации текста: регистр, буква ё и окончания слов"""
+    assert normalize("Ёлочные ИГРУШКИ") == normalize("елочная игрушка")
+    assert normalize("Красный шар, 2024!") == ["красн", "шар", "2024"]
+
+
+def test_search_index():
+    """
+    Тест поискового индекса:
+        - индексируем товары и проверяем поиск по разным формам слова и по началу слова;
+        - проверяем, что совпадение в названии товара важнее совпадения в описании;
+        - заменяем и удаляем товары и проверяем, что индекс обновлен;
+        - проверяем, что из каталога получаются только товары, возвращаемые поиском с ограничением limit
+    """
+    ball = create_product("Красный шар", "Ёлочная игрушка", "Новый год")
+    garland = create_product("Гирлянда", "Украсит ёлку, красная", "Новый год")
+    cup = create_product("Кружка", "Керамическая", "Посуда")
+    index = SearchIndex()
+    update_index(index, [ball, garland, cup])
+
+    assert index.search("красные") == [ball, garland]
+    assert index.search("крас") == [ball, garland]
+    assert index.search("елочные игрушки") == [ball]
+    assert index.search("новогодний кружка") == list()
+    assert index.search("посуда") == [cup]
+    assert index.search("") == list()
+
+    new_cup = create_product("Синяя кружка", "Керамическая", "Посуда")
+    new_cup.productsId = cup.productsId
+    update_index(index, [ball, new_cup])
+    assert len(index) == 2
+    assert index.search("синяя") == [new_cup]
+    assert index.search("гирлянда") == list()
+
+    vase = create_product("Ваза", "Стеклянная", "Посуда")
+    catalog = {i_product.productsId: i_product for i_product in [ball, new_cup, vase]}
+    index.add_products(catalog, {vase.productsId: get_data_hash(vase.get_data())})
+    assert len(index) == 3
+    assert index.search("посуда") == [vase, new_cup]
+
+    catalog = CountingCatalog(catalog)
+    index.update(
+        catalog,
+        {
+            i_id: get_data_hash(i_product.get_data())
+            for i_id, i_product in catalog.items()
+        },
+    )
+    assert index.search("посуда", limit=1) == [vase]
+    assert catalog.requested == 1
+
+
+def test_large_search_index():
+    """
+    Тест поискового индекса большого каталога: индексируем 20000 товаров со случайными данными и проверяем, что
+    каждый из 200 товаров находится по своему названию, а каждый найденный по началу слова товар содержит это слово
+    """
+    products = [
+        create_product(fake.sentence(nb_words=3), fake.sentence(), fake.word())
+        for _ in range(20000)
+    ]
+    index = SearchIndex()
+    update_index(index, products)
+    assert len(index) == len(products)
+
+    for i_product in products[:200]:
+        assert i_product in index.search(i_product.name, limit=len(products))
+
+        prefix = normalize(i_product.name)[0][:3]
+        for i_found in index.search(prefix):
+            assert any(
+                i_term.startswith(prefix)
+                for i_term in normalize(
+                    " ".join([i_found.name, i_found.description, i_found.category])
+                )
+            )
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"),
+    reason="Бенчмарк выполняется при установленной переменной окружения RUN_BENCHMARKS",
+)
+def test_search_latency():
+    """
+    Бенчмарк поиска: индексируем 20000 товаров со случайными данными и проверяем, что медиана времени выполнения
+    запроса не превышает LATENCY_MEDIAN секунд, а 95-й процентиль - LATENCY_P95 секунд
+    """
+    products = [
+        create_product(fake.sentence(nb_words=3), fake.sentence(), fake.word())
+        for _ in range(20000)
+    ]
+    index = SearchIndex()
+    update_index(index, products)
+
+    queries = [i_product.name.split()[0][:6] for i_product in products[:200]] + [
+        fake.word() for _ in range(200)
+    ]
+
+    timings = list()
+    for i_query in queries:
+        time_start = time.perf_counter()
+        index.search(i_query)
+        timings.append(time.perf_counter() - time_start)
+
+    timings.sort()
+    assert statistics.median(timings) < LATENCY_MEDIAN
+    assert timings[int(len(timings) * 0.95)] < LATENCY_P95
+
+
+def test_category_pool_search(category_pool):
+    """Тест поиска по каталогу пула категорий: товар находится по своему названию"""
+    product_data = CatalogFaker.products[1][0]
+    found = category_pool.search(product_data["name"], limit=50)
+    assert product_data["productId"] in [i_product.productsId for i_product in found]
@@ -5,19 +5,25 @@
 """
 
 import functools
-import time
 from threading import Semaphore
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-import requests
 from marshmallow import Schema, post_load
 from telebot.types import Message
 
 from ..bot.message_deletion_blocker import dev_log
 from ..orders import Order, SellerOrdersPool
-from ..utils import execute_in_new_thread
+from ..utils import (
+    AUTHORIZATION,
+    Backend,
+    RequestRejectedError,
+    execute_in_new_thread,
+    wait_for,
+)
 from .user import User, UserPool, UserSchema, fields
 
+backend = Backend()
+
 
 class Seller(User):
     """
@@ -63,17 +69,30 @@ class Seller(User):
 
     def get_new_orders(self) -> List[Order]:
         """Метод возвращает список новых заказов"""
-        time_start = time.time()
-        while time.time() - time_start < 15:
-            if self.orders_pool:
-                return self.orders_pool.new
+        orders_pool = wait_for(
+            lambda: self.orders_pool, 15, f"ожидание заказов продавца {self.tgId}"
+        )
+        if orders_pool:
+            return orders_pool.new
 
     def get_current_orders(self) -> List[Order]:
         """Метод возвращает список текущих заказов"""
-        time_start = time.time()
-        while time.time() - time_start < 15:
-            if self.orders_pool:
-                return self.orders_pool.current
+        orders_pool = wait_for(
+            lambda: self.orders_pool, 15, f"ожидание заказов продавца {self.tgId}"
+        )
+        if orders_pool:
+            return orders_pool.current
+
+    def get_order_titles(self, status: str, cached: bool = False) -> List[str]:
+        """
+            Метод возвращает список заголовков новых (status = "new") или текущих (status = "current") заказов. Если
+        cached = True - используется кэш заголовков пула заказов
+        """
+        orders_pool = wait_for(
+            lambda: self.orders_pool, 15, f"ожидание заказов продавца {self.tgId}"
+        )
+        if orders_pool:
+            return orders_pool.get_titles(status, cached)
 
     def __repr__(self) -> str:
         """
@@ -146,25 +165,36 @@ class SellerPool(UserPool):
         self.__authorization_list_schema = AuthorizationListSchema()
         self.__authorization_response_schema = AuthorizationResponseSchema()
         self.__content_type: Dict[str, str] = {"Content-Type": "application/json"}
+        self.__authorization_cache: Dict[int, Tuple[bool, Optional[str]]] = dict()
 
-    def __check_seller_authorization(self, seller: Seller) -> Seller:
+    def __check_seller_authorization(self, seller: Seller) -> bool:
         """
             Метод осуществляет проверку авторизации пользователя в качестве продавца путем выполнения запроса к API,
-        где хранятся списки продавцов и наделения соответствующих полей продавца необходимыми для авторизации значениями
+        где хранятся списки продавцов и наделения соответствующих полей продавца необходимыми для авторизации значениями.
+        Последний ответ сервера для каждого продавца запоминается: если сервер недоступен - продавец получает
+        авторизацию из этого ответа. Возвращает True, если сервер ответил на запрос
         """
         result = self.__api_check_authorization(seller)
 
-        if result and result.get("authorized", False):
+        if result is not None:
+            self.__authorization_cache[seller.tgId] = (
+                result.get("authorized", False),
+                result.get("status", None),
+            )
+
+        authorized, status = self.__authorization_cache.get(seller.tgId, (False, None))
+        if authorized:
             seller.authorization = True
-            seller.status = result.get("status", None)
+            seller.status = status
 
-        return seller
+        return result is not None
 
     def __api_check_authorization(self, seller: Seller) -> Dict[str, Any]:
         """Метод выполняет запрос к API для проверки авторизации продавца"""
         try:
             data = self.__authorization_list_schema.dumps(seller)
-            response = requests.post(
+            response = backend.post(
+                AUTHORIZATION,
                 "/".join([self.__authorization_url, "check"]),
                 data=data,
                 headers=self.__content_type,
@@ -177,6 +207,9 @@ class SellerPool(UserPool):
                 f"Не удалось проверить авторизацию пользователя {seller.tgId} статус код {response.status_code}"
             )
 
+        except RequestRejectedError as ex:
+            dev_log.info(f"Авторизация пользователя {seller.tgId} не проверена: {ex}")
+
         except Exception as ex:
             dev_log.exception(
                 f"Не удалось проверить авторизацию пользователя {seller.tgId} из-за ошибки",
@@ -194,7 +227,7 @@ class SellerPool(UserPool):
             return "phone_number_is_none"
 
         else:
-            seller = self.__check_seller_authorization(seller)
+            self.__check_seller_authorization(seller)
             if seller.authorization:
                 return "ok"
             return "no"
@@ -202,15 +235,16 @@ class SellerPool(UserPool):
     def get(self, tg_id: int) -> Seller:
         """
             Метод дополняет функционал метода родительского класса своим функционалом авторизации пользователя в
-        качестве продавца.
+        качестве продавца. Если сервер авторизации не ответил - авторизация будет проверена повторно при следующем
+        обращении к продавцу
         """
         seller: Seller = super().get(
             tg_id=tg_id
         )  # Возвращается объект User, но считаем его как Seller
 
         if seller.authorization_counter == 0:
-            self.__check_seller_authorization(seller)
-            seller.authorization_counter += 1
+            if self.__check_seller_authorization(seller):
+                seller.authorization_counter += 1
 
         return seller
 
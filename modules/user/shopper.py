@@ -3,15 +3,14 @@
 пользователя являющегося источником заказов на приобретение товаров. Класс покупатель является дочерним для класса User.
 """
 
-import time
 from threading import Semaphore
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from marshmallow import fields, post_load
 
 from ..logger import get_development_logger
-from ..orders import Basket, Order, ShopperOrdersPool
-from ..utils import execute_in_new_thread
+from ..orders import Basket, Order, OrderSynchronizer, ShopperOrdersPool
+from ..utils import execute_in_new_thread, wait_for
 from .user import User, UserPool, UserSchema
 
 dev_log = get_development_logger(__name__)
@@ -68,23 +67,51 @@ class Shopper(User):
 
     @execute_in_new_thread(daemon=True)
     def __get_orders(self) -> None:
-        """Этот метод выполняется в отдельном потоке и служит для получения всех заказов пользователя"""
+        """
+            Этот метод выполняется в отдельном потоке и служит для получения корзины и действующих заказов
+        пользователя. История заказов получается по запросу методом iter_order_history
+        """
         with Semaphore():
             self.__orders = ShopperOrdersPool(self.tgId, self.orders_url)
 
     def get_orders(self) -> List[Order]:
-        """При обращении к объекту пула заказов как к вызываемому объекту будет возвращен список заказов"""
-        time_start = time.time()
-        while time.time() - time_start < 15:
-            if self.__orders:
-                return self.__orders()
+        """
+            Метод возвращает список заказов покупателя: действующие заказы, заказы, созданные за время сессии, и
+        загруженные страницы истории заказов (история, к которой покупатель не обращался, от сервера не получается).
+        Заказы загружаются в отдельном потоке, их ожидание ограничено 15 секундами и крайним сроком текущей обработки
+        """
+        orders = wait_for(
+            lambda: self.__orders, 15, f"ожидание заказов покупателя {self.tgId}"
+        )
+        if orders:
+            return orders()
 
     def get_basket(self) -> Basket:
         """Метод возвращает корзину пользователя, представляющую собой заказ со статусом 0"""
-        time_start = time.time()
-        while time.time() - time_start < 15:
-            if self.__orders:
-                return self.__orders.basket
+        orders = wait_for(
+            lambda: self.__orders, 15, f"ожидание заказов покупателя {self.tgId}"
+        )
+        if orders:
+            return orders.basket
+
+    def iter_order_history(self, page_size: int = 10) -> Iterator[List[Order]]:
+        """
+            Метод возвращает итератор по страницам истории заказов покупателя (завершенных и отмененных заказов).
+        Страницы загружаются от внешнего API по мере обращения к ним, например при открытии экрана заказов
+        """
+        orders = wait_for(
+            lambda: self.__orders, 15, f"ожидание заказов покупателя {self.tgId}"
+        )
+        if orders:
+            yield from orders.iter_history(page_size)
+
+    def save_orders_locally(self) -> None:
+        """
+            Метод сохраняет корзину и действующие заказы покупателя в локальном хранилище заказов, откуда они будут
+        восстановлены при следующей сессии покупателя
+        """
+        if self.__orders:
+            self.__orders.save_local()
 
     def create_new_order(self) -> None:
         """Метод создает новый заказ из корзины пользователя"""
@@ -114,9 +141,22 @@ class ShopperPool(UserPool):
     """
 
     def __init__(
-        self, shopper_url: str, orders_url: str, session_time: Optional[int] = None
+        self,
+        shopper_url: str,
+        orders_url: str,
+        session_time: Optional[int] = None,
+        sync_batch_size: int = 20,
+        sync_workers: int = 4,
+        sync_retries: int = 2,
+        bulk_orders_url: Optional[str] = None,
     ):
         super().__init__(shopper_url, orders_url, ShopperSchema, Shopper, session_time)
+        self.__order_synchronizer = OrderSynchronizer(
+            batch_size=sync_batch_size,
+            max_workers=sync_workers,
+            retries=sync_retries,
+            bulk_url=bulk_orders_url,
+        )
 
     def _save_user_data(self, list_shoppers: List[Shopper]) -> None:
         """
@@ -124,16 +164,24 @@ class ShopperPool(UserPool):
         переданном списке этот метод отправляет сообщение об окончании сессии при помощи телеграмм бота, сохраняет
         данные пользователя в локальную базу данных, и, если пользователя был зарегистрирован во внешнем API и были
         изменены его данные - отправляет эти изменения на сервер. Если покупатель не был зарегистрирован на сервере -
-        делается пост запрос с его данными на сервер.
+        делается пост запрос с его данными на сервер. Новые и измененные заказы и корзины всех переданных покупателей
+        сохраняются на сервере пакетами при помощи синхронизатора заказов, после чего сохраняются в локальном
+        хранилище заказов.
         """
         super()._save_user_data(list_shoppers)
 
+        orders: List[Order] = list()
         for i_shopper in list_shoppers:
-            for i_order in i_shopper.get_orders():
-                i_order.save_on_server()
+            orders.extend(i_shopper.get_orders() or list())
 
             basket = i_shopper.get_basket()
-            basket.save_on_server()
+            if basket is not None:
+                orders.append(basket)
+
+        self.__order_synchronizer.sync(orders)
+
+        for i_shopper in list_shoppers:
+            i_shopper.save_orders_locally()
 
     def get_personal_data(self, tg_id: int) -> str:
         """
@@ -17,7 +17,6 @@ from threading import Semaphore
 from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
 
 import pytz
-import requests
 from marshmallow import Schema, fields
 from sqlalchemy import (
     Column,
@@ -33,10 +32,20 @@ from telebot.types import Message
 
 from ..logger import get_development_logger
 from ..products import Product
-from ..utils import execute_in_new_thread
+from ..utils import (
+    USERS,
+    Backend,
+    Outbox,
+    RequestRejectedError,
+    deadline_step,
+    execute_in_new_thread,
+    is_retryable,
+)
 
 dev_log = get_development_logger(__name__)
 moscow_tz = pytz.timezone("Europe/Moscow")
+outbox = Outbox()
+backend = Backend()
 
 Base = declarative_base()
 
@@ -372,11 +381,13 @@ class UserPool(ABC):
         user = self._pool.get(tg_id, None)
 
         if not user:
-            user = self._api_get(tg_id)
+            with deadline_step(f"получение пользователя {tg_id}"):
+                user = self._api_get(tg_id)
             self._pool[tg_id] = user
 
         if not user:
-            user = self.__user_class(tg_id, self._orders_url)
+            with deadline_step(f"создание пользователя {tg_id}"):
+                user = self.__user_class(tg_id, self._orders_url)
             self._pool[tg_id] = user
 
         user.update_activity_time()
@@ -391,8 +402,10 @@ class UserPool(ABC):
         метод вернет объект пользователя, если False - словарь с данными пользователя
         """
         try:
-            response = requests.get(
-                "/".join([self._user_url, str(tg_id)]), headers=self._content_type
+            response = backend.get(
+                USERS,
+                "/".join([self._user_url, str(tg_id)]),
+                headers=self._content_type,
             )
             if response.status_code == 200:
                 data = json.loads(response.text)
@@ -409,6 +422,9 @@ class UserPool(ABC):
                 f"Не удалось получить от сервера данные пользователя {tg_id}. Статус код {response.status_code}"
             )
 
+        except RequestRejectedError as ex:
+            dev_log.info(f"Данные пользователя {tg_id} не получены: {ex}")
+
         except Exception as ex:
             dev_log.exception(
                 "При попытке получить от сервера данные пользователя {} произошла ошибка:".format(
@@ -418,43 +434,88 @@ class UserPool(ABC):
             )
 
     def _api_put(self, user: User) -> Optional[bool]:
-        """Метод осуществляет сохранение измененных данных пользователя на внешнем сервере"""
+        """
+            Метод осуществляет сохранение измененных данных пользователя на внешнем сервере. Если сервер недоступен -
+        запрос записывается в исходящую очередь запросов
+        """
+        data, status_code = None, None
         try:
             data = self._user_schema.dumps(user)
-            response = requests.put(
-                self._user_url, data=data, headers=self._content_type
+            response = backend.put(
+                USERS, self._user_url, data=data, headers=self._content_type
             )
+            status_code = response.status_code
             if response.status_code == 200:
                 dev_log.debug(
                     f"Данные пользователя {user.tgId} успешно обновлены на сервере"
                 )
+                outbox.discard(f"user:{user.tgId}")
                 return True
 
+        except RequestRejectedError as ex:
+            dev_log.info(f"Данные пользователя {user.tgId} не обновлены: {ex}")
+
         except Exception as ex:
             dev_log.exception(
                 f"Не удалось обновить данные пользователя {user.tgId} из-за ошибки:",
                 exc_info=ex,
             )
 
+        if data is not None and is_retryable(status_code):
+            outbox.add(f"user:{user.tgId}", "PUT", self._user_url, data)
+
     def _api_post(self, user: User) -> Optional[bool]:
-        """Метод осуществляет добавление нового пользователя на внешний сервер"""
+        """
+            Метод осуществляет добавление нового пользователя на внешний сервер. Если сервер недоступен - запрос
+        записывается в исходящую очередь запросов
+        """
+        data, status_code = None, None
         try:
             data = self._user_schema.dumps(user)
-            response = requests.post(
-                self._user_url, data=data, headers=self._content_type
+            response = backend.post(
+                USERS, self._user_url, data=data, headers=self._content_type
             )
+            status_code = response.status_code
             if response.status_code == 200:
                 dev_log.debug(
                     f"Данные нового пользователя {user.tgId} успешно добавлены на сервер"
                 )
+                outbox.discard(f"user:{user.tgId}")
                 return True
 
+        except RequestRejectedError as ex:
+            dev_log.info(f"Данные нового пользователя {user.tgId} не добавлены: {ex}")
+
         except Exception as ex:
             dev_log.exception(
                 f"Не удалось добавить данные нового пользователя {user.tgId} из-за ошибки:",
                 exc_info=ex,
             )
 
+        if data is not None and is_retryable(status_code):
+            outbox.add(f"user:{user.tgId}", "POST", self._user_url, data)
+
+    def _check_outbox(self, user: User) -> bool:
+        """
+            Метод сверяет незарегистрированного на сервере пользователя с исходящей очередью запросов. Если очередь уже
+        добавила пользователя на сервер - пользователь отмечается зарегистрированным. Возвращает True, если запрос на
+        добавление пользователя еще ожидает выполнения в очереди
+        """
+        if user.registered_on_server:
+            return False
+
+        outbox_key = f"user:{user.tgId}"
+        entry = outbox.get_entry(outbox_key)
+        if entry is None:
+            return False
+        if entry.pending:
+            return True
+
+        user.registered_on_server = True
+        outbox.discard(outbox_key)
+        dev_log.debug(f"Пользователь {user.tgId} добавлен на сервер очередью запросов")
+        return False
+
     def add_bot(self, bot) -> None:
         """
             Метод принимает на вход объект телеграмм бота и присваивает его атрибуту self._bot. В пуле пользователей
@@ -469,7 +530,8 @@ class UserPool(ABC):
         переданном списке этот метод отправляет сообщение об окончании сессии при помощи телеграмм бота, сохраняет
         данные пользователя в локальную базу данных, и, если пользователя был зарегистрирован во внешнем API и были
         изменены его данные - отправляет эти изменения на сервер. Если покупатель не был зарегистрирован на сервере -
-        делается пост запрос с его данными на сервер.
+        делается пост запрос с его данными на сервер. Если запрос на добавление пользователя уже ожидает выполнения в
+        исходящей очереди запросов - данные запроса в очереди заменяются текущими данными пользователя
         """
         for i_user in list_user:
             if self._bot:
@@ -478,7 +540,15 @@ class UserPool(ABC):
             i_user.saving_to_local_db()
 
             result = False
-            if i_user.registered_on_server and i_user.is_changed():
+            if self._check_outbox(i_user):
+                outbox.add(
+                    f"user:{i_user.tgId}",
+                    "POST",
+                    self._user_url,
+                    self._user_schema.dumps(i_user),
+                )
+
+            elif i_user.registered_on_server and i_user.is_changed():
                 result = self._api_put(i_user)
 
             elif not i_user.registered_on_server and not i_user.is_changed():
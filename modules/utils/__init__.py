@@ -1 +1,19 @@
+from .backend import AUTHORIZATION, CATALOG, ORDERS, USERS, Backend
+from .cache_backend import (
+    CacheBackend,
+    MemoryCacheBackend,
+    SharedCacheBackend,
+    create_cache_backend,
+)
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, RequestRejectedError
+from .deadline import (
+    Deadline,
+    DeadlineExceeded,
+    bind_deadline,
+    deadline_step,
+    get_deadline,
+    get_remaining,
+    wait_for,
+)
+from .outbox import Outbox, is_retryable
 from .utils import DataTunnel, ProjectCache, execute_in_new_thread, singleton, timer
@@ -0,0 +1,187 @@
+"""
+    Данный модуль содержит реализацию единой точки выполнения запросов к внешнему API. Методы внешнего API разделены
+на группы: пользователи (users), заказы (orders), каталог товаров (catalog) и авторизация продавцов (authorization). Для
+каждой группы создается свой автоматический выключатель запросов, поэтому сбой одной группы методов не влияет на
+остальные. Каждый запрос выполняется с ограничением времени ожидания ответа, а пока выключатель группы разомкнут -
+запросы к ней не выполняются и сразу возбуждается исключение CircuitOpenError. Вызывающий код обрабатывает его так же,
+как недоступность сервера, и продолжает работу с уже имеющимися данными.
+    Если запрос выполняется в рамках обработки обновления телеграмм с крайним сроком - время ожидания ответа не
+превышает оставшееся до крайнего срока время, а после наступления крайнего срока запросы не выполняются.
+"""
+
+import time
+from threading import Lock
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+
+from ..logger import get_development_logger
+from .circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError
+from .deadline import DeadlineExceeded, deadline_step, get_deadline
+from .outbox import is_retryable
+from .utils import singleton
+
+dev_log = get_development_logger(__name__)
+
+USERS = "users"
+ORDERS = "orders"
+CATALOG = "catalog"
+AUTHORIZATION = "authorization"
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+@singleton
+class Backend:
+    """
+        Класс - клиент внешнего API с автоматическими выключателями запросов для каждой группы методов. Объект класса
+    является синглтоном. Параметры клиента могут быть изменены методом configure, например значениями из файла
+    config.yaml
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 3,
+        read_timeout: float = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        error_rate: Optional[float] = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        slow_call_time: Optional[float] = 5,
+    ):
+        self.__lock = Lock()
+        self.configure(
+            connect_timeout,
+            read_timeout,
+            failure_threshold,
+            reset_timeout,
+            error_rate,
+            window,
+            min_calls,
+            slow_call_time,
+        )
+
+    def configure(
+        self,
+        connect_timeout: float = 3,
+        read_timeout: float = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        error_rate: Optional[float] = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        slow_call_time: Optional[float] = 5,
+    ) -> None:
+        """
+            Метод устанавливает время ожидания подключения к серверу и ответа сервера в секундах, а так же параметры
+        выключателей запросов: количество ошибок подряд и долю ошибок среди последних window запросов (но не менее
+        min_calls), при которых выключатель размыкается на reset_timeout секунд, и время выполнения запроса, после
+        которого запрос считается ошибкой. Выключатели всех групп создаются заново
+        """
+        with self.__lock:
+            self.__timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+            self.__breaker_params = dict(
+                failure_threshold=failure_threshold,
+                reset_timeout=reset_timeout,
+                error_rate=error_rate,
+                window=window,
+                min_calls=min_calls,
+                slow_call_time=slow_call_time,
+            )
+            self.__breakers: Dict[str, CircuitBreaker] = {
+                i_name: CircuitBreaker(i_name, **self.__breaker_params)
+                for i_name in (USERS, ORDERS, CATALOG, AUTHORIZATION)
+            }
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """Время ожидания подключения к серверу и ответа сервера в секундах"""
+        return self.__timeout
+
+    def get_breaker(self, group: str) -> CircuitBreaker:
+        """Метод возвращает выключатель запросов указанной группы методов. Если такого нет - он будет создан"""
+        with self.__lock:
+            breaker = self.__breakers.get(group, None)
+            if breaker is None:
+                breaker = CircuitBreaker(group, **self.__breaker_params)
+                self.__breakers[group] = breaker
+            return breaker
+
+    def get_states(self) -> Dict[str, str]:
+        """Метод возвращает состояния выключателей запросов всех групп методов"""
+        with self.__lock:
+            breakers = list(self.__breakers.values())
+        return {i_breaker.name: i_breaker.state for i_breaker in breakers}
+
+    def is_available(self, group: str) -> bool:
+        """Метод возвращает True, если выключатель запросов указанной группы методов не разомкнут"""
+        return self.get_breaker(group).state != OPEN
+
+    def request(
+        self,
+        group: str,
+        method: str,
+        url: str,
+        timeout: Optional[Timeout] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+            Метод выполняет запрос к методу внешнего API из указанной группы и возвращает ответ сервера. Если время
+        ожидания не передано - используется установленное методом configure. Ошибка соединения, превышение времени
+        ожидания и ответ сервера с ошибкой 5xx, 408 или 429 учитываются выключателем группы как ошибки. Если
+        выключатель разомкнут - возбуждается исключение CircuitOpenError, если наступил крайний срок текущей обработки -
+        DeadlineExceeded. Превышение времени ожидания, сокращенного до крайнего срока, не учитывается выключателем как
+        ошибка сервера
+        """
+        step = f"{method} {url}"
+        timeout = timeout or self.__timeout
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+
+        shortened = False
+        deadline = get_deadline()
+        if deadline is not None:
+            deadline.check(step)
+            remaining = deadline.remaining
+            if remaining <= 0:
+                # Крайний срок наступил после проверки - запрос с нулевым временем ожидания не выполняется
+                raise DeadlineExceeded(deadline.name, step)
+            shortened = remaining < max(timeout)
+            timeout = tuple(min(i_timeout, remaining) for i_timeout in timeout)
+
+        breaker = self.get_breaker(group)
+        if not breaker.allow_request():
+            raise CircuitOpenError(group)
+
+        time_start = time.monotonic()
+        try:
+            with deadline_step(step):
+                response = requests.request(method, url, timeout=timeout, **kwargs)
+        except requests.Timeout:
+            if shortened:
+                breaker.cancel_request()
+            else:
+                breaker.record_failure()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        if is_retryable(response.status_code):
+            breaker.record_failure()
+        else:
+            breaker.record_success(time.monotonic() - time_start)
+        return response
+
+    def get(self, group: str, url: str, **kwargs) -> requests.Response:
+        """Метод выполняет GET запрос к методу внешнего API из указанной группы"""
+        return self.request(group, "GET", url, **kwargs)
+
+    def post(self, group: str, url: str, **kwargs) -> requests.Response:
+        """Метод выполняет POST запрос к методу внешнего API из указанной группы"""
+        return self.request(group, "POST", url, **kwargs)
+
+    def put(self, group: str, url: str, **kwargs) -> requests.Response:
+        """Метод выполняет PUT запрос к методу внешнего API из указанной группы"""
+        return self.request(group, "PUT", url, **kwargs)
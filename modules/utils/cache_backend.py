@@ -0,0 +1,263 @@
+"""
+    Данный модуль содержит реализацию хранилищ (бэкендов) для кэша проекта ProjectCache. Хранилище определяет где и
+как хранятся закэшированные данные: в оперативной памяти одного процесса или в общем для всех процессов хоста
+локальном хранилище. Выбор хранилища осуществляется в файле config.yaml (раздел cache).
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Optional
+
+import pytz
+from sqlalchemy import Column, Float, LargeBinary, String, create_engine, delete
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from ..logger import get_development_logger
+
+dev_log = get_development_logger(__name__)
+moscow_tz = pytz.timezone("Europe/Moscow")
+
+
+@dataclass
+class CacheData:
+    """Класс - модель единицы данных, хранящейся в кэше"""
+
+    result: Any
+    saving_time: datetime
+
+
+class CacheBackend(ABC):
+    """
+        Абстрактный класс - интерфейс хранилища кэша. Любое хранилище, используемое объектом ProjectCache, должно
+    реализовывать методы этого класса. Атрибут shared показывает, доступны ли данные хранилища другим процессам
+    """
+
+    shared: bool = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheData]:
+        """Метод возвращает данные, сохраненные в хранилище по указанному ключу, или None"""
+
+    @abstractmethod
+    def set(self, key: str, data: CacheData) -> None:
+        """Метод сохраняет данные в хранилище по указанному ключу"""
+
+    @abstractmethod
+    def delete_older_than(self, saving_time: datetime) -> int:
+        """Метод удаляет из хранилища данные, сохраненные ранее указанного времени, и возвращает их количество"""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Метод возвращает количество записей в хранилище"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Класс - хранилище кэша в оперативной памяти процесса. Используется по умолчанию"""
+
+    def __init__(self):
+        self.__memory: Dict[str, CacheData] = dict()
+        self.__lock = Lock()
+
+    def get(self, key: str) -> Optional[CacheData]:
+        return self.__memory.get(key, None)
+
+    def set(self, key: str, data: CacheData) -> None:
+        with self.__lock:
+            self.__memory[key] = data
+
+    def delete_older_than(self, saving_time: datetime) -> int:
+        with self.__lock:
+            old_keys = [
+                i_key
+                for i_key, i_data in self.__memory.items()
+                if i_data.saving_time < saving_time
+            ]
+            for i_key in old_keys:
+                self.__memory.pop(i_key)
+
+        return len(old_keys)
+
+    def size(self) -> int:
+        return len(self.__memory)
+
+
+SharedBase = declarative_base()
+
+
+class CacheTable(SharedBase):
+    """
+        Класс - представление таблицы общего хранилища кэша. Небольшие значения хранятся непосредственно в таблице,
+    большие - в отдельных файлах, имя которых записывается в поле file_name
+    """
+
+    __tablename__ = "cache"
+
+    key = Column(String, primary_key=True)
+    value = Column(LargeBinary, nullable=True)
+    file_name = Column(String, nullable=True)
+    saving_time = Column(Float, nullable=False)
+
+
+class SharedCacheBackend(CacheBackend):
+    """
+        Класс - общее для нескольких процессов одного хоста хранилище кэша. Индекс хранилища - база данных SQLite,
+    значения сериализуются при помощи pickle. Значения, размер которых превышает mmap_threshold байт, сохраняются в
+    отдельные файлы и читаются через отображение файла в память (mmap). Таким образом, данные, полученные от внешнего
+    API одним процессом бота, переиспользуются остальными процессами.
+    """
+
+    shared: bool = True
+
+    def __init__(self, path: str = "cache_data", mmap_threshold: int = 65536):
+        self.__path: str = path
+        self.__values_path: str = os.path.join(path, "values")
+        self.__mmap_threshold: int = mmap_threshold
+
+        if not os.path.exists(self.__values_path):
+            os.makedirs(self.__values_path)
+
+        self.__engine = create_engine(
+            "sqlite:///{}".format(os.path.join(path, "cache.db")),
+            connect_args={"timeout": 30, "check_same_thread": False},
+        )
+        SharedBase.metadata.create_all(self.__engine)
+        self.__session_maker = sessionmaker(bind=self.__engine)
+
+    def __read_file(self, file_name: str) -> Optional[bytes]:
+        """Метод читает сериализованное значение из файла при помощи mmap"""
+        try:
+            with open(os.path.join(self.__values_path, file_name), "rb") as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return mm[:]
+
+        except (OSError, ValueError) as ex:
+            dev_log.warning(
+                f"Не удалось прочитать файл {file_name} общего хранилища кэша: {ex}"
+            )
+
+    def __write_file(self, key: str, value: bytes) -> str:
+        """
+            Метод записывает сериализованное значение в файл и возвращает имя файла. Запись выполняется во временный
+        файл с последующим атомарным переименованием, что бы другие процессы не прочли файл записанный частично
+        """
+        file_name = "{}.bin".format(hashlib.sha256(key.encode()).hexdigest())
+        path = os.path.join(self.__values_path, file_name)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+
+        with open(tmp_path, "wb") as file:
+            file.write(value)
+        os.replace(tmp_path, path)
+
+        return file_name
+
+    def get(self, key: str) -> Optional[CacheData]:
+        with self.__session_maker() as session:
+            row: Optional[CacheTable] = session.get(CacheTable, key)
+            if row is None:
+                return None
+            value, file_name, saving_time = row.value, row.file_name, row.saving_time
+
+        if file_name:
+            value = self.__read_file(file_name)
+            if value is None:
+                return None
+
+        try:
+            return CacheData(
+                pickle.loads(value), datetime.fromtimestamp(saving_time, moscow_tz)
+            )
+
+        except Exception as ex:
+            dev_log.exception(
+                f"Не удалось восстановить значение {key} из общего хранилища кэша",
+                exc_info=ex,
+            )
+
+    def set(self, key: str, data: CacheData) -> None:
+        try:
+            value = pickle.dumps(data.result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as ex:
+            dev_log.debug(
+                f"Значение {key} не может быть сохранено в общем хранилище кэша: {ex}"
+            )
+            return
+
+        file_name = None
+        if len(value) >= self.__mmap_threshold:
+            file_name = self.__write_file(key, value)
+            value = None
+
+        with self.__session_maker() as session:
+            session.merge(
+                CacheTable(
+                    key=key,
+                    value=value,
+                    file_name=file_name,
+                    saving_time=data.saving_time.timestamp(),
+                )
+            )
+            try:
+                session.commit()
+            except Exception as ex:
+                session.rollback()
+                dev_log.exception(
+                    f"Не удалось сохранить значение {key} в общем хранилище кэша",
+                    exc_info=ex,
+                )
+
+    def delete_older_than(self, saving_time: datetime) -> int:
+        with self.__session_maker() as session:
+            old_rows = (
+                session.query(CacheTable.key, CacheTable.file_name)
+                .filter(CacheTable.saving_time < saving_time.timestamp())
+                .all()
+            )
+            session.execute(
+                delete(CacheTable).where(
+                    CacheTable.saving_time < saving_time.timestamp()
+                )
+            )
+            try:
+                session.commit()
+            except Exception as ex:
+                session.rollback()
+                dev_log.exception(
+                    "Не удалось очистить общее хранилище кэша", exc_info=ex
+                )
+                return 0
+
+        for _, i_file_name in old_rows:
+            if i_file_name:
+                try:
+                    os.remove(os.path.join(self.__values_path, i_file_name))
+                except OSError:
+                    pass
+
+        return len(old_rows)
+
+    def size(self) -> int:
+        with self.__session_maker() as session:
+            return session.query(CacheTable).count()
+
+
+def create_cache_backend(backend: str = "memory", **kwargs) -> CacheBackend:
+    """
+        Функция создает хранилище кэша по его названию, указанному в файле config.yaml: memory - хранилище в
+    оперативной памяти процесса, shared - общее хранилище для всех процессов хоста
+    """
+    if backend == "memory":
+        return MemoryCacheBackend()
+    elif backend == "shared":
+        return SharedCacheBackend(**kwargs)
+
+    raise ValueError(
+        "Хранилище кэша {} не поддерживается. Допустимые значения: memory, shared".format(
+            backend
+        )
+    )
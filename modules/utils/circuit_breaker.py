@@ -0,0 +1,173 @@
+"""
+    Данный модуль содержит реализацию автоматического выключателя (circuit breaker) для запросов к внешнему API. Пока
+запросы выполняются успешно, выключатель замкнут (closed) и пропускает все запросы. После нескольких ошибок подряд или
+если доля ошибок среди последних запросов превысила допустимую, выключатель размыкается (open) и некоторое время не
+пропускает запросы, чтобы не нагружать восстанавливающийся сервер. Запрос, выполнявшийся дольше допустимого времени,
+считается ошибкой, поэтому выключатель размыкается и при резком росте времени ответа сервера.
+По истечении этого времени выключатель переходит в полуоткрытое состояние (half_open) и пропускает один пробный запрос:
+если он успешен - выключатель замыкается, если нет - снова размыкается.
+"""
+
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Deque, Dict, Optional
+
+from ..logger import get_development_logger
+
+dev_log = get_development_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class RequestRejectedError(Exception):
+    """
+        Базовое исключение для запросов к внешнему API, которые не выполнялись, так как заранее известно, что ответ
+    не будет получен вовремя
+    """
+
+
+class CircuitOpenError(RequestRejectedError):
+    """Исключение возбуждается при попытке выполнить запрос, пока выключатель запросов разомкнут"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Выключатель запросов {name} разомкнут, запрос не выполнялся")
+        self.name: str = name
+
+
+class CircuitBreaker:
+    """
+        Класс - автоматический выключатель запросов к группе методов внешнего API с указанным названием. Если указана
+    допустимая доля ошибок error_rate - выключатель размыкается, когда среди последних window запросов (но не менее
+    min_calls) доля ошибок достигает этого значения. Если указано slow_call_time - запрос, выполнявшийся дольше этого
+    времени в секундах, учитывается как ошибка
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        error_rate: Optional[float] = None,
+        window: int = 20,
+        min_calls: int = 10,
+        slow_call_time: Optional[float] = None,
+    ):
+        self.name: str = name
+        self.__failure_threshold: int = max(1, failure_threshold)
+        self.__reset_timeout: float = reset_timeout
+        self.__error_rate: Optional[float] = error_rate
+        self.__min_calls: int = max(1, min_calls)
+        self.__slow_call_time: Optional[float] = slow_call_time
+        self.__lock = Lock()
+        self.__state: str = CLOSED
+        self.__failures: int = 0
+        self.__calls: Deque[bool] = deque(maxlen=max(1, window))
+        self.__opened_at: float = 0
+        self.__probe: bool = False
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние выключателя: closed, open или half_open"""
+        with self.__lock:
+            return self.__get_state()
+
+    def __get_state(self) -> str:
+        """Метод возвращает состояние выключателя, переводя разомкнутый выключатель в полуоткрытое состояние"""
+        if (
+            self.__state == OPEN
+            and time.monotonic() - self.__opened_at >= self.__reset_timeout
+        ):
+            self.__state = HALF_OPEN
+            self.__probe = False
+        return self.__state
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+            Метод возвращает состояние выключателя, количество ошибок подряд, количество учтенных последних запросов и
+        долю ошибок среди них
+        """
+        with self.__lock:
+            calls = len(self.__calls)
+            return {
+                "name": self.name,
+                "state": self.__get_state(),
+                "failures": self.__failures,
+                "calls": calls,
+                "error_rate": self.__calls.count(False) / calls if calls else 0,
+            }
+
+    def allow_request(self) -> bool:
+        """
+            Метод возвращает True, если запрос может быть выполнен. В полуоткрытом состоянии разрешается только один
+        пробный запрос до получения его результата
+        """
+        with self.__lock:
+            state = self.__get_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self.__probe:
+                self.__probe = True
+                return True
+            return False
+
+    def record_success(self, duration: Optional[float] = None) -> None:
+        """
+            Метод учитывает успешный запрос. Если передано время выполнения запроса и оно превышает допустимое - запрос
+        учитывается как ошибка
+        """
+        if (
+            self.__slow_call_time is not None
+            and (duration or 0) > self.__slow_call_time
+        ):
+            dev_log.info(
+                f"Запрос группы {self.name} выполнялся {duration:.2f} с и учтен как ошибка"
+            )
+            self.record_failure()
+            return
+
+        with self.__lock:
+            if self.__state != CLOSED:
+                dev_log.info(f"Выключатель запросов {self.name} замкнут")
+                self.__calls.clear()
+            self.__state = CLOSED
+            self.__failures = 0
+            self.__probe = False
+            self.__calls.append(True)
+
+    def cancel_request(self) -> None:
+        """
+            Метод отменяет учет запроса, результат которого не характеризует работу сервера, например запроса,
+        прерванного по инициативе бота. В полуоткрытом состоянии после этого может быть выполнен новый пробный запрос
+        """
+        with self.__lock:
+            self.__probe = False
+
+    def record_failure(self) -> None:
+        """
+            Метод учитывает неудачный запрос и размыкает выключатель, если ошибок подряд стало слишком много или доля
+        ошибок среди последних запросов достигла допустимой
+        """
+        with self.__lock:
+            self.__failures += 1
+            self.__calls.append(False)
+            if self.__state == HALF_OPEN or self.__failures >= self.__failure_threshold:
+                self.__open()
+            elif (
+                self.__error_rate is not None
+                and len(self.__calls) >= self.__min_calls
+                and self.__calls.count(False) / len(self.__calls) >= self.__error_rate
+            ):
+                self.__open()
+
+    def __open(self) -> None:
+        """Метод размыкает выключатель"""
+        if self.__state != OPEN:
+            dev_log.warning(
+                f"Выключатель запросов {self.name} разомкнут на {self.__reset_timeout} с"
+            )
+        self.__state = OPEN
+        self.__opened_at = time.monotonic()
+        self.__probe = False
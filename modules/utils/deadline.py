@@ -0,0 +1,186 @@
+"""
+    Данный модуль содержит реализацию крайнего срока (deadline) обработки одного обновления телеграмм. Обработчик
+сообщения может выполнить цепочку действий: получение пользователя от внешнего API, создание объекта пользователя,
+получение его заказов и товаров заказов. Что бы общее время ответа пользователю было ограничено, при получении
+обновления бот устанавливает крайний срок его обработки. Крайний срок хранится в переменной контекста (contextvars),
+поэтому он доступен всем функциям, вызванным в потоке обработчика, без передачи его по цепочке вызовов. Запросы к
+внешнему API, загрузка данных в кэш и ожидание данных, загружаемых в других потоках, используют оставшееся до крайнего
+срока время. Время выполнения каждого шага обработки запоминается, и если обработка не уложилась в отведенное время -
+в лог записывается шаг, на котором время закончилось, и шаги, занявшие больше всего времени.
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from ..logger import get_development_logger
+from .circuit_breaker import RequestRejectedError
+
+dev_log = get_development_logger(__name__)
+
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar(
+    "deadline", default=None
+)
+
+
+class DeadlineExceeded(RequestRejectedError):
+    """Исключение возбуждается при попытке выполнить шаг обработки после наступления крайнего срока"""
+
+    def __init__(self, name: str, step: str):
+        super().__init__(f"Время обработки {name} истекло, {step} не выполнялось")
+        self.step: str = step
+
+
+class Deadline:
+    """
+        Класс - крайний срок обработки с указанным названием, наступающий через budget секунд после входа в блок with.
+    Используется в качестве контекстного менеджера: в блоке with объект доступен через функцию get_deadline. Если блок
+    with вложен в блок другого крайнего срока - используется более ранний из двух
+    """
+
+    def __init__(self, budget: float, name: str = "запроса"):
+        self.name: str = name
+        self.budget: float = budget
+        self.__lock = Lock()
+        self.__time_start: float = time.monotonic()
+        self.__expires_at: float = self.__time_start + budget
+        self.__steps: List[Tuple[str, float]] = list()
+        self.__exceeded_step: Optional[str] = None
+        self.__token = None
+
+    def __enter__(self) -> "Deadline":
+        outer = _current_deadline.get()
+        self.__time_start = time.monotonic()
+        self.__expires_at = self.__time_start + self.budget
+        if outer is not None:
+            self.__expires_at = min(self.__expires_at, outer.expires_at)
+        self.__token = _current_deadline.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        _current_deadline.reset(self.__token)
+        elapsed = time.monotonic() - self.__time_start
+        if elapsed > self.budget:
+            steps = ", ".join(
+                f"{i_step} - {i_duration:.2f} с"
+                for i_step, i_duration in sorted(
+                    self.get_steps(), key=lambda i_item: i_item[1], reverse=True
+                )[:5]
+            )
+            dev_log.warning(
+                f"Обработка {self.name} заняла {elapsed:.2f} с при отведенных {self.budget} с. Время закончилось на "
+                f"шаге: {self.__exceeded_step or 'не определен'}. Самые долгие шаги: {steps or 'нет'}"
+            )
+
+    @property
+    def expires_at(self) -> float:
+        """Время наступления крайнего срока по часам time.monotonic"""
+        return self.__expires_at
+
+    @property
+    def remaining(self) -> float:
+        """Оставшееся до крайнего срока время в секундах. После наступления крайнего срока - 0"""
+        return max(0.0, self.__expires_at - time.monotonic())
+
+    def is_expired(self) -> bool:
+        """Метод возвращает True, если крайний срок наступил"""
+        return time.monotonic() >= self.__expires_at
+
+    def add_step(self, step: str, duration: float) -> None:
+        """
+            Метод запоминает время выполнения шага обработки. Первый шаг, завершившийся после наступления крайнего
+        срока, запоминается как шаг, на котором время закончилось
+        """
+        with self.__lock:
+            self.__steps.append((step, duration))
+            if self.__exceeded_step is None and self.is_expired():
+                self.__exceeded_step = step
+
+    def get_steps(self) -> List[Tuple[str, float]]:
+        """Метод возвращает список выполненных шагов обработки и их время выполнения в секундах"""
+        with self.__lock:
+            return list(self.__steps)
+
+    def check(self, step: str) -> None:
+        """Метод возбуждает исключение DeadlineExceeded, если крайний срок наступил до начала указанного шага"""
+        if self.is_expired():
+            with self.__lock:
+                if self.__exceeded_step is None:
+                    self.__exceeded_step = step
+            raise DeadlineExceeded(self.name, step)
+
+
+def get_deadline() -> Optional[Deadline]:
+    """Функция возвращает крайний срок текущей обработки или None, если крайний срок не установлен"""
+    return _current_deadline.get()
+
+
+def get_remaining(default: Optional[float] = None) -> Optional[float]:
+    """
+        Функция возвращает оставшееся до крайнего срока время в секундах, но не более default. Если крайний срок не
+    установлен - возвращается default
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    if default is None:
+        return deadline.remaining
+    return min(default, deadline.remaining)
+
+
+@contextmanager
+def deadline_step(step: str) -> Iterator[None]:
+    """
+        Функция - контекстный менеджер, который замеряет время выполнения блока with и запоминает его как шаг обработки
+    текущего крайнего срока. Если крайний срок не установлен - блок выполняется без замера
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        yield
+        return
+
+    time_start = time.monotonic()
+    try:
+        yield
+    finally:
+        deadline.add_step(step, time.monotonic() - time_start)
+
+
+def bind_deadline(func: Callable) -> Callable:
+    """
+        Функция возвращает обертку переданной функции, которая выполняет её с крайним сроком текущей обработки. Нужна
+    для функций, выполняемых в пуле потоков в рамках обработки: переменные контекста не передаются в другие потоки
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapped(*args, **kwargs) -> Any:
+        token = _current_deadline.set(deadline)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_deadline.reset(token)
+
+    return wrapped
+
+
+def wait_for(
+    condition: Callable[[], Any], timeout: float, step: str, interval: float = 0.01
+) -> Any:
+    """
+        Функция ожидает, пока вызов condition не вернет истинное значение, и возвращает это значение. Ожидание длится
+    не дольше timeout секунд и не дольше оставшегося до крайнего срока времени. Если дождаться не удалось - возвращается
+    None
+    """
+    with deadline_step(step):
+        time_end = time.monotonic() + get_remaining(timeout)
+        while True:
+            result = condition()
+            if result or time.monotonic() >= time_end:
+                return result or None
+            time.sleep(interval)
@@ -0,0 +1,447 @@
+"""
+    Данный модуль содержит реализацию исходящей очереди (outbox) запросов к внешнему API. Если запрос на сохранение
+данных пользователя или заказа не удалось выполнить из-за недоступности сервера, он записывается в таблицу outbox
+локальной базы данных SQLite и не теряется при перезапуске бота. Фоновый поток повторяет сохраненные запросы с
+экспоненциально растущей задержкой, а автоматический выключатель прекращает повторы на время, пока сервер не отвечает,
+чтобы не нагружать восстанавливающийся сервер. Каждая запись очереди относится к одной сущности (ключ записи, например
+user:<id пользователя>): новая запись о той же сущности заменяет старую, поэтому на сервер передаются только последние
+данные. Каждый запрос передается с заголовком Idempotency-Key, чтобы повторы одного и того же запроса не создавали на
+сервере дубликаты. Результат выполненного очередью запроса POST (ответ сервера, например id созданного заказа)
+сохраняется в очереди под тем же ключом, пока его не заберет объект сущности, запрос которой был выполнен.
+"""
+
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from threading import RLock
+from typing import List, Optional, Set, Tuple
+
+import requests
+from sqlalchemy import Column, Float, Integer, String, create_engine, inspect, text
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from ..logger import get_development_logger
+from .circuit_breaker import CircuitBreaker
+from .utils import execute_in_new_thread, singleton
+
+dev_log = get_development_logger(__name__)
+
+Base = declarative_base()
+
+
+def is_retryable(status_code: Optional[int]) -> bool:
+    """
+        Функция возвращает True, если запрос, завершившийся с указанным статус кодом, имеет смысл повторить позже.
+    Статус код None означает, что ответ от сервера не получен
+    """
+    return status_code is None or status_code >= 500 or status_code in (408, 429)
+
+
+class OutboxTable(Base):
+    """Класс - модель таблицы исходящей очереди запросов"""
+
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    key = Column(String, nullable=False, unique=True)
+    idempotency_key = Column(String, nullable=False)
+    method = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt = Column(Float, nullable=False, index=True)
+    created = Column(Float, nullable=False)
+    last_error = Column(String, nullable=True)
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
+    completed = Column(Float, nullable=True, index=True)
+    response = Column(String, nullable=True)
+
+
+ADDED_COLUMNS = {
+    "revision": "INTEGER NOT NULL DEFAULT 0",
+    "completed": "FLOAT",
+    "response": "VARCHAR",
+}
+
+
+@dataclass
+class OutboxEntry:
+    """
+        Класс - состояние запроса сущности в очереди: pending = True, если запрос еще ожидает выполнения, иначе
+    запрос выполнен очередью и response содержит тело ответа сервера
+    """
+
+    key: str
+    pending: bool
+    response: Optional[str] = None
+
+
+@singleton
+class Outbox:
+    """
+        Класс - исходящая очередь запросов к внешнему API. Объект класса является синглтоном. Параметры очереди могут
+    быть изменены методом configure, например значениями из файла config.yaml. Повтор запросов выполняется методом
+    drain в отдельном потоке. Каждая замена запроса в очереди увеличивает его ревизию: результат повтора сохраняется,
+    только если ревизия запроса не изменилась, пока выполнялся повтор
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join("database", "user_database.db"),
+        base_delay: float = 5,
+        max_delay: float = 600,
+        max_attempts: int = 20,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60,
+        poll_interval: float = 5,
+        batch_size: int = 50,
+        timeout: float = 10,
+        result_lifetime: float = 604800,
+    ):
+        self.__lock = RLock()
+        self.configure(
+            path,
+            base_delay,
+            max_delay,
+            max_attempts,
+            failure_threshold,
+            reset_timeout,
+            poll_interval,
+            batch_size,
+            timeout,
+            result_lifetime,
+        )
+
+    def configure(
+        self,
+        path: str = os.path.join("database", "user_database.db"),
+        base_delay: float = 5,
+        max_delay: float = 600,
+        max_attempts: int = 20,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60,
+        poll_interval: float = 5,
+        batch_size: int = 50,
+        timeout: float = 10,
+        result_lifetime: float = 604800,
+    ) -> None:
+        """
+            Метод устанавливает файл базы данных очереди, начальную и максимальную задержку повтора запроса в секундах,
+        максимальное количество попыток выполнить запрос, количество ошибок подряд, после которого повторы
+        прекращаются на reset_timeout секунд, период проверки очереди в секундах, количество запросов, повторяемых за
+        одну проверку, время ожидания ответа сервера на повтор запроса в секундах и время хранения результатов
+        выполненных запросов POST в секундах
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        engine = create_engine(
+            "sqlite:///{}".format(path),
+            connect_args={"timeout": 30, "check_same_thread": False},
+        )
+        Base.metadata.create_all(engine)
+        self.__migrate(engine)
+
+        with self.__lock:
+            self.__session_maker = sessionmaker(bind=engine)
+            self.__base_delay: float = base_delay
+            self.__max_delay: float = max_delay
+            self.__max_attempts: int = max_attempts
+            self.__poll_interval: float = poll_interval
+            self.__batch_size: int = batch_size
+            self.__timeout: float = timeout
+            self.__result_lifetime: float = result_lifetime
+            self.breaker: CircuitBreaker = CircuitBreaker(
+                "outbox", failure_threshold, reset_timeout
+            )
+
+            with self.__session_maker() as session:
+                self.__keys: Set[str] = {
+                    i_key for i_key, in session.query(OutboxTable.key)
+                }
+
+    @staticmethod
+    def __migrate(engine) -> None:
+        """Метод добавляет в таблицу очереди, созданную предыдущей версией бота, недостающие колонки"""
+        columns = {
+            i_column["name"]
+            for i_column in inspect(engine).get_columns(OutboxTable.__tablename__)
+        }
+        with engine.begin() as connection:
+            for i_name, i_definition in ADDED_COLUMNS.items():
+                if i_name not in columns:
+                    connection.execute(
+                        text(
+                            f"ALTER TABLE {OutboxTable.__tablename__} ADD COLUMN {i_name} {i_definition}"
+                        )
+                    )
+
+    def add(
+        self,
+        key: str,
+        method: str,
+        url: str,
+        body: str,
+        idempotency_key: Optional[str] = None,
+    ) -> None:
+        """
+            Метод записывает в очередь запрос с указанными HTTP методом, url и телом запроса. Если в очереди уже есть
+        запрос с тем же ключом - он заменяется новым, а ревизия запроса увеличивается. Если ключ идемпотентности не
+        передан - у заменяемого запроса сохраняется прежний ключ, а для нового запроса ключ создается, поэтому сервер
+        распознает повторы запроса, данные которого изменились за время ожидания в очереди
+        """
+        now = time.time()
+        with self.__lock:
+            with self.__session_maker() as session:
+                row: Optional[OutboxTable] = (
+                    session.query(OutboxTable).filter(OutboxTable.key == key).first()
+                )
+                if row is None:
+                    row = OutboxTable(key=key, created=now, revision=0)
+                    session.add(row)
+                else:
+                    row.revision += 1
+
+                row.idempotency_key = (
+                    idempotency_key or row.idempotency_key or str(uuid.uuid4())
+                )
+                row.method = method
+                row.url = url
+                row.body = body
+                row.attempts = 0
+                row.next_attempt = now + self.__base_delay
+                row.last_error = None
+                row.completed = None
+                row.response = None
+
+                try:
+                    session.commit()
+                    self.__keys.add(key)
+                    dev_log.info(f"Запрос {method} {url} ({key}) добавлен в очередь")
+                except Exception as ex:
+                    session.rollback()
+                    dev_log.exception(
+                        f"Не удалось добавить запрос {key} в очередь", exc_info=ex
+                    )
+
+    def discard(self, key: str) -> None:
+        """
+            Метод удаляет из очереди запрос с указанным ключом. Вызывается после успешного сохранения данных сущности,
+        чтобы очередь не передала на сервер устаревшие данные. Если запроса с таким ключом нет в очереди - обращения к
+        базе данных не выполняется
+        """
+        with self.__lock:
+            if key not in self.__keys:
+                return
+
+            with self.__session_maker() as session:
+                try:
+                    session.query(OutboxTable).filter(OutboxTable.key == key).delete()
+                    session.commit()
+                    self.__keys.discard(key)
+                except Exception as ex:
+                    session.rollback()
+                    dev_log.exception(
+                        f"Не удалось удалить запрос {key} из очереди", exc_info=ex
+                    )
+
+    def get_entry(self, key: str) -> Optional[OutboxEntry]:
+        """
+            Метод возвращает состояние запроса с указанным ключом: ожидает ли он выполнения или уже выполнен очередью
+        (вместе с ответом сервера). Если запроса с таким ключом нет в очереди - возвращается None без обращения к базе
+        данных
+        """
+        if key not in self.__keys:
+            return None
+
+        with self.__session_maker() as session:
+            row: Optional[OutboxTable] = (
+                session.query(OutboxTable).filter(OutboxTable.key == key).first()
+            )
+            if row is None:
+                return None
+            return OutboxEntry(key, row.completed is None, row.response)
+
+    def get_keys(self) -> List[str]:
+        """Метод возвращает ключи запросов, ожидающих выполнения"""
+        with self.__session_maker() as session:
+            return [
+                i_row.key
+                for i_row in session.query(OutboxTable)
+                .filter(OutboxTable.completed.is_(None))
+                .order_by(OutboxTable.id)
+            ]
+
+    def __len__(self) -> int:
+        """Метод возвращает количество запросов, ожидающих выполнения"""
+        with self.__session_maker() as session:
+            return (
+                session.query(OutboxTable)
+                .filter(OutboxTable.completed.is_(None))
+                .count()
+            )
+
+    def __get_delay(self, attempts: int) -> float:
+        """
+            Метод возвращает задержку перед следующей попыткой выполнить запрос: задержка удваивается с каждой попыткой
+        и уменьшается на случайную величину, чтобы повторы разных запросов не совпадали по времени
+        """
+        delay = min(self.__max_delay, self.__base_delay * 2 ** max(0, attempts - 1))
+        return delay * random.uniform(0.5, 1)
+
+    def __send(self, row: OutboxTable) -> Tuple[Optional[int], Optional[str]]:
+        """
+            Метод выполняет запрос из очереди и возвращает статус код и тело ответа или (None, None), если ответ не
+        получен
+        """
+        try:
+            response = requests.request(
+                row.method,
+                row.url,
+                data=row.body.encode(),
+                headers={
+                    "Content-Type": "application/json",
+                    "Idempotency-Key": row.idempotency_key,
+                },
+                timeout=self.__timeout,
+            )
+            return response.status_code, response.text
+        except Exception as ex:
+            dev_log.debug(f"Не удалось повторить запрос {row.key}: {ex}")
+            return None, None
+
+    def __save_result(
+        self, row: OutboxTable, status_code: Optional[int], response: Optional[str]
+    ) -> bool:
+        """
+            Метод сохраняет результат повтора запроса: удаляет выполненный запрос из очереди или назначает время
+        следующей попытки. Выполненный запрос POST остается в очереди вместе с ответом сервера до тех пор, пока его
+        результат не заберет объект сущности. Если пока выполнялся запрос он был заменен в очереди новым (изменилась
+        ревизия запроса) - новый запрос не изменяется. Возвращает True, если запрос выполнен
+        """
+        done = status_code is not None and 200 <= status_code < 300
+        retryable = not done and is_retryable(status_code)
+        attempts = row.attempts + 1
+
+        with self.__lock:
+            with self.__session_maker() as session:
+                query = session.query(OutboxTable).filter(
+                    OutboxTable.id == row.id,
+                    OutboxTable.revision == row.revision,
+                )
+
+                deleted = 0
+                if done and row.method == "POST":
+                    query.update({"completed": time.time(), "response": response})
+                    dev_log.info(f"Запрос {row.key} из очереди выполнен")
+
+                elif done:
+                    deleted = query.delete()
+                    dev_log.info(f"Запрос {row.key} из очереди выполнен")
+
+                elif not retryable or attempts >= self.__max_attempts:
+                    deleted = query.delete()
+                    dev_log.error(
+                        f"Запрос {row.method} {row.url} ({row.key}) удален из очереди после {attempts} попыток, "
+                        f"последний статус код {status_code}: {row.body}"
+                    )
+
+                else:
+                    query.update(
+                        {
+                            "attempts": attempts,
+                            "last_error": str(status_code),
+                            "next_attempt": time.time() + self.__get_delay(attempts),
+                        }
+                    )
+
+                try:
+                    session.commit()
+                    if deleted:
+                        self.__keys.discard(row.key)
+                except Exception as ex:
+                    session.rollback()
+                    dev_log.exception(
+                        f"Не удалось сохранить результат повтора запроса {row.key}",
+                        exc_info=ex,
+                    )
+
+        return done
+
+    def __delete_old_results(self) -> None:
+        """Метод удаляет из очереди результаты выполненных запросов, которые не были востребованы за время хранения"""
+        with self.__lock:
+            with self.__session_maker() as session:
+                old_keys = [
+                    i_key
+                    for i_key, in session.query(OutboxTable.key).filter(
+                        OutboxTable.completed < time.time() - self.__result_lifetime
+                    )
+                ]
+                if not old_keys:
+                    return
+
+                try:
+                    session.query(OutboxTable).filter(
+                        OutboxTable.key.in_(old_keys)
+                    ).delete()
+                    session.commit()
+                    self.__keys.difference_update(old_keys)
+                except Exception as ex:
+                    session.rollback()
+                    dev_log.exception(
+                        "Не удалось удалить устаревшие результаты запросов очереди",
+                        exc_info=ex,
+                    )
+
+    def drain_once(self) -> int:
+        """
+            Метод повторяет запросы очереди, время повтора которых наступило, и возвращает количество успешно
+        выполненных запросов. Пока выключатель запросов разомкнут, запросы не повторяются
+        """
+        self.__delete_old_results()
+        with self.__session_maker(expire_on_commit=False) as session:
+            rows: List[OutboxTable] = (
+                session.query(OutboxTable)
+                .filter(
+                    OutboxTable.completed.is_(None),
+                    OutboxTable.next_attempt <= time.time(),
+                )
+                .order_by(OutboxTable.id)
+                .limit(self.__batch_size)
+                .all()
+            )
+            session.expunge_all()
+
+        done = 0
+        for i_row in rows:
+            if not self.breaker.allow_request():
+                break
+
+            status_code, response = self.__send(i_row)
+            if is_retryable(status_code):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            done += self.__save_result(i_row, status_code, response)
+
+        return done
+
+    @execute_in_new_thread(daemon=True)
+    def drain(self) -> None:
+        """
+            Этот метод - бесконечный цикл выполняемый в отдельном потоке - служит для повтора запросов, находящихся
+        в очереди
+        """
+        while True:
+            try:
+                self.drain_once()
+            except Exception as ex:
+                dev_log.exception(
+                    "При повторе запросов из очереди произошла ошибка:", exc_info=ex
+                )
+            time.sleep(self.__poll_interval)
@@ -5,15 +5,15 @@
 
 import functools
 import time
-from dataclasses import dataclass
 from datetime import datetime, timedelta
-from sys import getsizeof
-from threading import Semaphore, Thread
+from threading import Thread
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import pytz
 
 from ..logger import get_development_logger
+from .cache_backend import CacheBackend, CacheData, MemoryCacheBackend
+from .deadline import deadline_step
 
 dev_log = get_development_logger(__name__)
 moscow_tz = pytz.timezone("Europe/Moscow")
@@ -65,19 +65,41 @@ def singleton(cls):
 class ProjectCache:
     """
         Класс - модель кэша данных. Позволяет сохранять полученную от API информацию, которая может быть
-    переиспользована некоторое время. Используется в качестве декоратора.
+    переиспользована некоторое время. Используется в качестве декоратора. Данные хранятся в хранилище (бэкенде) кэша,
+    по умолчанию - в оперативной памяти процесса. Хранилище может быть заменено методом set_backend, например на общее
+    для нескольких процессов бота хранилище.
     """
 
-    def __init__(self):
-        self.__memory = dict()
+    def __init__(self, backend: Optional[CacheBackend] = None, lifetime: int = 43200):
+        self.__backend: CacheBackend = backend or MemoryCacheBackend()
+        self.__lifetime: int = lifetime
+        self.__data_control()
+
+    Data = CacheData
+
+    def set_backend(self, backend: CacheBackend) -> None:
+        """
+            Метод заменяет хранилище кэша. Так как объект кэша является синглтоном и создается при импорте модулей
+        проекта, хранилище, выбранное в файле config.yaml, передается в кэш этим методом
+        """
+        self.__backend = backend
 
-    @dataclass
-    class Data:
-        result: Any
-        saving_time: datetime
+    @property
+    def is_shared(self) -> bool:
+        """Показывает, используется ли общее для нескольких процессов хранилище кэша"""
+        return self.__backend.shared
+
+    def get_data(self, key: str) -> Optional[Any]:
+        """Метод возвращает данные, сохраненные в кэше по указанному ключу, или None"""
+        data = self.__backend.get(key)
+        if data is not None:
+            return data.result
+
+    def set_data(self, key: str, result: Any) -> None:
+        """Метод сохраняет данные в кэше по указанному ключу"""
+        self.__backend.set(key, self.Data(result, datetime.now(moscow_tz)))
 
     def __call__(self, func: Callable) -> Callable:
-        self.__data_control()
 
         @functools.wraps(func)
         def wrapped(*args, **kwargs) -> Any:
@@ -92,12 +114,13 @@ class ProjectCache:
                     *kwargs.keys(),
                 ]
             )
-            data = self.__memory.get(key, None)
+            data = self.__backend.get(key)
 
             if data is None:
-                data = self.Data(func(*args, **kwargs), datetime.now(moscow_tz))
+                with deadline_step(f"загрузка {func.__name__} в кэш"):
+                    data = self.Data(func(*args, **kwargs), datetime.now(moscow_tz))
                 if not data.result is None:
-                    self.__memory[key] = data
+                    self.__backend.set(key, data)
 
             return data.result
 
@@ -112,18 +135,14 @@ class ProjectCache:
         while True:
             time.sleep(3600)
 
-            start_size = getsizeof(self.__memory)
-
-            for i_key, i_data in list(self.__memory.items()):
-                if datetime.now(moscow_tz) - i_data.saving_time > timedelta(
-                    seconds=43200
-                ):
-                    with Semaphore():
-                        self.__memory.pop(i_key)
+            start_size = self.__backend.size()
+            self.__backend.delete_older_than(
+                datetime.now(moscow_tz) - timedelta(seconds=self.__lifetime)
+            )
+            new_size = self.__backend.size()
 
-            new_size = getsizeof(self.__memory)
             dev_log.debug(
-                f"Размер кэша {self.__name__} до/после очистки: {start_size}/{new_size}"
+                f"Размер кэша {type(self.__backend).__name__} до/после очистки: {start_size}/{new_size}"
             )
 
 